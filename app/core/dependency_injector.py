@@ -51,6 +51,30 @@ class DependencyInjector:
         else:
             raise KeyError(f"Service '{name}' not found")
 
+    def has(self, name: str) -> bool:
+        """
+        是否已注册服务
+
+        Args:
+            name: 服务名称
+
+        Returns:
+            bool: 是否已注册
+        """
+        return name in self._singletons or name in self._services
+
+    def is_instantiated(self, name: str) -> bool:
+        """
+        单例服务是否已创建实例（不会触发创建）
+
+        Args:
+            name: 服务名称
+
+        Returns:
+            bool: 是否已创建
+        """
+        return name in self._singletons and not isinstance(self._singletons[name], type)
+
     def inject(self, cls: Type) -> Any:
         """
         注入依赖并创建实例
@@ -62,4 +86,20 @@ class DependencyInjector:
             Any: 实例
         """
         # 这里可以实现更复杂的依赖注入逻辑
-        return cls()
\ No newline at end of file
+        return cls()
+
+
+_injector = None
+
+
+def get_injector() -> DependencyInjector:
+    """
+    获取全局依赖注入器
+
+    Returns:
+        DependencyInjector: 应用共用的注入器
+    """
+    global _injector
+    if _injector is None:
+        _injector = DependencyInjector()
+    return _injector
@@ -4,18 +4,44 @@
 负责功能模块的注册、激活和管理
 """
 
+import importlib
+import threading
 from typing import Dict, Optional, List, Callable
 from PyQt6.QtCore import QObject, pyqtSignal
 from .base_module import BaseFunctionModule
 
 
 class ModuleInfo:
-    """模块信息类，用于懒加载时存储模块元数据"""
-    def __init__(self, name: str, display_name: str, icon: str = "", description: str = ""):
+    """
+    模块信息类（模块清单），用于懒加载时存储模块元数据
+
+    entry_point 形如 "app.modules.deduplication.module:DeduplicationModule"，
+    只在模块首次激活时才导入并实例化。
+    """
+    def __init__(self, name: str, display_name: str, icon: str = "", description: str = "",
+                 entry_point: str = ""):
         self.name = name
         self.display_name = display_name
         self.icon = icon
         self.description = description
+        self.entry_point = entry_point
+
+    @property
+    def module_path(self) -> str:
+        """入口点所在的Python模块路径"""
+        return self.entry_point.partition(":")[0]
+
+    def load_class(self) -> Callable[[], BaseFunctionModule]:
+        """
+        导入入口点指向的模块类
+
+        Returns:
+            Callable[[], BaseFunctionModule]: 模块类
+        """
+        module_path, _, class_name = self.entry_point.partition(":")
+        if not module_path or not class_name:
+            raise ValueError(f"无效的模块入口点: {self.entry_point!r}")
+        return getattr(importlib.import_module(module_path), class_name)
 
 
 class FunctionManager(QObject):
@@ -52,42 +78,81 @@ class FunctionManager(QObject):
             self._module_order.append(module.name)
         return True
 
-    def register_module_constructor(self, name: str, constructor: Callable[[], BaseFunctionModule], display_name: str = None) -> bool:
+    def register_module_constructor(self, name: str, constructor: Callable[[], BaseFunctionModule],
+                                    display_name: str = None, icon: str = "", description: str = "") -> bool:
         """
         注册功能模块构造函数（用于懒加载）
 
+        显示信息由调用方提供，注册时不会创建模块实例。
+
         Args:
             name: 模块名称
             constructor: 模块构造函数
-            display_name: 显示名称
+            display_name: 显示名称，默认为模块名称
+            icon: 图标
+            description: 描述
 
         Returns:
             bool: 注册是否成功
         """
         if name in self.module_constructors:
             return False
-        
-        # 临时创建模块实例以获取元数据，但不保存实例
-        temp_module = constructor()
-        if display_name:
-            display_name_to_use = display_name
-        else:
-            display_name_to_use = temp_module.display_name
-            
-        # 存储模块信息
+
         self.module_infos[name] = ModuleInfo(
-            name=temp_module.name,
-            display_name=display_name_to_use,
-            icon=getattr(temp_module, 'icon', ''),
-            description=getattr(temp_module, 'description', '')
+            name=name,
+            display_name=display_name or name,
+            icon=icon,
+            description=description
         )
-        
-        # 保存构造函数
         self.module_constructors[name] = constructor
         if name not in self._module_order:
             self._module_order.append(name)
         return True
 
+    def register_manifest(self, info: ModuleInfo) -> bool:
+        """
+        根据模块清单注册功能模块
+
+        只保存清单信息，模块代码在首次激活（或后台预热）时才导入。
+
+        Args:
+            info: 模块清单
+
+        Returns:
+            bool: 注册是否成功
+        """
+        if info.name in self.module_constructors:
+            return False
+
+        self.module_infos[info.name] = info
+        self.module_constructors[info.name] = lambda: info.load_class()()
+        if info.name not in self._module_order:
+            self._module_order.append(info.name)
+        return True
+
+    def warm_up_modules(self) -> threading.Thread:
+        """
+        在后台线程中预先导入所有已注册清单的模块代码
+
+        只做导入（Qt对象仍在激活时于主线程创建），使首次激活无需等待导入。
+
+        Returns:
+            threading.Thread: 预热线程
+        """
+        module_paths = [info.module_path for info in self.module_infos.values()
+                        if info.entry_point and info.name not in self.modules]
+
+        def warm_up():
+            for module_path in module_paths:
+                try:
+                    importlib.import_module(module_path)
+                except Exception as e:
+                    print(f"预热模块失败 {module_path}: {e}")
+
+        thread = threading.Thread(target=warm_up, name="module-warm-up", daemon=True)
+        thread.start()
+        return thread
+
     def unregister_module(self, name: str) -> bool:
         """
         注销功能模块
@@ -116,13 +181,7 @@ class FunctionManager(QObject):
             bool: 激活是否成功
         """
         # 如果模块尚未加载，但有构造函数，则创建实例
-        if name not in self.modules and name in self.module_constructors:
-            # 使用构造函数创建模块实例
-            constructor = self.module_constructors[name]
-            module = constructor()
-            self.modules[name] = module
-
-        if name not in self.modules:
+        if self.get_module(name) is None:
             return False
 
         if self.active_module and self.active_module.name != name:
@@ -214,6 +273,30 @@ class FunctionManager(QObject):
         
         return None
 
+    def get_module_info(self, name: str) -> Optional[ModuleInfo]:
+        """
+        获取模块清单信息（不加载完整模块）
+
+        Args:
+            name: 模块名称
+
+        Returns:
+            ModuleInfo: 模块信息，如果不存在则返回None
+        """
+        if name in self.module_infos:
+            return self.module_infos[name]
+
+        if name in self.modules:
+            module = self.modules[name]
+            return ModuleInfo(
+                name=module.name,
+                display_name=module.display_name,
+                icon=getattr(module, 'icon', ''),
+                description=getattr(module, 'description', '')
+            )
+
+        return None
+
     def get_active_module(self) -> Optional[BaseFunctionModule]:
         """
         获取当前激活的模块
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+统一的任务执行服务
+
+所有后台任务经同一个 TaskExecutor 调度，避免各模块各自创建线程导致
+扫描、转换、缩略图同时运行时线程数超过CPU核数：
+- IO 池（线程）：文件遍历、读取，以及驱动整个扫描/转换流程的长任务
+- CPU 池（进程）：可序列化的纯计算任务（编码、解码），不受 GIL 限制
+CPU 密集的工作共享一组 CPU 名额（默认为 CPU 核数减一）：CPU 池的在途任务、
+以及在其他线程中执行的解码（缩略图、哈希计算，通过 cpu_slot）都占用名额，
+多个任务同时运行时总并发不超过名额数。
+解码大图的内存另有预算：解码前按文件头中的尺寸估算内存并申请额度，
+在途解码的总内存不超过预算（单张超出预算的图片在没有其他解码时放行）。
+每个池的待执行任务数有上限，提交方在队列满时阻塞（背压）；
+取消令牌用于协作式取消，取消时尚未开始的任务直接丢弃。
+服务通过 DependencyInjector 以单例注册，首次使用时才创建进程池。
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.dependency_injector import get_injector
+
+# 服务名称
+SERVICE_NAME = "task_executor"
+
+# 池名称
+IO_POOL = "io"
+CPU_POOL = "cpu"
+
+# 保留的最近任务记录数
+_RECENT_TASKS = 500
+
+# 环境变量：解码内存预算（MB）
+DECODE_BUDGET_ENV = "IMAGETRIM_DECODE_BUDGET_MB"
+
+_register_lock = threading.Lock()
+
+
+class TaskCancelled(Exception):
+    """任务在开始前或执行中被取消"""
+
+
+class TaskQueueFull(RuntimeError):
+    """在超时时间内未能进入任务队列"""
+
+
+class CancellationToken:
+    """
+    协作式取消令牌
+
+    长任务应定期检查 cancelled（或调用 raise_if_cancelled）；
+    取消时，关联的尚未开始的任务会被直接取消。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self):
+        """取消"""
+        self._event.set()
+        with self._lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.cancel()
+
+    def raise_if_cancelled(self):
+        """已取消时抛出 TaskCancelled"""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+    def _attach(self, future: Future):
+        """关联任务，令牌取消时一并取消"""
+        with self._lock:
+            if not self._event.is_set():
+                self._futures.append(future)
+                future.add_done_callback(self._detach)
+                return
+        future.cancel()
+
+    def _detach(self, future: Future):
+        with self._lock:
+            if future in self._futures:
+                self._futures.remove(future)
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict,
+                token: Optional[CancellationToken] = None) -> Tuple[float, float, Any]:
+    """
+    在工作线程/进程中执行任务并记录起止时间（模块级函数，可被进程池序列化）
+
+    Returns:
+        Tuple[float, float, Any]: (开始时间, 结束时间, 返回值)
+    """
+    started = time.time()
+    if token is not None:
+        token.raise_if_cancelled()
+    result = fn(*args, **kwargs)
+    return started, time.time(), result
+
+
+def _default_decode_budget() -> int:
+    """默认解码内存预算：环境变量指定，否则为物理内存的1/4（256MB 至 4GB）"""
+    try:
+        return int(float(os.environ[DECODE_BUDGET_ENV]) * 1024 * 1024)
+    except (KeyError, ValueError):
+        pass
+    try:
+        physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        physical = 4 * 1024 ** 3
+    return min(4 * 1024 ** 3, max(256 * 1024 ** 2, physical // 4))
+
+
+class _MemoryBudget:
+    """在途解码内存的额度"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._condition = threading.Condition()
+        self.stats = {"in_use": 0, "peak": 0, "admitted": 0, "waits": 0, "wait_seconds": 0.0}
+
+    def acquire(self, amount: int) -> int:
+        """
+        申请额度，超出预算时阻塞；超过整个预算的申请在没有其他占用时放行
+
+        Returns:
+            int: 实际占用的额度，释放时传回
+        """
+        amount = min(max(0, amount), self.limit)
+        with self._condition:
+            if self.stats["in_use"] and self.stats["in_use"] + amount > self.limit:
+                started = time.time()
+                self.stats["waits"] += 1
+                while self.stats["in_use"] and self.stats["in_use"] + amount > self.limit:
+                    self._condition.wait()
+                self.stats["wait_seconds"] += time.time() - started
+            self.stats["in_use"] += amount
+            self.stats["admitted"] += 1
+            self.stats["peak"] = max(self.stats["peak"], self.stats["in_use"])
+        return amount
+
+    def release(self, amount: int):
+        with self._condition:
+            self.stats["in_use"] -= amount
+            self._condition.notify_all()
+
+
+class _Pool:
+    """一个执行池及其队列上限与统计"""
+
+    def __init__(self, name: str, workers: int, max_pending: int, factory: Callable[[], Any]):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.stats = {
+            "submitted": 0, "completed": 0, "failed": 0, "cancelled": 0,
+            "pending": 0, "wait_seconds": 0.0, "run_seconds": 0.0,
+        }
+        self._factory = factory
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._factory()
+            return self._executor
+
+    def shutdown(self, wait_done: bool):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait_done, cancel_futures=True)
+
+
+class TaskExecutor:
+    """
+    任务执行服务
+
+    Args:
+        cpu_workers: CPU 池进程数，默认为 CPU 核数减一
+        io_workers: IO 池线程数，默认为 CPU 核数的两倍（至少4，至多32）
+        max_pending: 每个池的待执行任务上限，默认为工作者数量的4倍
+        decode_budget: 解码内存预算（字节），默认见 IMAGETRIM_DECODE_BUDGET_MB，否则为物理内存的1/4
+    """
+
+    def __init__(self, cpu_workers: Optional[int] = None, io_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, decode_budget: Optional[int] = None):
+        cores = os.cpu_count() or 1
+        cpu_workers = cpu_workers or max(1, cores - 1)
+        io_workers = io_workers or min(32, max(4, cores * 2))
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=_RECENT_TASKS)
+        self._cpu_slots = threading.BoundedSemaphore(cpu_workers)
+        self._decode_budget = _MemoryBudget(decode_budget or _default_decode_budget())
+        self._pools = {
+            IO_POOL: _Pool(IO_POOL, io_workers, max_pending or io_workers * 4,
+                           lambda: ThreadPoolExecutor(io_workers, thread_name_prefix="imagetrim-io")),
+            CPU_POOL: _Pool(CPU_POOL, cpu_workers, max_pending or cpu_workers * 4,
+                            # 界面进程中有多个线程在运行，fork 可能继承被占用的锁，统一使用 spawn
+                            lambda: ProcessPoolExecutor(cpu_workers, mp_context=multiprocessing.get_context("spawn"))),
+        }
+
+    def workers(self, pool: str) -> int:
+        """池的工作者数量"""
+        return self._pools[pool].workers
+
+    @property
+    def decode_budget(self) -> int:
+        """解码内存预算（字节）"""
+        return self._decode_budget.limit
+
+    @contextmanager
+    def cpu_slot(self):
+        """
+        占用一个 CPU 名额执行 CPU 密集的代码（阻塞直到有空闲名额）
+
+        不要在持有名额时向 CPU 池提交任务并等待其结果。
+        """
+        self._cpu_slots.acquire()
+        try:
+            yield
+        finally:
+            self._cpu_slots.release()
+
+    @contextmanager
+    def decode_slot(self, nbytes: int):
+        """
+        占用解码内存额度（阻塞直到在途解码的总内存不超过预算）
+
+        先申请内存额度再申请 CPU 名额，避免持有名额等待内存。
+
+        Args:
+            nbytes: 估算的解码内存（见 ImageUtils.get_image_info 的 decoded_bytes）
+        """
+        amount = self._decode_budget.acquire(nbytes)
+        try:
+            yield
+        finally:
+            self._decode_budget.release(amount)
+
+    def submit(self, pool: str, fn: Callable, *args, name: Optional[str] = None,
+               token: Optional[CancellationToken] = None, timeout: Optional[float] = None,
+               memory_bytes: int = 0, **kwargs) -> Future:
+        """
+        提交任务
+
+        Args:
+            pool: IO_POOL 或 CPU_POOL；CPU 池的函数与参数必须可被序列化
+            fn: 任务函数
+            name: 任务名称，用于统计
+            token: 取消令牌
+            timeout: 队列已满时最多等待的秒数，None表示一直等待
+            memory_bytes: 任务解码所需的内存，提交前申请解码内存额度（阻塞），任务结束时释放
+
+        Returns:
+            Future: 任务结果；任务被取消时 Future 为已取消状态
+
+        Raises:
+            TaskQueueFull: 超时仍未能进入队列
+        """
+        target = self._pools[pool]
+        future = Future()
+        if token is not None:
+            token._attach(future)
+        if future.cancelled():
+            self._record(target, name or fn.__name__, "cancelled", 0.0, 0.0)
+            return future
+
+        memory = self._decode_budget.acquire(memory_bytes) if memory_bytes else 0
+        if not target.slots.acquire(timeout=timeout):
+            self._decode_budget.release(memory)
+            raise TaskQueueFull(f"{pool} 任务队列已满（{target.max_pending}）")
+        # CPU 池任务在途期间占用 CPU 名额，进程池中不会积压超过名额数的任务
+        if pool == CPU_POOL and not self._cpu_slots.acquire(timeout=timeout):
+            target.slots.release()
+            self._decode_budget.release(memory)
+            raise TaskQueueFull(f"{pool} 没有空闲的 CPU 名额")
+
+        submitted = time.time()
+        with self._lock:
+            target.stats["submitted"] += 1
+            target.stats["pending"] += 1
+
+        try:
+            # 线程池直接检查令牌；进程池无法共享令牌，只在开始前取消
+            inner = target.executor.submit(_timed_call, fn, args, kwargs,
+                                           token if pool == IO_POOL else None)
+        except Exception:
+            self._finish(target, name or fn.__name__, "failed", submitted, None)
+            self._decode_budget.release(memory)
+            raise
+
+        if memory:
+            # 任务真正结束（或未开始即取消）时才释放，取消外部 Future 不会提前释放
+            inner.add_done_callback(lambda _: self._decode_budget.release(memory))
+
+        future.add_done_callback(lambda outer: outer.cancelled() and inner.cancel())
+        inner.add_done_callback(
+            lambda done: self._on_done(target, name or fn.__name__, submitted, done, future)
+        )
+        return future
+
+    def submit_io(self, fn: Callable, *args, **kwargs) -> Future:
+        """提交到 IO 池，参数同 submit"""
+        return self.submit(IO_POOL, fn, *args, **kwargs)
+
+    def submit_cpu(self, fn: Callable, *args, **kwargs) -> Future:
+        """提交到 CPU 池，参数同 submit"""
+        return self.submit(CPU_POOL, fn, *args, **kwargs)
+
+    def map(self, pool: str, fn: Callable, items: Iterable, name: Optional[str] = None,
+            token: Optional[CancellationToken] = None, window: Optional[int] = None,
+            memory_bytes: Optional[Callable[[Any], int]] = None) -> Iterator[Tuple[Any, Future]]:
+        """
+        对每个条目提交 fn(item)，按提交顺序产出已完成的任务
+
+        同时在途的任务不超过 window 个，条目可以是惰性生成的。
+
+        Args:
+            pool: IO_POOL 或 CPU_POOL
+            fn: 任务函数
+            items: 条目
+            name: 任务名称
+            token: 取消令牌，取消后不再提交新条目
+            window: 在途任务上限，默认为池工作者数量的2倍
+            memory_bytes: 可选的函数 memory_bytes(item) -> int，每个条目的解码内存（见 submit）
+
+        Returns:
+            Iterator[Tuple[Any, Future]]: (条目, 已完成或已取消的 Future)
+        """
+        window = window or self._pools[pool].workers * 2
+        in_flight = deque()
+        for item in items:
+            if token is not None and token.cancelled:
+                break
+            in_flight.append((item, self.submit(pool, fn, item, name=name, token=token,
+                                                memory_bytes=memory_bytes(item) if memory_bytes else 0)))
+            if len(in_flight) >= window:
+                item, future = in_flight.popleft()
+                wait([future])
+                yield item, future
+        while in_flight:
+            item, future = in_flight.popleft()
+            wait([future])
+            yield item, future
+
+    def _on_done(self, target: _Pool, name: str, submitted: float, inner: Future, outer: Future):
+        """内部任务完成：释放队列名额、记录统计并完成外部 Future"""
+        if inner.cancelled():
+            self._finish(target, name, "cancelled", submitted, None)
+            outer.cancel()
+            return
+
+        error = inner.exception()
+        if error is None:
+            started, finished, result = inner.result()
+            self._finish(target, name, "completed", submitted, (started, finished))
+        else:
+            self._finish(target, name, "cancelled" if isinstance(error, TaskCancelled) else "failed",
+                         submitted, None)
+
+        if not outer.set_running_or_notify_cancel():
+            return
+        if error is None:
+            outer.set_result(result)
+        else:
+            outer.set_exception(error)
+
+    def _finish(self, target: _Pool, name: str, status: str, submitted: float,
+                timing: Optional[Tuple[float, float]]):
+        target.slots.release()
+        if target.name == CPU_POOL:
+            self._cpu_slots.release()
+        with self._lock:
+            target.stats["pending"] -= 1
+        wait_seconds, run_seconds = 0.0, 0.0
+        if timing is not None:
+            started, finished = timing
+            wait_seconds, run_seconds = max(0.0, started - submitted), finished - started
+        self._record(target, name, status, wait_seconds, run_seconds)
+
+    def _record(self, target: _Pool, name: str, status: str, wait_seconds: float, run_seconds: float):
+        with self._lock:
+            target.stats[status] += 1
+            target.stats["wait_seconds"] += wait_seconds
+            target.stats["run_seconds"] += run_seconds
+            self._recent.append({
+                "name": name,
+                "pool": target.name,
+                "status": status,
+                "wait_seconds": wait_seconds,
+                "run_seconds": run_seconds,
+            })
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        导出统计
+
+        Returns:
+            Dict[str, Any]: 每个池的计数、排队与执行耗时，最近任务记录，以及解码内存预算的使用情况
+        """
+        with self._lock:
+            data = {name: dict(pool.stats, workers=pool.workers, max_pending=pool.max_pending)
+                    for name, pool in self._pools.items()}
+            data["recent"] = list(self._recent)
+        with self._decode_budget._condition:
+            data["decode_budget"] = dict(self._decode_budget.stats, limit=self._decode_budget.limit)
+        return data
+
+    def shutdown(self, wait_done: bool = False):
+        """
+        关闭所有池，尚未开始的任务被取消
+
+        Args:
+            wait_done: 是否等待正在执行的任务结束
+        """
+        for pool in self._pools.values():
+            pool.shutdown(wait_done)
+
+
+def get_task_executor() -> TaskExecutor:
+    """
+    获取全局任务执行服务（未注册时以默认配置注册）
+
+    Returns:
+        TaskExecutor: 任务执行服务
+    """
+    injector = get_injector()
+    with _register_lock:
+        if not injector.has(SERVICE_NAME):
+            injector.register(SERVICE_NAME, TaskExecutor, singleton=True)
+        return injector.get(SERVICE_NAME)
+
+
+def shutdown_task_executor():
+    """关闭已创建的全局任务执行服务"""
+    injector = get_injector()
+    if injector.is_instantiated(SERVICE_NAME):
+        injector.get(SERVICE_NAME).shutdown()
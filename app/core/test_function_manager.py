@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+功能管理器单元测试
+"""
+
+import os
+import sys
+import unittest
+
+# 添加项目路径到sys.path
+project_root = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.abspath(project_root))
+
+try:
+    from PyQt6.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
+
+if QApplication is not None:
+    from app.core.function_manager import FunctionManager, ModuleInfo
+    from app.modules import MODULE_MANIFESTS
+
+
+@unittest.skipIf(QApplication is None, "需要PyQt6")
+class TestFunctionManager(unittest.TestCase):
+    """功能管理器测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_register_constructor_does_not_instantiate(self):
+        """注册构造函数时不创建模块实例"""
+        calls = []
+        manager = FunctionManager()
+        manager.register_module_constructor("dummy", lambda: calls.append(1), "示例", icon="🧪")
+
+        self.assertEqual(calls, [])
+        info = manager.get_module_info("dummy")
+        self.assertEqual(info.display_name, "示例")
+        self.assertEqual(info.icon, "🧪")
+
+    def test_manifest_loads_on_activation(self):
+        """模块清单在激活时才导入并实例化"""
+        manager = FunctionManager()
+        for info in MODULE_MANIFESTS:
+            self.assertTrue(manager.register_manifest(info))
+        self.assertEqual(manager.modules, {})
+        self.assertEqual(manager.get_module_names(), [info.name for info in MODULE_MANIFESTS])
+
+        self.assertTrue(manager.activate_module("avif_converter"))
+        self.assertEqual(list(manager.modules), ["avif_converter"])
+        self.assertEqual(manager.get_active_module().name, "avif_converter")
+
+    def test_invalid_entry_point(self):
+        """无效的入口点抛出异常"""
+        with self.assertRaises(ValueError):
+            ModuleInfo("broken", "损坏", entry_point="app.modules").load_class()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,11 +3,15 @@
 图片处理工具套件 - PyQt6版本
 """
 
+import multiprocessing
 import sys
 import os
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# 尽早导入以记录启动起点
+from app.utils import startup_timer
+
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont, QFontDatabase
@@ -192,12 +196,21 @@ def main():
     image_loader_controller = GlobalImageLoader()
     image_loader_controller.start_early_download()
 
+    # 异步缩略图服务自检
+    from app.utils.image_cache_enhanced import check_thumbnail_service
+    for problem in check_thumbnail_service():
+        print(f"[WARNING] {problem}")
+
     # 设置字体并获取选中的字体家族
     font_family = setup_font(app)
 
     # 使用选中的字体设置主题
     setup_theme(app, font_family)
 
+    # 退出时关闭任务执行服务（取消尚未开始的任务、结束进程池）
+    from app.core.task_executor import shutdown_task_executor
+    app.aboutToQuit.connect(shutdown_task_executor)
+
     window = MainWindow()
     # 注意：窗口不会立即显示，会等待欢迎屏幕图片加载完成
     print("应用程序启动，等待欢迎屏幕图片加载完成...")
@@ -205,4 +218,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序中，CPU 进程池的子进程从同一个可执行文件启动
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
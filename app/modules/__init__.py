@@ -1 +1,25 @@
-# 功能模块包
\ No newline at end of file
+# 功能模块包
+#
+# 模块清单：功能面板只根据清单显示卡片，模块代码在首次激活时才导入。
+# 注意不要在此处导入各子包，否则会把模块代码带回启动路径。
+
+from app.core.function_manager import ModuleInfo
+
+MODULE_MANIFESTS = [
+    ModuleInfo(
+        name="deduplication",
+        display_name="图片去重",
+        icon="🔍",
+        description="查找并处理重复或相似的图片",
+        entry_point="app.modules.deduplication.module:DeduplicationModule",
+    ),
+    ModuleInfo(
+        name="avif_converter",
+        display_name="AVIF转换",
+        icon="🔄",
+        description="将图片转换为AVIF格式以节省存储空间",
+        entry_point="app.modules.avif_converter.module:AVIFConverterModule",
+    ),
+]
+
+__all__ = ['MODULE_MANIFESTS']
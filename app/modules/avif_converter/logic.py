@@ -6,13 +6,62 @@ AVIF转换模块逻辑实现
 import os
 import threading
 from datetime import datetime
-from PIL import Image
 
-# 导入AVIF支持插件
-try:
-    import pillow_avif
-except ImportError:
-    pillow_avif = None
+# Pillow 延迟导入，首次使用时自动注册AVIF支持插件
+from app.utils.image_utils import Image, ImageUtils
+from app.utils.profiler import profiled
+from app.utils.read_ahead import MemoryReader, ReadAheadReader
+from app.utils.dir_walker import DirectoryWalker
+from app.core.task_executor import CPU_POOL, CancellationToken, get_task_executor
+
+# 输出格式对应的扩展名
+FORMAT_EXTENSIONS = {
+    'AVIF': '.avif',
+    'WEBP': '.webp',
+    'JPEG': '.jpg',
+    'PNG': '.png',
+}
+
+
+def convert_file(file_path: str, target_file: str, format_type: str, quality: int, data=None) -> int:
+    """
+    转换单个图片（在 CPU 进程池中执行）
+
+    Args:
+        file_path: 源文件路径
+        target_file: 目标文件路径
+        format_type: 输出格式（AVIF/WEBP/JPEG/PNG）
+        quality: 质量
+        data: 可选的已读入内存的源文件内容，提供时不再读取源文件
+
+    Returns:
+        int: 转换后的文件大小
+    """
+    format_type = format_type.upper()
+    with Image.open(MemoryReader(data) if data is not None else file_path) as img:
+        # 处理RGBA模式图片
+        if img.mode == 'RGBA':
+            # 创建白色背景
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # 根据格式保存
+        try:
+            if format_type == 'PNG':
+                img.save(target_file, format='PNG')
+            else:
+                img.save(target_file, format=format_type, quality=quality)
+        except Exception:
+            # 尝试使用注册的扩展名格式
+            if format_type == 'PNG':
+                img.save(target_file)
+            else:
+                img.save(target_file, quality=quality)
+
+    return os.path.getsize(target_file)
 
 
 class AVIFConverterLogic:
@@ -22,20 +71,24 @@ class AVIFConverterLogic:
 
     def __init__(self, module):
         self.module = module
-        self.is_running = False
-        
-    def convert_images(self, params: dict):
+
+    @profiled("convert", output_dir=lambda self, params, token: params.get('target_path'))
+    def convert_images(self, params: dict, token: CancellationToken):
         """
         转换图片
 
+        遍历与结果汇总在当前线程中进行；源文件在 IO 池中预读，
+        每个文件的解码与编码提交到 CPU 进程池并行执行，进程中不再阻塞于读取。
+
         Args:
             params: 转换参数
+            token: 取消令牌
         """
         try:
             # 检查AVIF支持
             format_type = params.get('format', 'AVIF')
             if format_type.upper() == 'AVIF' and '.avif' not in Image.registered_extensions():
-                self.module.log_message.emit("错误：AVIF格式不可用。请安装 pillow-avif 插件：pip install pillow-avif", "error")
+                self.module.progress_channel.log("错误：AVIF格式不可用。请安装 pillow-avif 插件：pip install pillow-avif", "error")
                 self.module.execution_finished.emit({})
                 return
             source_path = params['source_path']
@@ -43,7 +96,7 @@ class AVIFConverterLogic:
             quality = params.get('quality', 85)
             format_type = params.get('format', 'AVIF')
             scan_subdirs = params.get('include_subdirs', True)
-            
+
             # 初始化统计信息
             total_files = 0
             converted_files = 0
@@ -51,175 +104,126 @@ class AVIFConverterLogic:
             total_original_size = 0
             total_converted_size = 0
             original_files = []  # 保存成功转换的原图路径
-            
+
             # 收集要转换的文件
             image_files = []
             valid_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
-            
-            if scan_subdirs:
-                for root, _, files in os.walk(source_path):
-                    if not self.is_running: 
-                        self.module.log_message.emit("转换已停止", "info")
-                        return
-                    for file in files:
-                        if file.lower().endswith(valid_extensions):
-                            image_files.append((os.path.join(root, file), root))
-            else:
-                for file in os.listdir(source_path):
-                    if not self.is_running: 
-                        self.module.log_message.emit("转换已停止", "info")
-                        return
-                    if file.lower().endswith(valid_extensions):
-                        image_files.append((os.path.join(source_path, file), source_path))
-            
+
+            walker = DirectoryWalker(max_depth=None if scan_subdirs else 0)
+            for root, files in walker.walk(source_path, lambda: token.cancelled):
+                for entry in files:
+                    if entry.name.lower().endswith(valid_extensions):
+                        image_files.append((entry.path, root))
+            if token.cancelled:
+                self.module.progress_channel.log("转换已停止", "info")
+                return
+
             if not image_files:
-                self.module.log_message.emit("未找到要转换的图片文件", "warning")
+                self.module.progress_channel.log("未找到要转换的图片文件", "warning")
                 self.module.execution_finished.emit({})
                 return
-                
+
             total_files = len(image_files)
-            self.module.log_message.emit(f"找到 {total_files} 个文件需要转换", "info")
-            
+            self.module.progress_channel.log(f"找到 {total_files} 个文件需要转换", "info")
+
             # 更新进度标签和统计信息
-            self.module.progress_updated.emit(0, f"正在转换: 0/{total_files}")
-            # 发送统计信息更新信号（如果模块支持）
-            
-            # 转换文件
-            last_converted_source = None
-            last_converted_target = None
-            
-            for i, (file_path, original_dir) in enumerate(image_files):
-                if not self.is_running: 
-                    self.module.log_message.emit("转换已停止", "info")
-                    break
-                    
-                try:
-                    # 显示当前转换图片的预览
-                    if hasattr(self.module, 'workspace_ui') and self.module.workspace_ui:
-                        self.module.workspace_ui.show_preview(file_path)
+            self.module.progress_channel.report_progress(0, f"正在转换: 0/{total_files}")
 
-                    # 获取原始文件大小
-                    try:
-                        original_size = os.path.getsize(file_path)
-                        total_original_size += original_size
-                    except:
-                        original_size = 0
+            # 根据选择的格式确定扩展名，默认为AVIF
+            target_file_ext = FORMAT_EXTENSIONS.get(format_type.upper(), '.avif')
+            # 并行转换时已分配但尚未写出的目标文件，避免同名文件互相覆盖
+            reserved_targets = set()
 
+            def plan_targets():
+                """按顺序为每个源文件分配目标路径"""
+                for file_path, original_dir in image_files:
                     # 计算目标路径
                     relative_path = os.path.relpath(original_dir, source_path)
                     target_dir = os.path.join(target_path, relative_path) if relative_path != '.' else target_path
                     os.makedirs(target_dir, exist_ok=True)
 
-                    # 生成目标文件名
+                    # 生成目标文件名，已存在时追加序号
                     base_name = os.path.splitext(os.path.basename(file_path))[0]
+                    target_file = os.path.join(target_dir, f"{base_name}{target_file_ext}")
+                    counter = 1
+                    while target_file in reserved_targets or os.path.exists(target_file):
+                        target_file = os.path.join(target_dir, f"{base_name}_{counter}{target_file_ext}")
+                        counter += 1
+                    reserved_targets.add(target_file)
+                    yield file_path, target_file
 
-                    # 根据选择的格式确定扩展名
-                    if format_type.upper() == 'AVIF':
-                        target_file_ext = '.avif'
-                    elif format_type.upper() == 'WEBP':
-                        target_file_ext = '.webp'
-                    elif format_type.upper() == 'JPEG':
-                        target_file_ext = '.jpg'
-                    elif format_type.upper() == 'PNG':
-                        target_file_ext = '.png'
-                    else:
-                        target_file_ext = '.avif'  # 默认为AVIF
+            reader = ReadAheadReader.from_environment()
 
-                    target_file = os.path.join(target_dir, f"{base_name}{target_file_ext}")
+            def plan_sources():
+                """按顺序产出 (源文件, 目标文件, 源文件内容)，读取失败时由转换进程自行读取并报告错误"""
+                sources = reader.iterate([file_path for file_path, _ in image_files], lambda: token.cancelled)
+                for (file_path, target_file), source in zip(plan_targets(), sources):
+                    with source:
+                        # 复制出缓冲区后立即归还，进程池的在途任务数已有上限
+                        data = bytes(source.data) if source.data is not None else None
+                    yield file_path, target_file, data
 
-                    # 保存原始目标文件路径以处理重复
-                    original_target_file = target_file
+            executor = get_task_executor()
+            tasks = executor.map(
+                CPU_POOL,
+                _ConvertTask(format_type, quality),
+                plan_sources(),
+                name="convert_file",
+                token=token,
+                # 按文件头估算解码内存，进程池中同时解码的大图不超过解码内存预算
+                memory_bytes=lambda item: ImageUtils.get_image_info(item[0], item[2])['decoded_bytes']
+            )
 
-                    # 检查是否已存在
-                    if os.path.exists(target_file):
-                        counter = 1
-                        while os.path.exists(
-                            os.path.join(target_dir, f"{base_name}_{counter}{target_file_ext}")
-                        ):
-                            counter += 1
-                        target_file = os.path.join(target_dir, f"{base_name}_{counter}{target_file_ext}")
+            # 转换文件
+            for i, ((file_path, target_file, _), future) in enumerate(tasks):
+                if token.cancelled or future.cancelled():
+                    self.module.progress_channel.log("转换已停止", "info")
+                    break
 
-                    # 转换图片
-                    with Image.open(file_path) as img:
-                        # 处理RGBA模式图片
-                        if img.mode == 'RGBA':
-                            # 创建白色背景
-                            background = Image.new('RGB', img.size, (255, 255, 255))
-                            background.paste(img, mask=img.split()[-1])
-                            img = background
-                        elif img.mode != 'RGB':
-                            img = img.convert('RGB')
-
-                        # 根据格式保存
-                        try:
-                            if format_type.upper() == 'AVIF':
-                                # 使用扩展名格式而不是格式名称
-                                img.save(target_file, format='AVIF', quality=quality)
-                            elif format_type.upper() == 'WEBP':
-                                img.save(target_file, format='WEBP', quality=quality)
-                            elif format_type.upper() == 'JPEG':
-                                img.save(target_file, format='JPEG', quality=quality)
-                            elif format_type.upper() == 'PNG':
-                                img.save(target_file, format='PNG')
-                        except Exception as save_error:
-                            # 尝试使用注册的扩展名格式
-                            if format_type.upper() == 'AVIF':
-                                img.save(target_file, quality=quality)
-                            elif format_type.upper() == 'WEBP':
-                                img.save(target_file, quality=quality)
-                            elif format_type.upper() == 'JPEG':
-                                img.save(target_file, quality=quality)
-                            elif format_type.upper() == 'PNG':
-                                img.save(target_file)
-                            else:
-                                raise save_error
-
-                    # 获取转换后文件大小
-                    try:
-                        converted_size = os.path.getsize(target_file)
-                        total_converted_size += converted_size
-                    except:
-                        converted_size = 0
+                # 获取原始文件大小
+                try:
+                    total_original_size += os.path.getsize(file_path)
+                except OSError:
+                    pass
 
+                error = future.exception()
+                if error is not None:
+                    failed_files += 1
+                    self.module.progress_channel.log(
+                        f"转换失败 {os.path.basename(file_path)}: {str(error)}",
+                        "error"
+                    )
+                else:
+                    total_converted_size += future.result()
                     converted_files += 1
                     # 保存成功转换的原图路径（用于删除原图功能）
                     # 规范化路径，确保路径格式正确
                     normalized_original_path = os.path.abspath(os.path.normpath(file_path))
                     original_files.append(normalized_original_path)
 
-                    self.module.log_message.emit(
+                    self.module.progress_channel.log(
                         f"已转换: {os.path.basename(file_path)} -> {os.path.basename(target_file)}",
                         "success"
                     )
 
-                    # 保存最后转换的文件路径以显示压缩比率
-                    last_converted_source = file_path
-                    last_converted_target = target_file
-                    
-                    # 显示当前转换文件的压缩比率
+                    # 显示当前转换图片的预览与压缩比率
                     if hasattr(self.module, 'workspace_ui') and self.module.workspace_ui:
+                        self.module.workspace_ui.show_preview(file_path)
                         self.module.workspace_ui.show_compression_ratio(file_path, target_file)
-                    
-                    # 更新进度和统计信息
-                    progress = (i + 1) / total_files * 100
-                    self.module.progress_updated.emit(
-                        progress, 
-                        f"正在转换: {converted_files}/{total_files}"
-                    )
-                    
-                except Exception as e:
-                    failed_files += 1
-                    self.module.log_message.emit(
-                        f"转换失败 {os.path.basename(file_path)}: {str(e)}", 
-                        "error"
-                    )
-            
+
+                # 更新进度和统计信息
+                progress = (i + 1) / total_files * 100
+                self.module.progress_channel.report_progress(
+                    progress,
+                    f"正在转换: {converted_files}/{total_files}"
+                )
+
             # 完成
-            self.module.log_message.emit(
-                f"转换完成! 成功转换 {converted_files}/{total_files} 个文件", 
+            self.module.progress_channel.log(
+                f"转换完成! 成功转换 {converted_files}/{total_files} 个文件",
                 "info"
             )
-            
+
             # 发送完成信号
             self.module.execution_finished.emit({
                 'total_files': total_files,
@@ -232,10 +236,21 @@ class AVIFConverterLogic:
                 'format': format_type.upper(),
                 'original_files': original_files  # 添加原图路径列表
             })
-            
+
         except Exception as e:
-            self.module.log_message.emit(f"转换过程中出错: {str(e)}", "error")
+            self.module.progress_channel.log(f"转换过程中出错: {str(e)}", "error")
             # 发送完成信号
             self.module.execution_finished.emit({})
-        finally:
-            self.is_running = False
\ No newline at end of file
+
+
+class _ConvertTask:
+    """可序列化的转换任务：map 的条目为 (源文件, 目标文件, 源文件内容)"""
+
+    def __init__(self, format_type: str, quality: int):
+        self.format_type = format_type
+        self.quality = quality
+        self.__name__ = "convert_file"
+
+    def __call__(self, item) -> int:
+        file_path, target_file, data = item
+        return convert_file(file_path, target_file, self.format_type, self.quality, data)
@@ -4,10 +4,11 @@ AVIF转换模块
 """
 
 import os
-import threading
 from app.core.base_module import BaseFunctionModule
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QProgressBar, QTextEdit, QFileDialog, QLineEdit, QCheckBox, QSpinBox, QGroupBox, QComboBox
 from PyQt6.QtCore import Qt
+from app.core.task_executor import CancellationToken, get_task_executor
+from app.utils.progress_channel import ProgressChannel
 from .ui import AVIFConverterWorkspace
 from .logic import AVIFConverterLogic
 
@@ -29,7 +30,11 @@ class AVIFConverterModule(BaseFunctionModule):
         self.quality = 85
         self.settings_ui = None
         self.workspace_ui = None
-        self.convert_thread = None
+        self.convert_token = None
+        # 转换线程的进度与日志经通道限速合并后转发
+        self.progress_channel = ProgressChannel(parent=self)
+        self.progress_channel.progress_updated.connect(self.progress_updated.emit)
+        self.progress_channel.log_message.connect(self.log_message.emit)
         self.converter_logic = AVIFConverterLogic(self)
         
         # 连接执行完成信号
@@ -358,10 +363,9 @@ class AVIFConverterModule(BaseFunctionModule):
             'include_subdirs': self.subdir_checkbox.isChecked()
         }
 
-        self.converter_logic.is_running = True
-        self.convert_thread = threading.Thread(target=self.converter_logic.convert_images, args=(params,))
-        self.convert_thread.daemon = True
-        self.convert_thread.start()
+        self.convert_token = CancellationToken()
+        get_task_executor().submit_io(self.converter_logic.convert_images, params, self.convert_token,
+                                      name="convert")
 
     def execute(self, params: dict):
         """
@@ -377,7 +381,9 @@ class AVIFConverterModule(BaseFunctionModule):
         """
         停止执行
         """
-        self.converter_logic.is_running = False
+        if self.convert_token:
+            self.convert_token.cancel()
+        self.progress_channel.flush()
         self.log_message.emit("用户停止了转换", "info")
         self.is_converting = False
         self.convert_stop_btn.setText("🔄 开始转换")
@@ -409,6 +415,8 @@ class AVIFConverterModule(BaseFunctionModule):
         """
         处理执行完成事件
         """
+        # 先转发转换线程尚未刷新的日志与进度
+        self.progress_channel.flush()
         # 保存结果数据（用于删除原图功能）
         self._last_result_data = result_data
 
@@ -5,10 +5,10 @@ AVIF转换模块UI实现
 
 import os
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QProgressBar, QTextEdit, QGroupBox, QApplication)
+                             QProgressBar, QGroupBox, QApplication)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap, QImage
-from app.utils.image_utils import ImageUtils
+from app.ui.components.log_view import LogView
 
 
 class AVIFConverterWorkspace(QWidget):
@@ -127,9 +127,9 @@ class AVIFConverterWorkspace(QWidget):
         log_layout = QVBoxLayout(log_frame)
         log_layout.setContentsMargins(10, 20, 10, 10)
         
-        self.log_text = QTextEdit()
+        self.log_text = LogView()
         self.log_text.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: #1B1B1B;
                 color: white;
                 border: none;
@@ -138,7 +138,6 @@ class AVIFConverterWorkspace(QWidget):
                 max-height: 120px;
             }
         """)
-        self.log_text.setReadOnly(True)
         log_layout.addWidget(self.log_text)
         
         layout.addWidget(log_frame)
@@ -157,8 +156,7 @@ class AVIFConverterWorkspace(QWidget):
         
     def add_log_message(self, message: str, level: str):
         """添加日志消息"""
-        formatted_message = f"[{level.upper()}] {message}"
-        self.log_text.append(formatted_message)
+        self.log_text.add_message(message, level)
         
     def on_execution_finished(self, result_data: dict):
         """处理执行完成事件"""
@@ -12,6 +12,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushBut
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QDragEnterEvent, QDragMoveEvent, QDropEvent
 from app.ui.theme import Spacing
+from app.utils.dir_walker import DirectoryWalker
 
 
 class DragDropArea(QFrame):
@@ -230,22 +231,20 @@ class DragDropArea(QFrame):
                 path_size = 0
                 format_counts = {}
                 
-                # 遍历目录统计图片文件
-                for root, dirs, files in os.walk(path):
-                    for file in files:
-                        ext = os.path.splitext(file)[1].lower()
-                        if ext in image_extensions:
-                            image_count += 1
-                            file_path = os.path.join(root, file)
-                            try:
-                                file_size = os.path.getsize(file_path)
-                                path_size += file_size
-                                total_size += file_size
-                                
-                                # 统计格式分布
-                                format_counts[ext] = format_counts.get(ext, 0) + 1
-                            except:
-                                pass
+                # 遍历目录统计图片文件（目录列出与 stat 在 IO 池中并行进行）
+                for entry in DirectoryWalker(with_stat=True).files(path):
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if ext in image_extensions:
+                        image_count += 1
+                        try:
+                            file_size = entry.stat().st_size
+                            path_size += file_size
+                            total_size += file_size
+                            
+                            # 统计格式分布
+                            format_counts[ext] = format_counts.get(ext, 0) + 1
+                        except:
+                            pass
                 
                 total_files += image_count
                 
@@ -4,141 +4,390 @@
 """
 
 import threading
+import time
+from concurrent.futures import wait
 from app.core.base_module import BaseFunctionModule
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
                              QProgressBar, QFileDialog, QLineEdit, QCheckBox, QSpinBox, 
-                             QGroupBox, QListWidget, QStackedWidget)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject
+                             QGroupBox, QListWidget, QListWidgetItem, QStackedWidget)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject
+from app.core.task_executor import CPU_POOL, CancellationToken, get_task_executor
 from app.utils.image_utils import ImageUtils
+from app.utils.scan_metrics import ScanMetrics
+from app.utils.candidate_pairs import RECLUSTER_MIN_THRESHOLD, distance_for_threshold
+from app.utils.external_dedup import ExternalDuplicateFinder, PathSpool, collect_groups
+from app.utils.discovery_filter import DEFAULT_EXCLUDES, DiscoveryFilter, parse_patterns
+from app.utils.hash_store import HashStore, SimilarImageIndex
+from app.utils.io_scheduler import IOScheduler
+from app.utils.isolated_decoder import IsolatedDecoder
+from app.utils.profiler import profiled
+from app.utils.read_ahead import ReadAheadReader
+from app.utils.progress_channel import ProgressChannel
+from app.utils.resource_path import get_user_data_dir
 import os
 
 
+def _trace_dir(params: dict):
+    """扫描结果附带文件（追踪、剖析）的输出目录"""
+    trace_path = params.get('trace_path') or os.environ.get('IMAGETRIM_SCAN_TRACE')
+    if trace_path and not os.path.isdir(trace_path):
+        return os.path.dirname(os.path.abspath(trace_path))
+    return trace_path
+
+
 class DeduplicationWorker(QObject):
     """
     图片去重扫描工作线程
     """
     
-    # 定义信号
-    progress_updated = pyqtSignal(float, str)
-    log_message = pyqtSignal(str, str)
+    # 定义信号（进度与日志经 ProgressChannel 限速转发）
     finished = pyqtSignal(dict)
     
-    def __init__(self):
+    def __init__(self, channel: ProgressChannel):
         super().__init__()
-        self.is_running = False
+        self.channel = channel
+        self.token = CancellationToken()
         
     def stop(self):
         """停止扫描"""
-        self.is_running = False
+        self.token.cancel()
         
+    @profiled("scan", output_dir=lambda self, params: _trace_dir(params))
     def scan_duplicates(self, params):
         """执行扫描操作"""
-        self.is_running = True
+        metrics = ScanMetrics()
+        # 发现的路径：文件数达到外存去重的门槛后写入磁盘，不在内存中保留完整列表
+        discovered = PathSpool.from_environment()
         
         try:
             # 收集所有图片文件
-            self.progress_updated.emit(0, "收集图片文件...")
-            self.log_message.emit(f"开始扫描 {len(params['paths'])} 个路径", "info")
+            self.channel.report_progress(0, "收集图片文件...")
+            self.channel.log(f"开始扫描 {len(params['paths'])} 个路径", "info")
 
-            all_image_files = []
-            total_files_found = 0
-            total_paths = len(params['paths'])
+            scan_roots = ImageUtils.normalize_roots(params['paths'])
+            if len(scan_roots) < len(params['paths']):
+                self.channel.log(
+                    f"已合并重叠的扫描路径: {len(params['paths'])} 个路径 → {len(scan_roots)} 个", "info"
+                )
+            total_paths = len(scan_roots)
 
             # 收集文件，同时更新进度
-            for path_idx, path in enumerate(params['paths']):
-                if not self.is_running:
-                    break
-
-                if os.path.exists(path):
-                    # 创建进度回调函数，实时更新文件发现进度
-                    def file_found_callback(count):
-                        """每发现一个文件时调用"""
-                        # 计算当前路径的基础进度
-                        base_progress = path_idx / total_paths * 30
-                        # 添加当前路径内的进度（估算，每10个文件更新一次）
-                        if count % 10 == 0 or count < 10:
-                            current_progress = base_progress
-                            self.progress_updated.emit(
-                                current_progress,
-                                f"收集图片文件... 路径 {path_idx+1}/{total_paths}, 已找到 {len(all_image_files) + count} 个文件"
+            with metrics.phase("discovery"):
+                for path_idx, path in enumerate(scan_roots):
+                    if self.token.cancelled:
+                        break
+
+                    if os.path.exists(path):
+                        found_before = len(discovered)
+
+                        # 创建进度回调函数，实时更新文件发现进度
+                        def file_found_callback(count):
+                            """每发现一个文件时调用"""
+                            # 计算当前路径的基础进度
+                            base_progress = path_idx / total_paths * 30
+                            # 通道按固定频率合并进度，逐个文件报告即可
+                            self.channel.report_progress(
+                                base_progress,
+                                f"收集图片文件... 路径 {path_idx+1}/{total_paths}, 已找到 {found_before + count} 个文件"
                             )
 
-                    image_files = ImageUtils.get_image_files(
-                        path,
-                        params['include_subdirs'],
-                        progress_callback=file_found_callback
-                    )
-                    all_image_files.extend(image_files)
-                    total_files_found += len(image_files)
-
-                    # 更新路径完成进度
-                    progress = (path_idx + 1) / total_paths * 30  # 收集文件占30%进度
-                    self.progress_updated.emit(
-                        progress,
-                        f"收集图片文件... {path_idx+1}/{total_paths} 路径, 已找到 {total_files_found} 个文件"
-                    )
-                    self.log_message.emit(f"从 {path} 找到 {len(image_files)} 个图片文件", "info")
-                else:
-                    self.log_message.emit(f"路径不存在: {path}", "error")
+                        discovered.extend(ImageUtils.iter_image_files(
+                            path,
+                            params['include_subdirs'],
+                            progress_callback=file_found_callback,
+                            should_stop=lambda: self.token.cancelled,
+                            metrics=metrics,
+                            discovery_filter=params.get('discovery_filter')
+                        ))
+
+                        # 更新路径完成进度
+                        progress = (path_idx + 1) / total_paths * 30  # 收集文件占30%进度
+                        self.channel.report_progress(
+                            progress,
+                            f"收集图片文件... {path_idx+1}/{total_paths} 路径, 已找到 {len(discovered)} 个文件"
+                        )
+                        self.channel.log(f"从 {path} 找到 {len(discovered) - found_before} 个图片文件", "info")
+                    else:
+                        self.channel.log(f"路径不存在: {path}", "error")
+                # 硬链接、符号链接指向同一物理文件，只保留一个路径
+                alias_count = discovered.drop_aliases(should_stop=lambda: self.token.cancelled)
+                if alias_count:
+                    metrics.add("linked_files_skipped", alias_count)
+                    self.channel.log(f"跳过 {alias_count} 个指向同一文件的硬链接/符号链接", "info")
+                counters = metrics.to_dict()["counters"]
+                filtered_count = counters.get("files_filtered", 0) + counters.get("files_filtered_dimensions", 0)
+                if filtered_count:
+                    self.channel.log(f"过滤规则排除了 {filtered_count} 个文件", "info")
+            metrics.set_phase_items("discovery", len(discovered))
+            metrics.add("files_discovered", len(discovered))
             
-            if not self.is_running:
+            if self.token.cancelled:
                 return
                 
-            total_files = len(all_image_files)
+            total_files = len(discovered)
             if total_files == 0:
-                self.log_message.emit("未找到任何图片文件", "warning")
-                self.progress_updated.emit(100, "扫描完成")
-                self.finished.emit({})
+                self.channel.log("未找到任何图片文件", "warning")
+                self.channel.report_progress(100, "扫描完成")
+                self.finished.emit({'metrics': self._finish_metrics(metrics, params)})
                 return
             
-            self.log_message.emit(f"总共找到 {total_files} 个图片文件", "info")
+            self.channel.log(f"总共找到 {total_files} 个图片文件", "info")
 
             # 计算哈希值并查找重复项 - 传递进度回调和停止检查
             def progress_callback(progress, message):
                 """进度回调函数"""
-                self.progress_updated.emit(progress, message)
+                self.channel.report_progress(progress, message)
 
             def should_stop():
                 """检查是否需要停止"""
-                return not self.is_running
+                return self.token.cancelled
 
-            duplicates = ImageUtils.find_duplicates(
-                all_image_files,
-                params['threshold'] / 100.0,
-                progress_callback=progress_callback,
-                should_stop=should_stop
+            # 参考图库模式：参考图片直接从哈希库载入，不重新发现或计算哈希
+            reference_paths = params.get('reference_paths') or []
+            reference_index = None
+            if reference_paths:
+                if params.get('hash_store') is None:
+                    self.channel.log("参考图库模式需要哈希库，已改为普通扫描", "warning")
+                else:
+                    with metrics.phase("reference_load"):
+                        reference_index = SimilarImageIndex.from_store(
+                            params['hash_store'], roots=ImageUtils.normalize_roots(reference_paths)
+                        )
+                    metrics.set_phase_items("reference_load", len(reference_index))
+                    if len(reference_index):
+                        self.channel.log(f"已从索引载入参考图库 {len(reference_index)} 张图片", "info")
+                    else:
+                        self.channel.log("参考图库尚未建立索引，请先将参考目录作为扫描路径扫描一次", "warning")
+
+            threshold = params['threshold'] / 100.0
+            # 文件数很多时使用外存去重，峰值内存由配置决定（参考图库模式不支持）
+            external = None
+            if reference_index is None:
+                try:
+                    external = ExternalDuplicateFinder.from_environment(threshold, total_files, metrics)
+                except ValueError as e:
+                    # 外存去重不支持过低的阈值：改为在内存中比较（与文件数较少时相同），不放弃已完成的发现
+                    self.channel.log(
+                        f"文件数量较多（{total_files} 个），但{e}，改为在内存中比较，内存占用可能较高", "warning"
+                    )
+            # 在隔离的工作进程中解码，个别异常文件只会超时或被隔离，不会拖垮扫描
+            decoder = IsolatedDecoder.from_environment(
+                workers=get_task_executor().workers(CPU_POOL), metrics=metrics, log_callback=self.channel.log
             )
-            
-            if not self.is_running:
+            hash_options = {
+                'metrics': metrics,
+                'store': params.get('hash_store'),
+                'scheduler': IOScheduler.from_environment(metrics),
+                'read_ahead': ReadAheadReader.from_environment(metrics),
+                'decoder': decoder
+            }
+            report_path = None
+            try:
+                if external is not None:
+                    self.channel.log(f"文件数量较多，使用外存去重（工作目录 {external.directory}）", "info")
+                    # 重复组逐个写入报告文件，内存中只保留用于显示的一部分
+                    report_path = os.path.join(
+                        get_user_data_dir(), "reports", f"duplicates-{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+                    )
+                    with external:
+                        duplicates, total_groups, total_duplicates = collect_groups(
+                            ImageUtils.find_duplicates_external(
+                                discovered, external, progress_callback, should_stop, **hash_options
+                            ),
+                            external.result_files,
+                            report_path
+                        )
+                else:
+                    hashes = ImageUtils.compute_hashes(
+                        list(discovered),
+                        progress_callback=progress_callback,
+                        should_stop=should_stop,
+                        **hash_options
+                    )
+            finally:
+                if decoder is not None:
+                    decoder.shutdown()
+            counters = metrics.to_dict()["counters"]
+            if counters.get("files_quarantined"):
+                self.channel.log(
+                    f"{counters['files_quarantined']} 个文件解码超时或导致解码进程崩溃，已记入隔离列表", "warning"
+                )
+            if counters.get("quarantine_skipped"):
+                self.channel.log(f"跳过 {counters['quarantine_skipped']} 个已隔离的文件", "info")
+
+            if self.token.cancelled:
                 return
+
+            if external is not None:
+                # 候选对没有保留在内存中，结果不支持调整阈值后重新分组
+                candidates = None
+            elif reference_index is not None:
+                # 只比较 待查-待查 与 待查-参考 图片对；结果不支持调整阈值后重新分组
+                candidates = None
+                duplicates = ImageUtils.match_reference(
+                    hashes,
+                    reference_index,
+                    threshold,
+                    progress_callback=progress_callback,
+                    should_stop=should_stop,
+                    metrics=metrics
+                )
+                if self.token.cancelled:
+                    return
+            else:
+                # 保留到最低重聚类阈值的全部候选对，之后调整阈值无需重新扫描
+                candidates = ImageUtils.build_candidate_pairs(
+                    hashes,
+                    min(threshold, RECLUSTER_MIN_THRESHOLD),
+                    progress_callback=progress_callback,
+                    should_stop=should_stop,
+                    metrics=metrics
+                )
+
+                if self.token.cancelled or candidates is None:
+                    return
+
+                duplicates = candidates.group(threshold)
+
+            if report_path is None:
+                total_groups = len(duplicates)
+                total_duplicates = sum(len(files) for files in duplicates.values())
+
+            metrics_data = self._finish_metrics(metrics, params)
             
             # 报告结果
-            self.progress_updated.emit(100, "扫描完成")
+            self.channel.report_progress(100, "扫描完成")
             if duplicates:
-                total_groups = len(duplicates)
-                total_duplicates = sum(len(files) for files in duplicates.values())
-                self.log_message.emit(f"找到 {total_groups} 组重复图片，共 {total_duplicates} 个重复文件", "info")
+                self.channel.log(f"找到 {total_groups} 组重复图片，共 {total_duplicates} 个重复文件", "info")
+                if report_path is not None:
+                    self.channel.log(f"完整结果已写入 {report_path}", "info")
+                    if len(duplicates) < total_groups:
+                        self.channel.log(f"结果较多，只显示前 {len(duplicates)} 组", "warning")
                 
                 # 发送结果到工作区
                 result_data = {
                     'duplicates': duplicates,
                     'total_files': total_files,
                     'total_groups': total_groups,
-                    'total_duplicates': total_duplicates
+                    'total_duplicates': total_duplicates,
+                    'metrics': metrics_data,
+                    'candidates': candidates
                 }
                 self.finished.emit(result_data)
             else:
-                self.log_message.emit("未找到重复图片", "info")
+                self.channel.log("未找到重复图片", "info")
                 self.finished.emit({
                     'duplicates': {},
                     'total_files': total_files,
                     'total_groups': 0,
-                    'total_duplicates': 0
+                    'total_duplicates': 0,
+                    'metrics': metrics_data,
+                    'candidates': candidates
                 })
                 
         except Exception as e:
-            self.log_message.emit(f"扫描过程中出错: {str(e)}", "error")
-            self.progress_updated.emit(100, "扫描出错")
+            self.channel.log(f"扫描过程中出错: {str(e)}", "error")
+            self.channel.report_progress(100, "扫描出错")
+            self.finished.emit({})
+        finally:
+            discovered.close()
+
+    def _finish_metrics(self, metrics: ScanMetrics, params: dict) -> dict:
+        """
+        汇总扫描指标：记录失败统计与阶段耗时，并按需写出JSON追踪文件
+
+        追踪文件路径取自 params['trace_path']，或环境变量 IMAGETRIM_SCAN_TRACE
+        （可以是文件路径，也可以是目录）。
+        """
+        if metrics.failures:
+            details = ", ".join(f"{name} × {count}" for name, count in metrics.failures.items())
+            self.channel.log(f"{sum(metrics.failures.values())} 个文件无法处理: {details}", "warning")
+
+        summary = metrics.summary()
+        if summary:
+            self.channel.log(f"扫描耗时: {summary}", "info")
+
+        trace_path = params.get('trace_path') or os.environ.get('IMAGETRIM_SCAN_TRACE')
+        if trace_path:
+            try:
+                written = metrics.write_trace(trace_path)
+                self.channel.log(f"扫描追踪已写入: {written}", "info")
+            except OSError as e:
+                self.channel.log(f"写入扫描追踪失败: {e}", "warning")
+
+        return metrics.to_dict()
+
+
+class SimilarSearchWorker(QObject):
+    """
+    以图搜图工作线程：在已索引的图库中查找与给定图片相似的图片
+    """
+
+    finished = pyqtSignal(dict)
+
+    def __init__(self, channel: ProgressChannel):
+        super().__init__()
+        self.channel = channel
+        self.token = CancellationToken()
+
+    def stop(self):
+        """停止检索"""
+        self.token.cancel()
+
+    def search(self, params):
+        """
+        执行检索
+
+        Args:
+            params: paths（查询图片或目录）、threshold（相似度百分比）、
+                    hash_store（哈希库）、index（已载入的索引，可为None）
+        """
+        try:
+            index = params.get('index')
+            if index is None:
+                self.channel.report_progress(0, "载入图片索引...")
+                index = SimilarImageIndex.from_store(params['hash_store'])
+            if not len(index):
+                self.channel.log("图片索引为空，请先扫描图库", "warning")
+                self.channel.report_progress(100, "检索完成")
+                self.finished.emit({'duplicates': {}, 'index': index})
+                return
+
+            query_files = []
+            for path in params['paths']:
+                if os.path.isdir(path):
+                    query_files.extend(ImageUtils.get_image_files(
+                        path, include_subdirs=True, should_stop=lambda: self.token.cancelled
+                    ))
+                elif os.path.isfile(path):
+                    query_files.append(path)
+            self.channel.log(f"在 {len(index)} 张已索引图片中检索 {len(query_files)} 张图片", "info")
+
+            max_distance = distance_for_threshold(params['threshold'] / 100.0, index.bits)
+            matches = index.search_files(
+                query_files,
+                max_distance,
+                progress_callback=self.channel.report_progress,
+                should_stop=lambda: self.token.cancelled
+            )
+            if self.token.cancelled:
+                return
+
+            total_matches = sum(len(found) for found in matches.values())
+            self.channel.log(f"{len(matches)} 张图片在图库中有相似图片，共 {total_matches} 个匹配", "info")
+            self.channel.report_progress(100, "检索完成")
+            # 每个查询图片作为一组，匹配结果按距离排序
+            self.finished.emit({
+                'duplicates': {query: [path for path, _ in found] for query, found in matches.items()},
+                'matches': matches,
+                'total_files': len(query_files),
+                'total_groups': len(matches),
+                'total_duplicates': total_matches,
+                'index': index,
+            })
+        except Exception as e:
+            self.channel.log(f"检索过程中出错: {str(e)}", "error")
+            self.channel.report_progress(100, "检索出错")
             self.finished.emit({})
 
 
@@ -155,11 +404,24 @@ class DeduplicationModule(BaseFunctionModule):
             icon="🔍"
         )
         self.scan_paths = []
+        self.reference_paths = []
         self.similarity_threshold = 95
         self.settings_ui = None
         self.workspace_ui = None
-        self.scan_thread = None
+        self.scan_future = None
         self.scan_worker = None
+        # 上次扫描的候选对与结果，用于调整阈值时在内存中重新分组
+        self.candidate_pairs = None
+        self.last_result = None
+        # 持久化哈希库与以图搜图索引（首次使用时创建）
+        self.hash_store = None
+        self.similar_index = None
+        self.search_future = None
+        self.search_worker = None
+        # 工作线程的进度与日志经通道限速合并后转发
+        self.progress_channel = ProgressChannel(parent=self)
+        self.progress_channel.progress_updated.connect(self.progress_updated.emit)
+        self.progress_channel.log_message.connect(self.log_message.emit)
 
     def create_settings_ui(self):
         """
@@ -228,6 +490,27 @@ class DeduplicationModule(BaseFunctionModule):
 
         path_layout.addWidget(self.subdir_checkbox)
         
+        # 参考图库设置
+        reference_group = QGroupBox("📚 参考图库（可选）")
+        reference_layout = QVBoxLayout(reference_group)
+        reference_hint = QLabel("设置后只检查扫描路径中的图片是否已存在于参考图库，参考图库从索引载入，不重新扫描")
+        reference_hint.setWordWrap(True)
+        reference_hint.setStyleSheet("color: #A0A0A0; font-size: 11px;")
+        reference_layout.addWidget(reference_hint)
+
+        self.reference_list = QListWidget()
+        self.reference_list.setMaximumHeight(70)
+        reference_layout.addWidget(self.reference_list)
+
+        reference_btn_layout = QHBoxLayout()
+        add_reference_btn = QPushButton("添加参考目录...")
+        add_reference_btn.clicked.connect(self.add_reference_path)
+        remove_reference_btn = QPushButton("移除选中")
+        remove_reference_btn.clicked.connect(self.remove_reference_path)
+        reference_btn_layout.addWidget(add_reference_btn)
+        reference_btn_layout.addWidget(remove_reference_btn)
+        reference_layout.addLayout(reference_btn_layout)
+
         # 相似度设置
         similarity_group = QGroupBox("⚙️ 相似度设置")
         similarity_layout = QVBoxLayout(similarity_group)
@@ -301,6 +584,63 @@ class DeduplicationModule(BaseFunctionModule):
             }
         """)
         similarity_layout.addWidget(self.similarity_spinbox)
+
+        # 过滤规则：在遍历时排除不需要比较的目录与文件
+        filter_group = QGroupBox("🧹 过滤规则")
+        filter_layout = QVBoxLayout(filter_group)
+        filter_layout.addWidget(QLabel("排除（glob 或 re:正则，逗号分隔）:"))
+        self.exclude_edit = QLineEdit(", ".join(DEFAULT_EXCLUDES))
+        self.exclude_edit.setToolTip("不含 / 的规则匹配文件或目录名，含 / 的规则匹配完整路径；匹配的目录整体跳过")
+        filter_layout.addWidget(self.exclude_edit)
+
+        size_layout = QHBoxLayout()
+        size_layout.addWidget(QLabel("文件大小:"))
+        self.min_size_spinbox = QSpinBox()
+        self.min_size_spinbox.setRange(0, 1024 * 1024)
+        self.min_size_spinbox.setSuffix(" KB")
+        self.min_size_spinbox.setToolTip("最小文件大小，0 表示不限")
+        size_layout.addWidget(self.min_size_spinbox)
+        size_layout.addWidget(QLabel("-"))
+        self.max_size_spinbox = QSpinBox()
+        self.max_size_spinbox.setRange(0, 1024 * 1024)
+        self.max_size_spinbox.setSuffix(" MB")
+        self.max_size_spinbox.setSpecialValueText("不限")
+        size_layout.addWidget(self.max_size_spinbox)
+        filter_layout.addLayout(size_layout)
+
+        dimension_layout = QHBoxLayout()
+        dimension_layout.addWidget(QLabel("最小宽高:"))
+        self.min_dimension_spinbox = QSpinBox()
+        self.min_dimension_spinbox.setRange(0, 10000)
+        self.min_dimension_spinbox.setSuffix(" px")
+        self.min_dimension_spinbox.setSpecialValueText("不限")
+        dimension_layout.addWidget(self.min_dimension_spinbox)
+        filter_layout.addLayout(dimension_layout)
+
+        for spinbox in (self.min_size_spinbox, self.max_size_spinbox, self.min_dimension_spinbox):
+            spinbox.setStyleSheet(self.similarity_spinbox.styleSheet())
+
+        # 隔离列表：解码超时或导致解码进程崩溃的文件，扫描时跳过
+        quarantine_group = QGroupBox("🚫 隔离的文件")
+        quarantine_layout = QVBoxLayout(quarantine_group)
+        self.quarantine_label = QLabel()
+        self.quarantine_label.setWordWrap(True)
+        quarantine_layout.addWidget(self.quarantine_label)
+        self.quarantine_list = QListWidget()
+        self.quarantine_list.setMaximumHeight(100)
+        quarantine_layout.addWidget(self.quarantine_list)
+        self.clear_quarantine_btn = QPushButton("清空隔离列表")
+        self.clear_quarantine_btn.setToolTip("下次扫描时重新尝试解码这些文件")
+        self.clear_quarantine_btn.clicked.connect(self.clear_quarantine)
+        quarantine_layout.addWidget(self.clear_quarantine_btn)
+        self.refresh_quarantine()
+
+        # 阈值变化后稍作延迟再重新分组，避免连续调整时反复刷新结果
+        self.recluster_timer = QTimer(widget)
+        self.recluster_timer.setSingleShot(True)
+        self.recluster_timer.setInterval(150)
+        self.recluster_timer.timeout.connect(self.recluster)
+        self.similarity_spinbox.valueChanged.connect(self.recluster_timer.start)
         
         # 操作按钮 - 开始/停止切换按钮
         button_layout = QHBoxLayout()
@@ -312,7 +652,10 @@ class DeduplicationModule(BaseFunctionModule):
         
         # 添加到主布局
         layout.addWidget(path_group)
+        layout.addWidget(reference_group)
         layout.addWidget(similarity_group)
+        layout.addWidget(filter_group)
+        layout.addWidget(quarantine_group)
         layout.addLayout(button_layout)
         layout.addStretch()
         
@@ -338,6 +681,21 @@ class DeduplicationModule(BaseFunctionModule):
             layout = QVBoxLayout(container)
             layout.setContentsMargins(0, 0, 0, 0)
             
+            # 以图搜图工具栏
+            search_bar = QHBoxLayout()
+            search_bar.setContentsMargins(8, 4, 8, 4)
+            search_label = QLabel("🔎 以图搜图：在已扫描的图库中查找相似图片")
+            search_label.setStyleSheet("color: #cccccc;")
+            search_bar.addWidget(search_label)
+            search_bar.addStretch()
+            self.search_images_btn = QPushButton("选择图片...")
+            self.search_images_btn.clicked.connect(self.search_images)
+            search_bar.addWidget(self.search_images_btn)
+            self.search_folder_btn = QPushButton("选择文件夹...")
+            self.search_folder_btn.clicked.connect(self.search_folder)
+            search_bar.addWidget(self.search_folder_btn)
+            layout.addLayout(search_bar)
+
             # 创建堆叠部件
             self.workspace_stacked_widget = QStackedWidget()
             
@@ -373,16 +731,50 @@ class DeduplicationModule(BaseFunctionModule):
         """添加扫描路径"""
         # 直接选择目录，不使用文件选择对话框
         path = QFileDialog.getExistingDirectory(None, "选择扫描目录")
-        if path and path not in self.scan_paths:
-            self.scan_paths.append(path)
-            self.path_list.addItem(path)
+        if path and self._merge_scan_paths([path]):
+            # 同步到拖拽区域
+            if hasattr(self, "drag_drop_area"):
+                self.drag_drop_area.set_paths(self.scan_paths)
+
+    def _merge_scan_paths(self, paths) -> int:
+        """
+        将新路径合并到扫描路径：解析为真实路径，已被包含的路径不再添加，
+        新路径包含已有路径时替换它们
 
+        Args:
+            paths: 新路径列表
+
+        Returns:
+            int: 实际新增的路径数量
+        """
+        merged = ImageUtils.normalize_roots(self.scan_paths + list(paths))
+        added = [path for path in merged if path not in self.scan_paths]
+        skipped = len(paths) - len(added)
+        if skipped:
+            self.log_message.emit(f"{skipped} 个路径已包含在现有扫描路径中，未重复添加", "info")
+        if merged != self.scan_paths:
+            self.scan_paths[:] = merged
+            self.path_list.clear()
+            self.path_list.addItems(merged)
+        if self.scan_paths:
             # 启用扫描按钮
             self.scan_stop_btn.setEnabled(True)
+        return len(added)
 
-            # 同步到拖拽区域
-            if hasattr(self, "drag_drop_area"):
-                self.drag_drop_area.set_paths(self.scan_paths)
+    def add_reference_path(self):
+        """添加参考图库目录"""
+        path = QFileDialog.getExistingDirectory(None, "选择参考图库目录")
+        if path and path not in self.reference_paths:
+            self.reference_paths.append(path)
+            self.reference_list.addItem(path)
+
+    def remove_reference_path(self):
+        """移除选中的参考图库目录"""
+        for item in self.reference_list.selectedItems():
+            row = self.reference_list.row(item)
+            self.reference_list.takeItem(row)
+            if row < len(self.reference_paths):
+                del self.reference_paths[row]
 
     def remove_path(self):
         """移除选中的路径"""
@@ -431,6 +823,17 @@ class DeduplicationModule(BaseFunctionModule):
         if not self.scan_paths:
             self.log_message.emit("请添加至少一个扫描路径", "warning")
             return
+
+        try:
+            discovery_filter = DiscoveryFilter(
+                parse_patterns(self.exclude_edit.text()),
+                min_size=self.min_size_spinbox.value() * 1024,
+                max_size=self.max_size_spinbox.value() * 1024 * 1024,
+                min_dimension=self.min_dimension_spinbox.value()
+            )
+        except ValueError as e:
+            self.log_message.emit(str(e), "error")
+            return
             
         self.is_scanning = True
         self.scan_stop_btn.setText("⏹️ 停止扫描")
@@ -453,6 +856,9 @@ class DeduplicationModule(BaseFunctionModule):
             }
         """)
         
+        self.candidate_pairs = None
+        self.last_result = None
+
         # 切换到结果面板
         if hasattr(self, "results_panel") and self.results_panel:
             self.results_panel.reset_view()
@@ -460,22 +866,20 @@ class DeduplicationModule(BaseFunctionModule):
             self.workspace_stacked_widget.setCurrentIndex(1)
         
         # 创建工作线程
-        self.scan_thread = QThread()
-        self.scan_worker = DeduplicationWorker()
-        self.scan_worker.moveToThread(self.scan_thread)
+        self.scan_worker = DeduplicationWorker(self.progress_channel)
         
-        # 连接信号
-        self.scan_worker.progress_updated.connect(self.progress_updated.emit)
-        self.scan_worker.log_message.connect(self.log_message.emit)
+        # 连接信号（完成信号从任务线程发出，排队到界面线程处理）
         self.scan_worker.finished.connect(self.on_scan_finished)
-        self.scan_thread.started.connect(lambda: self.scan_worker.scan_duplicates({
+        
+        # 在任务执行服务的 IO 池中扫描
+        self.scan_future = get_task_executor().submit_io(self.scan_worker.scan_duplicates, {
             'paths': self.scan_paths,
             'threshold': self.similarity_threshold,
-            'include_subdirs': self.subdir_checkbox.isChecked()
-        }))
-        
-        # 启动线程
-        self.scan_thread.start()
+            'include_subdirs': self.subdir_checkbox.isChecked(),
+            'hash_store': self.get_hash_store(),
+            'reference_paths': list(self.reference_paths),
+            'discovery_filter': discovery_filter
+        }, name="scan")
 
     def execute(self, params: dict):
         """
@@ -491,15 +895,17 @@ class DeduplicationModule(BaseFunctionModule):
         """
         停止执行
         """
+        self.progress_channel.flush()
         self.log_message.emit("用户停止了扫描", "info")
         
         # 停止工作线程
         if self.scan_worker:
             self.scan_worker.stop()
         
-        if self.scan_thread and self.scan_thread.isRunning():
-            self.scan_thread.quit()
-            self.scan_thread.wait(3000)  # 等待3秒
+        if self.scan_future and not self.scan_future.done():
+            wait([self.scan_future], timeout=3)  # 等待3秒
+        # 先转发工作线程停止前留下的进度，随后显示“已停止”
+        self.progress_channel.flush()
         
         self.is_scanning = False
         self.scan_stop_btn.setText("🔍 开始扫描")
@@ -534,6 +940,8 @@ class DeduplicationModule(BaseFunctionModule):
         """
         扫描完成处理
         """
+        # 先转发工作线程尚未刷新的日志与进度
+        self.progress_channel.flush()
         self.is_scanning = False
         self.scan_stop_btn.setText("🔍 开始扫描")
         self.scan_stop_btn.setStyleSheet("""
@@ -559,13 +967,16 @@ class DeduplicationModule(BaseFunctionModule):
             }
         """)
         
-        # 清理线程资源
-        if self.scan_thread:
-            self.scan_thread.quit()
-            self.scan_thread.wait()
-            self.scan_thread = None
-            self.scan_worker = None
+        # 清理任务资源
+        self.scan_future = None
+        self.scan_worker = None
         
+        self.candidate_pairs = result_data.get('candidates')
+        self.last_result = result_data
+        # 扫描可能更新了哈希库，下次检索时重新载入索引
+        self.similar_index = None
+        self.refresh_quarantine()
+
         # 发送结果到工作区
         self.execution_finished.emit(result_data)
 
@@ -586,6 +997,145 @@ class DeduplicationModule(BaseFunctionModule):
             if hasattr(self, "workspace_stacked_widget"):
                 self.workspace_stacked_widget.setCurrentIndex(0)
             
+    def get_hash_store(self):
+        """
+        获取持久化哈希库，无法打开时返回None（扫描照常进行，只是不复用哈希）
+        """
+        if self.hash_store is None:
+            try:
+                self.hash_store = HashStore()
+            except Exception as e:  # pylint: disable=broad-except
+                self.log_message.emit(f"无法打开哈希库，将不保存哈希: {e}", "warning")
+        return self.hash_store
+
+    def refresh_quarantine(self):
+        """刷新设置面板中的隔离列表"""
+        store = self.get_hash_store()
+        entries = store.quarantined() if store is not None else []
+        self.quarantine_list.clear()
+        for file_path, reason, _ in entries:
+            item = QListWidgetItem(os.path.basename(file_path))
+            item.setToolTip(f"{file_path}\n{reason}")
+            self.quarantine_list.addItem(item)
+        if entries:
+            self.quarantine_label.setText(f"{len(entries)} 个文件解码超时或导致解码进程崩溃，扫描时跳过（文件修改后会重新尝试）")
+        else:
+            self.quarantine_label.setText("没有隔离的文件")
+        self.quarantine_list.setVisible(bool(entries))
+        self.clear_quarantine_btn.setEnabled(bool(entries))
+
+    def clear_quarantine(self):
+        """清空隔离列表，下次扫描时重新尝试解码"""
+        store = self.get_hash_store()
+        if store is None:
+            return
+        count = len(store.quarantined())
+        store.clear_quarantine()
+        self.log_message.emit(f"已清空隔离列表（{count} 个文件），下次扫描时重新尝试解码", "info")
+        self.refresh_quarantine()
+
+    def search_images(self):
+        """选择图片进行以图搜图"""
+        files, _ = QFileDialog.getOpenFileNames(
+            None, "选择要检索的图片", "",
+            "图片文件 (*.jpg *.jpeg *.png *.bmp *.gif *.tiff *.webp *.avif *.heic *.heif)"
+        )
+        if files:
+            self.start_search(files)
+
+    def search_folder(self):
+        """选择文件夹进行以图搜图"""
+        path = QFileDialog.getExistingDirectory(None, "选择要检索的文件夹")
+        if path:
+            self.start_search([path])
+
+    def start_search(self, paths):
+        """
+        在已索引的图库中检索与给定图片相似的图片
+
+        Args:
+            paths: 图片或目录路径列表
+        """
+        if self.is_scanning or (self.search_future and not self.search_future.done()):
+            self.log_message.emit("请等待当前任务完成", "warning")
+            return
+        store = self.get_hash_store()
+        if store is None:
+            return
+
+        if hasattr(self, "results_panel") and self.results_panel:
+            self.results_panel.reset_view()
+        if hasattr(self, "workspace_stacked_widget"):
+            self.workspace_stacked_widget.setCurrentIndex(1)
+        self.search_images_btn.setEnabled(False)
+        self.search_folder_btn.setEnabled(False)
+
+        self.search_worker = SimilarSearchWorker(self.progress_channel)
+        self.search_worker.finished.connect(self.on_search_finished)
+        params = {
+            'paths': list(paths),
+            'threshold': self.similarity_spinbox.value(),
+            'hash_store': store,
+            'index': self.similar_index,
+        }
+        self.search_future = get_task_executor().submit_io(self.search_worker.search, params, name="search")
+
+    def on_search_finished(self, result_data):
+        """以图搜图完成处理"""
+        self.progress_channel.flush()
+        self.search_future = None
+        self.search_worker = None
+        self.search_images_btn.setEnabled(True)
+        self.search_folder_btn.setEnabled(True)
+
+        if result_data.get('index') is not None:
+            self.similar_index = result_data['index']
+        # 检索结果不参与阈值重新分组
+        self.candidate_pairs = None
+        self.last_result = None
+        self.execution_finished.emit(result_data)
+
+    def recluster(self):
+        """
+        按新的相似度阈值在内存中重新分组上次扫描的结果
+
+        只使用上次扫描保留的候选对，不重新发现文件、解码或计算哈希；
+        阈值低于保留的候选范围时提示重新扫描。
+        """
+        threshold = self.similarity_spinbox.value()
+        if self.is_scanning or self.candidate_pairs is None or threshold == self.similarity_threshold:
+            return
+
+        if not self.candidate_pairs.covers(threshold / 100.0):
+            self.log_message.emit(
+                f"阈值低于 {RECLUSTER_MIN_THRESHOLD:.0%} 时需要重新扫描才能生效", "warning"
+            )
+            return
+
+        start = time.perf_counter()
+        duplicates = self.candidate_pairs.group(threshold / 100.0)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.similarity_threshold = threshold
+
+        total_groups = len(duplicates)
+        total_duplicates = sum(len(files) for files in duplicates.values())
+        result_data = dict(self.last_result or {})
+        result_data.update({
+            'duplicates': duplicates,
+            'total_groups': total_groups,
+            'total_duplicates': total_duplicates,
+            'threshold': threshold,
+        })
+        self.last_result = result_data
+        self.log_message.emit(
+            f"按 {threshold}% 重新分组: {total_groups} 组重复图片，共 {total_duplicates} 个重复文件 ({elapsed:.0f} ms)",
+            "info"
+        )
+
+        if duplicates and hasattr(self, "workspace_stacked_widget"):
+            self.workspace_stacked_widget.setCurrentIndex(1)
+        self.execution_finished.emit(result_data)
+
     def on_paths_dropped(self, paths):
         """
         处理拖拽进来的路径
@@ -594,14 +1144,7 @@ class DeduplicationModule(BaseFunctionModule):
             paths: 拖拽进来的路径列表
         """
         # 更新扫描路径
-        new_path_count = 0
-        for path in paths:
-            if path not in self.scan_paths:
-                self.scan_paths.append(path)
-                self.path_list.addItem(path)
-                new_path_count += 1
+        new_path_count = self._merge_scan_paths(paths)
         
         if new_path_count > 0:
             self.log_message.emit(f"已自动添加 {new_path_count} 个路径到扫描列表", "info")
-            # 启用扫描按钮
-            self.scan_stop_btn.setEnabled(True)
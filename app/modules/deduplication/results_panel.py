@@ -7,7 +7,7 @@ import os
 import shutil
 from typing import Dict, List, Optional, Set, Tuple
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-                             QTextEdit, QScrollArea, QGridLayout, QProgressBar,
+                             QScrollArea, QGridLayout, QProgressBar,
                              QFrame, QCheckBox, QSplitter, QFileDialog, QMessageBox,
                              QApplication, QDialog, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem,
                              QSlider, QRubberBand, QGraphicsDropShadowEffect)
@@ -15,8 +15,11 @@ from PyQt6.QtWidgets import QSizePolicy
 from PyQt6.QtCore import Qt, pyqtSignal, QRectF, QCoreApplication, QEvent, QPoint, QRect
 from PyQt6.QtGui import QPixmap, QImage, QKeySequence, QShortcut, QPainter, QColor, QPen, QScreen, QCursor
 from app.utils.image_utils import ImageUtils
+from app.utils.image_cache_enhanced import get_image_cache
 from app.utils.ui_helpers import UIHelpers
 from app.ui.theme import Spacing
+from app.modules.deduplication.review_dialog import GroupReviewDialog
+from app.ui.components.log_view import LogView
 
 
 class ClickablePathLabel(QLabel):
@@ -265,17 +268,13 @@ class DuplicateImageWidget(QFrame):
 
         layout.addWidget(self.image_label)
 
-        try:
-            from utils.image_cache_enhanced import get_image_cache
-            self._image_cache = get_image_cache()
-            if not self._thumbnail_signal_connected:
-                self._image_cache.thumbnail_ready.connect(self._on_thumbnail_ready)
-                self._thumbnail_signal_connected = True
-            self._apply_placeholder(self.image_label)
-            self._request_thumbnail()
-        except Exception as exc:  # pylint: disable=broad-except
-            print(f"图片缓存加载失败: {exc}")
-            self._create_image_label_fallback(self.image_label)
+        # 缩略图一律在后台线程解码，GUI线程只显示结果
+        self._image_cache = get_image_cache()
+        if not self._thumbnail_signal_connected:
+            self._image_cache.thumbnail_ready.connect(self._on_thumbnail_ready)
+            self._thumbnail_signal_connected = True
+        self._apply_placeholder(self.image_label)
+        self._request_thumbnail()
 
     def _reapply_shadow(self):
         """重新应用阴影效果（在 setStyleSheet 后需要调用）"""
@@ -310,40 +309,23 @@ class DuplicateImageWidget(QFrame):
         self._reapply_shadow()
 
     def _apply_pixmap(self, pixmap: QPixmap):
+        """显示缩略图：缓存中的图片已在后台裁剪缩放到最终尺寸，这里只负责设置"""
         if not pixmap or pixmap.isNull():
             self._apply_placeholder(self.image_label)
             return
 
         # 确保image_label的尺寸正确设置
         self.image_label.setFixedSize(self.thumbnail_width, self.thumbnail_height)
-
-        # 使用KeepAspectRatioByExpanding确保图片填满整个区域
-        scaled = pixmap.scaled(
-            self.thumbnail_width,
-            self.thumbnail_height,
-            Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-            Qt.TransformationMode.SmoothTransformation,
-        )
-
-        # 计算居中显示的矩形区域
-        pixmap_rect = scaled.rect()
-        label_rect = QRect(0, 0, self.thumbnail_width, self.thumbnail_height)
-
-        # 如果图片比例与标签比例不匹配，居中裁剪
-        if pixmap_rect.width() > label_rect.width() or pixmap_rect.height() > label_rect.height():
-            x = max(0, (pixmap_rect.width() - label_rect.width()) // 2)
-            y = max(0, (pixmap_rect.height() - label_rect.height()) // 2)
-            crop_rect = QRect(x, y, label_rect.width(), label_rect.height())
-            scaled = scaled.copy(crop_rect)
-
-        self.image_label.setPixmap(scaled)
+        self.image_label.setPixmap(pixmap)
         self.image_label.setText("")
-        self.image_label.update()
-        self.image_label.updateGeometry()
 
         # 确保阴影效果存在（图片加载后可能需要重新应用）
         self._reapply_shadow()
 
+    def _device_pixel_ratio(self) -> float:
+        """当前控件所在屏幕的设备像素比"""
+        return max(1.0, float(self.devicePixelRatioF()))
+
     def _request_thumbnail(self):
         if not self._image_cache:
             return
@@ -352,67 +334,18 @@ class DuplicateImageWidget(QFrame):
             self.file_path,
             self.thumbnail_width,
             self.thumbnail_height,
+            self._device_pixel_ratio(),
         )
         if pixmap:
             self._apply_pixmap(pixmap)
 
-    def _create_image_label_fallback(self, label: QLabel):
-        try:
-            from PIL import Image
-            with Image.open(self.file_path) as img:
-                original_width, original_height = img.size
-
-            # 确保标签尺寸正确设置
-            label.setFixedSize(self.thumbnail_width, self.thumbnail_height)
-
-            # 使用居中裁剪的方式确保图片填满指定区域
-            container_aspect_ratio = self.thumbnail_width / self.thumbnail_height
-            image_aspect_ratio = original_width / original_height if original_height else 1
-
-            if image_aspect_ratio > container_aspect_ratio:
-                # 图片更宽，裁剪宽度
-                new_height = self.thumbnail_height
-                new_width = int(new_height * image_aspect_ratio)
-                # 居中裁剪
-                left = (new_width - self.thumbnail_width) // 2
-                top = 0
-                right = left + self.thumbnail_width
-                bottom = new_height
-            else:
-                # 图片更高，裁剪高度
-                new_width = self.thumbnail_width
-                new_height = int(new_width / image_aspect_ratio)
-                # 居中裁剪
-                left = 0
-                top = (new_height - self.thumbnail_height) // 2
-                right = new_width
-                bottom = top + self.thumbnail_height
-
-            # 获取缩略图并进行裁剪
-            thumbnail = ImageUtils.get_thumbnail(self.file_path, (new_width, new_height))
-            if new_width != self.thumbnail_width or new_height != self.thumbnail_height:
-                # 进行居中裁剪
-                thumbnail = thumbnail.crop((left, top, right, bottom))
-            
-            thumbnail = thumbnail.convert("RGBA")
-            data = thumbnail.tobytes("raw", "RGBA")
-            qimage = QImage(data, thumbnail.width, thumbnail.height, QImage.Format.Format_RGBA8888)
-            pixmap = QPixmap.fromImage(qimage)
-            label.setPixmap(pixmap)
-            # 重新应用阴影效果
-            self._reapply_shadow()
-        except Exception as exc:  # pylint: disable=broad-except
-            label.setText("🚫")
-            label.setStyleSheet("color: #dc3545; font-size: 24px; background-color: transparent; border: none;")
-            print(f"直接加载缩略图失败: {exc}")
-            # 即使加载失败也要保持阴影
-            self._reapply_shadow()
-
     def _on_thumbnail_ready(self, file_path: str, width: int, height: int, pixmap: QPixmap):
         if file_path != self.file_path:
             return
         if width != self.thumbnail_width or height != self.thumbnail_height:
             return
+        if pixmap.devicePixelRatio() != self._device_pixel_ratio():
+            return
         self._apply_pixmap(pixmap)
 
     def update_thumbnail_size(self, width: int, height: int):
@@ -423,9 +356,27 @@ class DuplicateImageWidget(QFrame):
         # 确保控件本身也设置正确的尺寸
         self.setFixedSize(self.thumbnail_width, self.thumbnail_height)
         self.image_label.setFixedSize(self.thumbnail_width, self.thumbnail_height)
-        self._apply_placeholder(self.image_label)
+        # 新尺寸的缩略图生成前，把旧图快速缩放到新尺寸（不做平滑）临时显示，没有旧图时显示占位符
+        current = self.image_label.pixmap()
+        if current is None or current.isNull():
+            self._apply_placeholder(self.image_label)
+        elif current.width() != round(self.thumbnail_width * current.devicePixelRatio()) or \
+                current.height() != round(self.thumbnail_height * current.devicePixelRatio()):
+            self.image_label.setPixmap(self._scaled_to_size(current))
         self._request_thumbnail()
 
+    def _scaled_to_size(self, pixmap: QPixmap) -> QPixmap:
+        """把已有缩略图按当前尺寸快速缩放并居中裁剪"""
+        ratio = pixmap.devicePixelRatio()
+        target_width = max(1, round(self.thumbnail_width * ratio))
+        target_height = max(1, round(self.thumbnail_height * ratio))
+        scaled = pixmap.scaled(target_width, target_height, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                               Qt.TransformationMode.FastTransformation)
+        scaled = scaled.copy((scaled.width() - target_width) // 2, (scaled.height() - target_height) // 2,
+                             target_width, target_height)
+        scaled.setDevicePixelRatio(ratio)
+        return scaled
+
     def refresh_thumbnail(self):
         self._request_thumbnail()
 
@@ -1101,10 +1052,9 @@ class DeduplicationResultsPanel(QWidget):
         log_title.setStyleSheet("font-weight: bold; color: white;")
         log_layout.addWidget(log_title)
         
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
+        self.log_text = LogView()
         self.log_text.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: #1e1e1e;
                 color: white;
                 border: 1px solid #3f3f46;
@@ -1286,8 +1236,7 @@ class DeduplicationResultsPanel(QWidget):
         
     def add_log_message(self, message: str, level: str):
         """添加日志消息"""
-        formatted_message = f"[{level.upper()}] {message}"
-        self.log_text.append(formatted_message)
+        self.log_text.add_message(message, level)
         
     def show_results(self, result_data: dict):
         """显示结果"""
@@ -1367,30 +1316,22 @@ class DeduplicationResultsPanel(QWidget):
         self.move_btn.setEnabled(has_selection)
 
     def on_image_double_clicked(self, file_path):
-        """处理图片双击事件"""
-        # 创建并显示图片查看器对话框
-        try:
-            # 使用系统默认图片查看器打开图片
-            import subprocess
-            import platform
-            import os
-            
-            if not os.path.exists(file_path):
-                from app.utils.ui_helpers import UIHelpers
-                UIHelpers.show_styled_message(self, "文件不存在", f"文件不存在: {file_path}", "warning", ["OK"])
-                return
+        """处理图片双击事件：打开重复组审阅对话框，定位到该图片"""
+        if not os.path.exists(file_path):
+            UIHelpers.show_styled_message(self, "文件不存在", f"文件不存在: {file_path}", "warning", ["OK"])
+            return
 
-            system = platform.system()
-            if system == "Windows":
-                os.startfile(file_path)
-            elif system == "Darwin":  # macOS
-                subprocess.run(["open", file_path])
-            else:  # Linux
-                subprocess.run(["xdg-open", file_path])
-        except Exception as e:
-            print(f"打开图片时出错: {e}")
-            from app.utils.ui_helpers import UIHelpers
-            UIHelpers.show_styled_message(self, "错误", f"无法打开图片: {str(e)}", "error", ["OK"])
+        groups = [group.files for group in self.duplicate_groups]
+        group_index, member_index = 0, 0
+        for index, files in enumerate(groups):
+            if file_path in files:
+                group_index, member_index = index, files.index(file_path)
+                break
+        else:
+            groups = [[file_path]]
+
+        dialog = GroupReviewDialog(groups, group_index, member_index, self)
+        dialog.exec()
         
     def update_selection_count(self):
         count = len(self.selected_files)
@@ -1529,9 +1470,10 @@ class DeduplicationResultsPanel(QWidget):
             for file_path in self.selected_files:
                 try:
                     if os.path.exists(file_path):
-                        # 获取文件大小
-                        file_size = os.path.getsize(file_path)
-                        total_space_saved += file_size
+                        # 只有删除最后一个硬链接时才真正释放空间；删除符号链接不释放空间
+                        stat = os.lstat(file_path)
+                        if not os.path.islink(file_path) and stat.st_nlink <= 1:
+                            total_space_saved += stat.st_size
 
                         os.remove(file_path)
                         success_count += 1
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+重复组审阅对话框
+
+在一个窗口内用键盘逐张查看重复组成员：
+- ←/→ 切换组内成员，↑/↓（或 PageUp/PageDown）切换重复组
+- 当前成员的相邻成员以及前后重复组在后台预先解码（有内存上限），
+  切换时直接显示已解码的预览图，不再等待磁盘读取与解码
+"""
+
+import os
+from typing import List
+
+from PyQt6.QtWidgets import QDialog, QLabel, QVBoxLayout, QHBoxLayout, QPushButton
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QKeySequence, QShortcut, QImage
+from app.ui.components.tiled_image_view import TiledImageView
+from app.utils.image_prefetcher import ImagePrefetcher
+
+
+class GroupReviewDialog(QDialog):
+    """
+    重复组审阅对话框
+
+    Args:
+        groups: 重复组列表，每组为图片路径列表（第一张为保留的主图）
+        group_index: 初始组索引
+        member_index: 初始成员索引
+    """
+
+    def __init__(self, groups: List[List[str]], group_index: int = 0, member_index: int = 0, parent=None):
+        super().__init__(parent)
+        self.groups = [list(files) for files in groups if files]
+        self.group_index = max(0, min(group_index, len(self.groups) - 1))
+        self.member_index = 0
+        self.original_size = None
+        self.scale_factor = 1.0
+        self.init_ui()
+        self.setup_shortcuts()
+
+        self.prefetcher = ImagePrefetcher(self.image_view.preview_size(), parent=self)
+        self.prefetcher.image_ready.connect(self.on_prefetch_ready)
+        self.prefetcher.image_failed.connect(self.on_prefetch_failed)
+
+        if self.groups:
+            self.show_member(self.group_index, member_index)
+
+    def init_ui(self):
+        """初始化UI"""
+        self.setWindowTitle("重复组审阅")
+        self.setWindowState(Qt.WindowState.WindowMaximized)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #1e1e1e;
+            }
+            QLabel {
+                background-color: transparent;
+                color: white;
+                border: none;
+            }
+            QPushButton {
+                background-color: #333337;
+                color: #ffffff;
+                border: 1px solid #454545;
+                padding: 8px 16px;
+                border-radius: 4px;
+                font-weight: 500;
+            }
+            QPushButton:hover {
+                background-color: #3f3f46;
+            }
+            QPushButton:disabled {
+                color: #777777;
+            }
+        """)
+
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(10, 10, 10, 10)
+        main_layout.setSpacing(10)
+
+        # 顶部工具栏
+        toolbar = QHBoxLayout()
+        toolbar.setContentsMargins(0, 0, 0, 0)
+
+        self.prev_group_btn = QPushButton("上一组 (↑)")
+        self.prev_group_btn.clicked.connect(self.previous_group)
+        toolbar.addWidget(self.prev_group_btn)
+
+        self.prev_member_btn = QPushButton("上一张 (←)")
+        self.prev_member_btn.clicked.connect(self.previous_member)
+        toolbar.addWidget(self.prev_member_btn)
+
+        self.position_label = QLabel()
+        self.position_label.setStyleSheet("font-weight: bold; font-size: 14px;")
+        self.position_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        toolbar.addWidget(self.position_label, 1)
+
+        self.next_member_btn = QPushButton("下一张 (→)")
+        self.next_member_btn.clicked.connect(self.next_member)
+        toolbar.addWidget(self.next_member_btn)
+
+        self.next_group_btn = QPushButton("下一组 (↓)")
+        self.next_group_btn.clicked.connect(self.next_group)
+        toolbar.addWidget(self.next_group_btn)
+
+        main_layout.addLayout(toolbar)
+
+        # 图片显示区域
+        self.image_view = TiledImageView()
+        self.image_view.setStyleSheet("""
+            QAbstractScrollArea {
+                border: 1px solid #353535;
+                border-radius: 4px;
+                background-color: #2d2d30;
+            }
+        """)
+        self.image_view.image_opened.connect(self.on_image_opened)
+        self.image_view.scale_changed.connect(self.on_scale_changed)
+        self.image_view.load_failed.connect(self.on_load_failed)
+        self.image_view.double_clicked.connect(self.close)
+        main_layout.addWidget(self.image_view)
+
+        # 状态栏
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #cccccc; font-size: 12px; padding: 5px;")
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(self.status_label)
+
+    def setup_shortcuts(self):
+        """设置快捷键"""
+        bindings = [
+            (QKeySequence(Qt.Key.Key_Escape), self.close),
+            (QKeySequence(Qt.Key.Key_Right), self.next_member),
+            (QKeySequence(Qt.Key.Key_Left), self.previous_member),
+            (QKeySequence(Qt.Key.Key_Down), self.next_group),
+            (QKeySequence(Qt.Key.Key_PageDown), self.next_group),
+            (QKeySequence(Qt.Key.Key_Up), self.previous_group),
+            (QKeySequence(Qt.Key.Key_PageUp), self.previous_group),
+            (QKeySequence.StandardKey.ZoomIn, lambda: self.scale_image(1.2)),
+            (QKeySequence.StandardKey.ZoomOut, lambda: self.scale_image(0.8)),
+            (QKeySequence("0"), lambda: self.image_view.set_scale(1.0)),
+            (QKeySequence("F"), self.image_view.fit_to_window),
+        ]
+        for sequence, slot in bindings:
+            shortcut = QShortcut(sequence, self)
+            shortcut.activated.connect(slot)
+
+    # ---- 导航 ----
+
+    @property
+    def current_file(self) -> str:
+        """当前显示的图片路径"""
+        return self.groups[self.group_index][self.member_index]
+
+    def show_member(self, group_index: int, member_index: int):
+        """
+        显示指定重复组的指定成员
+
+        Args:
+            group_index: 组索引
+            member_index: 成员索引
+        """
+        if not self.groups:
+            return
+        self.group_index = max(0, min(group_index, len(self.groups) - 1))
+        files = self.groups[self.group_index]
+        self.member_index = max(0, min(member_index, len(files) - 1))
+
+        file_path = self.current_file
+        self.original_size = None
+        self.status_label.setStyleSheet("color: #cccccc; font-size: 12px; padding: 5px;")
+        self.prefetcher.prefetch(self._prefetch_order())
+        # 已预解码时立即显示；否则等待预取器解码完成后通过 on_prefetch_ready 提供。
+        # 预取已失败的图片不会再被预取，由查看控件自行重试解码（再次失败时报告错误）
+        failed = self.prefetcher.failure(file_path) is not None
+        self.image_view.open(file_path, preview=self.prefetcher.get(file_path), load_preview=failed)
+        self.update_position()
+
+    def next_member(self):
+        """下一张（到组末尾时进入下一组）"""
+        if self.member_index + 1 < len(self.groups[self.group_index]):
+            self.show_member(self.group_index, self.member_index + 1)
+        elif self.group_index + 1 < len(self.groups):
+            self.show_member(self.group_index + 1, 0)
+
+    def previous_member(self):
+        """上一张（到组开头时进入上一组的最后一张）"""
+        if self.member_index > 0:
+            self.show_member(self.group_index, self.member_index - 1)
+        elif self.group_index > 0:
+            self.show_member(self.group_index - 1, len(self.groups[self.group_index - 1]) - 1)
+
+    def next_group(self):
+        """下一组"""
+        if self.group_index + 1 < len(self.groups):
+            self.show_member(self.group_index + 1, 0)
+
+    def previous_group(self):
+        """上一组"""
+        if self.group_index > 0:
+            self.show_member(self.group_index - 1, 0)
+
+    def _prefetch_order(self) -> List[str]:
+        """
+        预取优先级：当前图片 → 组内由近及远的成员 → 下一组 → 上一组
+        """
+        files = self.groups[self.group_index]
+        order = [files[self.member_index]]
+        for distance in range(1, len(files)):
+            for index in (self.member_index + distance, self.member_index - distance):
+                if 0 <= index < len(files):
+                    order.append(files[index])
+        if self.group_index + 1 < len(self.groups):
+            order.extend(self.groups[self.group_index + 1])
+        if self.group_index > 0:
+            order.extend(self.groups[self.group_index - 1])
+        return order
+
+    # ---- 回调 ----
+
+    def on_prefetch_ready(self, file_path: str, image: QImage):
+        """预取完成"""
+        self.image_view.set_preview(file_path, image)
+
+    def on_prefetch_failed(self, file_path: str, error: str):
+        """预取失败"""
+        if file_path == self.current_file:
+            self.on_load_failed(error)
+
+    def on_image_opened(self, width, height):
+        """图片尺寸已知"""
+        self.original_size = (width, height)
+        self.update_status()
+
+    def on_scale_changed(self, scale):
+        """缩放比例变化"""
+        self.scale_factor = scale
+        self.update_status()
+
+    def on_load_failed(self, error):
+        """图片加载失败"""
+        self.status_label.setText(f"无法加载图片: {error}")
+        self.status_label.setStyleSheet("color: #dc3545; font-size: 16px; padding: 5px;")
+
+    def scale_image(self, factor):
+        """缩放图片"""
+        if self.original_size:
+            self.image_view.set_scale(self.scale_factor * factor)
+
+    def update_position(self):
+        """更新位置信息与按钮状态"""
+        files = self.groups[self.group_index]
+        role = "保留" if self.member_index == 0 else "重复"
+        self.position_label.setText(
+            f"组 {self.group_index + 1}/{len(self.groups)} · "
+            f"{self.member_index + 1}/{len(files)}（{role}） · {os.path.basename(self.current_file)}"
+        )
+        self.setWindowTitle(f"重复组审阅 - {os.path.basename(self.current_file)}")
+        self.prev_group_btn.setEnabled(self.group_index > 0)
+        self.next_group_btn.setEnabled(self.group_index + 1 < len(self.groups))
+        self.prev_member_btn.setEnabled(self.group_index > 0 or self.member_index > 0)
+        self.next_member_btn.setEnabled(self.group_index + 1 < len(self.groups)
+                                        or self.member_index + 1 < len(files))
+
+    def update_status(self):
+        """更新状态栏"""
+        if self.original_size:
+            width, height = self.original_size
+            self.status_label.setText(
+                f"尺寸: {width}×{height} "
+                f"缩放: {self.scale_factor*100:.1f}% "
+                f"←/→ 切换图片  ↑/↓ 切换组  双击图片或按ESC键关闭"
+            )
+
+    def closeEvent(self, event):
+        """关闭时停止预取与后台解码"""
+        self.prefetcher.clear()
+        self.image_view.close_image()
+        super().closeEvent(event)
@@ -3,11 +3,10 @@
 图片查看器组件
 """
 
-from PyQt6.QtWidgets import QDialog, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QScrollArea, QWidget
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QPixmap, QImage, QKeySequence, QShortcut
-from utils.image_utils import ImageUtils
-from PIL import Image
+from PyQt6.QtWidgets import QDialog, QLabel, QVBoxLayout, QHBoxLayout, QPushButton
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QKeySequence, QShortcut
+from app.ui.components.tiled_image_view import TiledImageView
 import os
 
 
@@ -15,8 +14,8 @@ class ImageViewer(QDialog):
     """
     图片查看器对话框
     支持：
-    - 滚动查看大图
-    - 缩放功能
+    - 滚动查看大图（预览图优先显示，瓦片金字塔后台生成）
+    - 缩放功能（Ctrl+滚轮以鼠标位置为中心缩放）
     - 双击关闭
     - ESC键关闭
     """
@@ -24,7 +23,7 @@ class ImageViewer(QDialog):
     def __init__(self, image_path, parent=None):
         super().__init__(parent)
         self.image_path = image_path
-        self.pixmap = None
+        self.original_size = None
         self.scale_factor = 1.0
         self.init_ui()
         self.load_image()
@@ -86,12 +85,10 @@ class ImageViewer(QDialog):
         
         main_layout.addLayout(toolbar)
         
-        # 滚动区域
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.scroll_area.setStyleSheet("""
-            QScrollArea {
+        # 图片显示区域
+        self.image_view = TiledImageView()
+        self.image_view.setStyleSheet("""
+            QAbstractScrollArea {
                 border: 1px solid #353535;
                 border-radius: 4px;
                 background-color: #2d2d30;
@@ -123,15 +120,11 @@ class ImageViewer(QDialog):
                 background-color: #666666;
             }
         """)
-        
-        # 图片标签
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setStyleSheet("background-color: #2d2d30; border: none;")
-        self.image_label.mouseDoubleClickEvent = self.mouseDoubleClickEvent
-        
-        self.scroll_area.setWidget(self.image_label)
-        main_layout.addWidget(self.scroll_area)
+        self.image_view.image_opened.connect(self.on_image_opened)
+        self.image_view.scale_changed.connect(self.on_scale_changed)
+        self.image_view.load_failed.connect(self.on_load_failed)
+        self.image_view.double_clicked.connect(self.close)
+        main_layout.addWidget(self.image_view)
         
         # 状态栏
         self.status_label = QLabel("双击图片或按ESC键关闭")
@@ -140,29 +133,23 @@ class ImageViewer(QDialog):
         main_layout.addWidget(self.status_label)
         
     def load_image(self):
-        """加载图片"""
-        try:
-            # 使用PIL加载图片以支持更多格式
-            with Image.open(self.image_path) as img:
-                # 转换为RGB格式（如果需要）
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                # 转换为QImage
-                qimage = ImageUtils.pil_to_qimage(img)
-                self.pixmap = QPixmap.fromImage(qimage)
-                
-            # 设置图片
-            self.image_label.setPixmap(self.pixmap)
-            self.image_label.resize(self.pixmap.size())
-            
-            # 记录原始尺寸
-            self.original_size = self.pixmap.size()
-            self.update_status()
-            
-        except Exception as e:
-            self.image_label.setText(f"无法加载图片: {str(e)}")
-            self.image_label.setStyleSheet("color: #dc3545; font-size: 16px; background-color: #2d2d30;")
+        """加载图片（只读取文件头，图像数据在后台解码）"""
+        self.image_view.open(self.image_path)
+        
+    def on_image_opened(self, width, height):
+        """图片尺寸已知"""
+        self.original_size = (width, height)
+        self.update_status()
+        
+    def on_scale_changed(self, scale):
+        """缩放比例变化"""
+        self.scale_factor = scale
+        self.update_status()
+        
+    def on_load_failed(self, error):
+        """图片加载失败"""
+        self.status_label.setText(f"无法加载图片: {error}")
+        self.status_label.setStyleSheet("color: #dc3545; font-size: 16px; padding: 5px;")
             
     def setup_shortcuts(self):
         """设置快捷键"""
@@ -192,40 +179,29 @@ class ImageViewer(QDialog):
         
     def reset_zoom(self):
         """重置缩放"""
-        self.scale_factor = 1.0
-        if self.pixmap:
-            self.image_label.setPixmap(self.pixmap)
-            self.image_label.resize(self.pixmap.size())
-            self.update_status()
+        self.image_view.set_scale(1.0)
             
     def scale_image(self, factor):
         """缩放图片"""
-        if not self.pixmap:
+        if not self.original_size:
             return
-            
-        self.scale_factor *= factor
-        # 限制缩放范围
-        self.scale_factor = max(0.1, min(self.scale_factor, 10.0))
-        
-        new_size = self.original_size * self.scale_factor
-        scaled_pixmap = self.pixmap.scaled(
-            new_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-        self.image_label.setPixmap(scaled_pixmap)
-        self.image_label.resize(scaled_pixmap.size())
-        self.update_status()
+        self.image_view.set_scale(self.scale_factor * factor)
         
     def update_status(self):
         """更新状态栏"""
-        if self.pixmap:
+        if self.original_size:
+            width, height = self.original_size
             self.status_label.setText(
-                f"尺寸: {self.original_size.width()}×{self.original_size.height()} "
+                f"尺寸: {width}×{height} "
                 f"缩放: {self.scale_factor*100:.1f}% "
                 f"双击图片或按ESC键关闭"
             )
             
     def mouseDoubleClickEvent(self, event):
         """双击事件 - 关闭查看器"""
-        self.close()
\ No newline at end of file
+        self.close()
+        
+    def closeEvent(self, event):
+        """关闭时停止后台解码"""
+        self.image_view.close_image()
+        super().closeEvent(event)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+环形缓冲的日志视图
+
+日志行保存在固定容量的环形缓冲中，超出容量时丢弃最早的行；视图按行虚拟渲染，
+只绘制可见的行。连续追加的多行在下一次事件循环时一次性插入模型，
+批量日志不会逐行触发布局与重绘。
+"""
+
+from collections import deque
+from typing import List, Tuple
+
+from PyQt6.QtWidgets import QListView, QAbstractItemView, QApplication
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt6.QtGui import QColor, QKeySequence
+
+# 默认保留的日志行数
+DEFAULT_MAX_LINES = 10000
+
+# 日志级别对应的文字颜色
+LEVEL_COLORS = {
+    "error": "#ff6b6b",
+    "warning": "#f0ad4e",
+    "success": "#5cb85c",
+}
+
+
+class _LogModel(QAbstractListModel):
+    """环形缓冲日志模型"""
+
+    def __init__(self, max_lines: int, parent=None):
+        super().__init__(parent)
+        self._lines = deque(maxlen=max_lines)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._lines)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._lines):
+            return None
+        text, level = self._lines[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole and level in LEVEL_COLORS:
+            return QColor(LEVEL_COLORS[level])
+        return None
+
+    def extend(self, lines: List[Tuple[str, str]]):
+        """追加多行，超出容量时先移除最早的行"""
+        capacity = self._lines.maxlen
+        lines = lines[-capacity:]
+        overflow = len(self._lines) + len(lines) - capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._lines.popleft()
+            self.endRemoveRows()
+
+        start = len(self._lines)
+        self.beginInsertRows(QModelIndex(), start, start + len(lines) - 1)
+        self._lines.extend(lines)
+        self.endInsertRows()
+
+    def clear(self):
+        """清空日志"""
+        self.beginResetModel()
+        self._lines.clear()
+        self.endResetModel()
+
+
+class LogView(QListView):
+    """
+    日志视图
+
+    Args:
+        max_lines: 最多保留的日志行数
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self._pending: List[Tuple[str, str]] = []
+        self._model = _LogModel(max_lines, self)
+        self.setModel(self._model)
+        self.setUniformItemSizes(True)
+        self.setWordWrap(False)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+
+        self._commit_timer = QTimer(self)
+        self._commit_timer.setSingleShot(True)
+        self._commit_timer.setInterval(0)
+        self._commit_timer.timeout.connect(self._commit)
+
+    def add_message(self, message: str, level: str):
+        """
+        追加一条日志
+
+        Args:
+            message: 日志消息
+            level: 日志级别
+        """
+        self._pending.append((f"[{level.upper()}] {message}", level))
+        if not self._commit_timer.isActive():
+            self._commit_timer.start()
+
+    def _commit(self):
+        """把累积的日志一次性插入模型，停在底部时保持跟随最新一行"""
+        if not self._pending:
+            return
+        scrollbar = self.verticalScrollBar()
+        follow = scrollbar.value() >= scrollbar.maximum()
+        lines, self._pending = self._pending, []
+        self._model.extend(lines)
+        if follow:
+            self.scrollToBottom()
+
+    def clear(self):
+        """清空日志"""
+        self._pending.clear()
+        self._commit_timer.stop()
+        self._model.clear()
+
+    def line_count(self) -> int:
+        """当前保留的日志行数（含尚未插入的行）"""
+        return self._model.rowCount() + len(self._pending)
+
+    def keyPressEvent(self, event):
+        """Ctrl+C 复制选中的日志行"""
+        if event.matches(QKeySequence.StandardKey.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QApplication.clipboard().setText("\n".join(self._model.data(self._model.index(row)) for row in rows))
+            return
+        super().keyPressEvent(event)
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+瓦片式大图显示控件
+
+大图采用“预览优先 + 瓦片金字塔”方式显示：先显示屏幕尺寸的预览图，
+放大到超出预览分辨率时再在后台生成多级金字塔；缩放时只绘制可见区域、
+最接近当前比例层级的瓦片，打开图片到首次显示的时间与原图尺寸无关。
+"""
+
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+from PyQt6.QtWidgets import QAbstractScrollArea
+from PyQt6.QtCore import Qt, pyqtSignal, QObject, QRunnable, QThreadPool, QRectF, QPointF
+from PyQt6.QtGui import QImage, QPainter, QColor
+from app.utils.image_utils import ImageUtils
+from app.utils.image_pyramid import ImagePyramid
+
+
+class _ViewerTaskSignals(QObject):
+    """查看器后台任务信号"""
+
+    opened = pyqtSignal(int, object)                 # (打开序号, 金字塔)
+    open_failed = pyqtSignal(int, str)               # (打开序号, 错误信息)
+    preview_ready = pyqtSignal(object, object)       # (金字塔, QImage)
+    pyramid_ready = pyqtSignal(object)               # 金字塔
+    tile_ready = pyqtSignal(object, object, object)  # (金字塔, (层级, 列, 行), QImage)
+    tile_failed = pyqtSignal(object, object, str)    # (金字塔, (层级, 列, 行), 错误信息)
+    failed = pyqtSignal(object, str)                 # (金字塔, 错误信息)
+
+
+class _OpenTask(QRunnable):
+    """后台读取文件头（网络存储上可能需要一次往返），可选地随后解码屏幕尺寸的预览图"""
+
+    def __init__(self, serial: int, file_path: str, preview_size: Optional[Tuple[int, int]],
+                 signals: _ViewerTaskSignals):
+        super().__init__()
+        self.serial = serial
+        self.file_path = file_path
+        self.preview_size = preview_size
+        self.signals = signals
+
+    def run(self):
+        try:
+            pyramid = ImagePyramid(self.file_path)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.signals.open_failed.emit(self.serial, str(exc))
+            return
+        self.signals.opened.emit(self.serial, pyramid)
+        if self.preview_size is None:
+            return
+        try:
+            preview = pyramid.load_preview(self.preview_size)
+            self.signals.preview_ready.emit(pyramid, ImageUtils.pil_to_qimage(preview))
+        except Exception as exc:  # pylint: disable=broad-except
+            self.signals.failed.emit(pyramid, str(exc))
+
+
+class _PyramidBuildTask(QRunnable):
+    """后台完整解码原图并生成金字塔"""
+
+    def __init__(self, pyramid: ImagePyramid, signals: _ViewerTaskSignals, should_stop):
+        super().__init__()
+        self.pyramid = pyramid
+        self.signals = signals
+        self.should_stop = should_stop
+
+    def run(self):
+        try:
+            if self.pyramid.build(self.should_stop):
+                self.signals.pyramid_ready.emit(self.pyramid)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.signals.failed.emit(self.pyramid, str(exc))
+
+
+class _TileTask(QRunnable):
+    """后台生成单个瓦片"""
+
+    def __init__(self, pyramid: ImagePyramid, key: Tuple[int, int, int], signals: _ViewerTaskSignals):
+        super().__init__()
+        self.pyramid = pyramid
+        self.key = key
+        self.signals = signals
+
+    def run(self):
+        try:
+            tile = self.pyramid.tile(*self.key)
+            self.signals.tile_ready.emit(self.pyramid, self.key, ImageUtils.pil_to_qimage(tile))
+        except Exception as exc:  # pylint: disable=broad-except
+            self.signals.tile_failed.emit(self.pyramid, self.key, str(exc))
+
+
+class TiledImageView(QAbstractScrollArea):
+    """
+    瓦片式大图显示控件
+
+    - 打开图片时在后台读取文件头与解码预览图（也可直接使用预取的预览图），GUI 线程不访问文件
+    - 只有放大到超出预览图分辨率时才在后台生成金字塔
+    - 绘制时先用预览图铺底，再叠加已生成的瓦片，缺失的瓦片排队后台生成
+    - 缩放不会对整张图重新采样
+    """
+
+    scale_changed = pyqtSignal(float)
+    image_opened = pyqtSignal(int, int)
+    load_failed = pyqtSignal(str)
+    double_clicked = pyqtSignal()
+
+    MIN_SCALE = 0.01
+    MAX_SCALE = 10.0
+
+    def __init__(self, parent=None, max_tiles: int = 256):
+        super().__init__(parent)
+        self.pyramid: Optional[ImagePyramid] = None
+        self.preview: Optional[QImage] = None
+        self.scale = 1.0
+        self._fit_pending = False
+        self._max_tiles = max_tiles
+        self._tiles: "OrderedDict[Tuple[int, int, int], QImage]" = OrderedDict()
+        self._pending: Set[Tuple[int, int, int]] = set()
+        self._building = False
+        self._closed = False
+        self._drag_origin: Optional[QPointF] = None
+        # 每次打开递增，忽略已被取代的打开任务的结果
+        self._open_serial = 0
+        # 正在读取文件头的图片 (路径, 预览图)
+        self._opening: Optional[Tuple[str, Optional[QImage]]] = None
+
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(2)
+        self._signals = _ViewerTaskSignals()
+        self._signals.opened.connect(self._on_opened)
+        self._signals.open_failed.connect(self._on_open_failed)
+        self._signals.preview_ready.connect(self._on_preview_ready)
+        self._signals.pyramid_ready.connect(self._on_pyramid_ready)
+        self._signals.tile_ready.connect(self._on_tile_ready)
+        self._signals.tile_failed.connect(self._on_tile_failed)
+        self._signals.failed.connect(self._on_failed)
+
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+
+    # ---- 打开与后台加载 ----
+
+    def preview_size(self) -> Tuple[int, int]:
+        """预览图的像素尺寸上限（所在屏幕的物理像素尺寸）"""
+        dpr = self.devicePixelRatioF()
+        screen = self.screen().availableGeometry() if self.screen() else self.viewport().rect()
+        return max(1, round(screen.width() * dpr)), max(1, round(screen.height() * dpr))
+
+    def open(self, file_path: str, preview: Optional[QImage] = None, load_preview: bool = True):
+        """
+        打开图片（立即返回，图片在后台加载）
+
+        Args:
+            file_path: 图片路径
+            preview: 已解码的预览图，提供时立即显示
+            load_preview: 未提供预览图时是否自行解码；为False时由调用方稍后通过 set_preview 提供
+        """
+        self._thread_pool.clear()
+        self._tiles.clear()
+        self._pending.clear()
+        self._building = False
+        self._closed = False
+        self.preview = None
+        self.pyramid = None
+        self._open_serial += 1
+        self._opening = (file_path, preview)
+        preview_size = self.preview_size() if preview is None and load_preview else None
+        self._thread_pool.start(_OpenTask(self._open_serial, file_path, preview_size, self._signals))
+        self.viewport().update()
+
+    def set_preview(self, file_path: str, preview: QImage):
+        """
+        为当前图片提供预览图（路径不是当前图片时忽略）
+
+        Args:
+            file_path: 图片路径
+            preview: 预览图
+        """
+        if self._opening and self._opening[0] == file_path and self._opening[1] is None:
+            # 文件头尚未读出，打开完成后显示
+            self._opening = (file_path, preview)
+        elif self.pyramid and self.pyramid.file_path == file_path and self.preview is None:
+            self._on_preview_ready(self.pyramid, preview)
+
+    def close_image(self):
+        """停止后台任务并释放图片"""
+        self._closed = True
+        self._open_serial += 1
+        self._opening = None
+        self._thread_pool.clear()
+        self._tiles.clear()
+        self._pending.clear()
+        self._building = False
+        self.preview = None
+        self.pyramid = None
+
+    def _request_pyramid(self):
+        if self._building or not self.pyramid:
+            return
+        self._building = True
+        pyramid = self.pyramid
+        self._thread_pool.start(_PyramidBuildTask(pyramid, self._signals,
+                                                  lambda: self._closed or pyramid is not self.pyramid))
+
+    def _on_opened(self, serial: int, pyramid: ImagePyramid):
+        if serial != self._open_serial or self._opening is None:
+            return
+        _, preview = self._opening
+        self._opening = None
+        self.pyramid = pyramid
+        self.image_opened.emit(pyramid.width, pyramid.height)
+        self._fit_pending = True
+        self._update_scrollbars()
+        if preview is not None:
+            self._on_preview_ready(pyramid, preview)
+        self.viewport().update()
+
+    def _on_open_failed(self, serial: int, error: str):
+        if serial == self._open_serial:
+            self._opening = None
+            self.load_failed.emit(error)
+
+    def _on_preview_ready(self, pyramid: ImagePyramid, preview: QImage):
+        if pyramid is not self.pyramid:
+            return
+        self.preview = preview
+        if self._fit_pending:
+            self.fit_to_window()
+        self.viewport().update()
+
+    def _on_pyramid_ready(self, pyramid: ImagePyramid):
+        if pyramid is self.pyramid:
+            self.viewport().update()
+
+    def _on_tile_ready(self, pyramid: ImagePyramid, key: Tuple[int, int, int], tile: QImage):
+        if pyramid is not self.pyramid:
+            return
+        self._pending.discard(key)
+        self._tiles[key] = tile
+        while len(self._tiles) > self._max_tiles:
+            self._tiles.popitem(last=False)
+        self.viewport().update()
+
+    def _on_tile_failed(self, pyramid: ImagePyramid, key: Tuple[int, int, int], error: str):
+        if pyramid is not self.pyramid:
+            return
+        # 移出排队集合，下次绘制到该区域时重新请求
+        self._pending.discard(key)
+        print(f"生成瓦片失败 {key}: {error}")
+
+    def _on_failed(self, pyramid: ImagePyramid, error: str):
+        if pyramid is self.pyramid:
+            self.load_failed.emit(error)
+
+    # ---- 缩放与滚动 ----
+
+    def set_scale(self, scale: float, anchor: Optional[QPointF] = None):
+        """
+        设置缩放比例，保持 anchor（视口坐标，默认视口中心）下的图像位置不变
+
+        Args:
+            scale: 缩放比例（屏幕像素 / 原图像素）
+            anchor: 缩放锚点
+        """
+        if not self.pyramid:
+            return
+        scale = max(self.MIN_SCALE, min(scale, self.MAX_SCALE))
+        if anchor is None:
+            anchor = QPointF(self.viewport().width() / 2, self.viewport().height() / 2)
+
+        image_x, image_y = self._viewport_to_image(anchor)
+        self.scale = scale
+        self._fit_pending = False
+        self._update_scrollbars()
+
+        offset_x, offset_y = self._content_offset()
+        self.horizontalScrollBar().setValue(round(image_x * scale + offset_x - anchor.x()))
+        self.verticalScrollBar().setValue(round(image_y * scale + offset_y - anchor.y()))
+        self.scale_changed.emit(self.scale)
+        self.viewport().update()
+
+    def fit_to_window(self):
+        """缩放到适合窗口（不放大）"""
+        if not self.pyramid:
+            return
+        viewport = self.viewport().size()
+        scale = min(1.0, viewport.width() / self.pyramid.width, viewport.height() / self.pyramid.height)
+        self.set_scale(scale)
+        # 窗口尺寸确定前保持“适合窗口”状态
+        self._fit_pending = not self.isVisible()
+
+    def _content_offset(self) -> Tuple[float, float]:
+        """图像小于视口时居中的偏移"""
+        if not self.pyramid:
+            return 0.0, 0.0
+        viewport = self.viewport().size()
+        offset_x = max(0.0, (viewport.width() - self.pyramid.width * self.scale) / 2)
+        offset_y = max(0.0, (viewport.height() - self.pyramid.height * self.scale) / 2)
+        return offset_x, offset_y
+
+    def _viewport_to_image(self, point: QPointF) -> Tuple[float, float]:
+        """视口坐标转换为原图坐标"""
+        offset_x, offset_y = self._content_offset()
+        x = (point.x() + self.horizontalScrollBar().value() - offset_x) / self.scale
+        y = (point.y() + self.verticalScrollBar().value() - offset_y) / self.scale
+        return x, y
+
+    def _update_scrollbars(self):
+        if not self.pyramid:
+            return
+        viewport = self.viewport().size()
+        content_width = round(self.pyramid.width * self.scale)
+        content_height = round(self.pyramid.height * self.scale)
+        self.horizontalScrollBar().setRange(0, max(0, content_width - viewport.width()))
+        self.horizontalScrollBar().setPageStep(viewport.width())
+        self.verticalScrollBar().setRange(0, max(0, content_height - viewport.height()))
+        self.verticalScrollBar().setPageStep(viewport.height())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._fit_pending:
+            self.fit_to_window()
+        self._update_scrollbars()
+
+    # ---- 绘制 ----
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), QColor("#2d2d30"))
+        if not self.pyramid or self.preview is None:
+            painter.end()
+            return
+
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        offset_x, offset_y = self._content_offset()
+        origin_x = offset_x - self.horizontalScrollBar().value()
+        origin_y = offset_y - self.verticalScrollBar().value()
+
+        # 可见区域（原图坐标）
+        view = self.viewport().rect()
+        left, top = self._viewport_to_image(QPointF(view.left(), view.top()))
+        right, bottom = self._viewport_to_image(QPointF(view.right() + 1, view.bottom() + 1))
+        left, top = max(0.0, left), max(0.0, top)
+        right, bottom = min(float(self.pyramid.width), right), min(float(self.pyramid.height), bottom)
+        if right <= left or bottom <= top:
+            painter.end()
+            return
+
+        # 预览图铺底：只缩放可见部分
+        preview_factor = self.preview.width() / self.pyramid.width
+        source = QRectF(left * preview_factor, top * preview_factor,
+                        (right - left) * preview_factor, (bottom - top) * preview_factor)
+        target = QRectF(origin_x + left * self.scale, origin_y + top * self.scale,
+                        (right - left) * self.scale, (bottom - top) * self.scale)
+        painter.drawImage(target, self.preview, source)
+
+        # 预览分辨率已足够时不需要瓦片；不够时按需生成金字塔
+        pixel_scale = self.scale * self.devicePixelRatioF()
+        if pixel_scale > preview_factor:
+            if self.pyramid.is_ready:
+                self._paint_tiles(painter, pixel_scale, origin_x, origin_y, (left, top, right, bottom))
+            else:
+                self._request_pyramid()
+
+        painter.end()
+
+    def _paint_tiles(self, painter: QPainter, pixel_scale: float, origin_x: float, origin_y: float,
+                     visible: Tuple[float, float, float, float]):
+        """绘制可见区域内已生成的瓦片，缺失的瓦片排队生成"""
+        pyramid = self.pyramid
+        level = pyramid.level_for_scale(pixel_scale)
+        factor = pyramid.level_factor(level)
+        tile_size = pyramid.tile_size
+        cols, rows = pyramid.tile_grid(level)
+
+        left, top, right, bottom = visible
+        first_col = int(left / factor) // tile_size
+        last_col = min(cols - 1, int(right / factor) // tile_size)
+        first_row = int(top / factor) // tile_size
+        last_row = min(rows - 1, int(bottom / factor) // tile_size)
+
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                key = (level, col, row)
+                tile = self._tiles.get(key)
+                if tile is None:
+                    self._request_tile(key)
+                    continue
+                self._tiles.move_to_end(key)
+                tile_left, tile_top, tile_right, tile_bottom = pyramid.tile_rect(level, col, row)
+                target = QRectF(origin_x + tile_left * factor * self.scale,
+                                origin_y + tile_top * factor * self.scale,
+                                (tile_right - tile_left) * factor * self.scale,
+                                (tile_bottom - tile_top) * factor * self.scale)
+                painter.drawImage(target, tile)
+
+    def _request_tile(self, key: Tuple[int, int, int]):
+        if key in self._pending:
+            return
+        self._pending.add(key)
+        self._thread_pool.start(_TileTask(self.pyramid, key, self._signals))
+
+    # ---- 鼠标交互 ----
+
+    def wheelEvent(self, event):
+        """Ctrl+滚轮缩放，普通滚轮滚动"""
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            factor = 1.2 if event.angleDelta().y() > 0 else 1 / 1.2
+            self.set_scale(self.scale * factor, event.position())
+            event.accept()
+            return
+        super().wheelEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_origin = event.position()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is not None:
+            delta = event.position() - self._drag_origin
+            self._drag_origin = event.position()
+            self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - round(delta.x()))
+            self.verticalScrollBar().setValue(self.verticalScrollBar().value() - round(delta.y()))
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        self.double_clicked.emit()
+        event.accept()
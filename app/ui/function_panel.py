@@ -17,6 +17,10 @@ class FunctionCard(QPushButton):
     """
 
     def __init__(self, module):
+        """
+        Args:
+            module: 模块清单信息（ModuleInfo）或模块实例，需提供 icon/display_name/description
+        """
         super().__init__()
         self.module = module
         self._scale = 1.0  # 缩放比例
@@ -222,9 +226,9 @@ class FunctionPanel(QWidget):
 
         # 创建新卡片
         for module_name in self.function_manager.get_module_names():
-            module = self.function_manager.get_module(module_name)
-            if module:
-                card = FunctionCard(module)
+            info = self.function_manager.get_module_info(module_name)
+            if info:
+                card = FunctionCard(info)
                 card.clicked.connect(lambda checked, name=module_name: self.on_card_selected(name))
                 # 使用 stretch=1 让每个卡片均分可用空间
                 self.function_list_layout.addWidget(card, 1)
@@ -17,8 +17,7 @@ from app.ui.workspace_panel import WorkspacePanel
 from app.ui.about_dialog import AboutDialog
 from app.ui.startup_dialog import StartupDialog
 from app.ui.theme import Theme, FontSize, Spacing
-from app.modules.deduplication import DeduplicationModule
-from app.modules.avif_converter import AVIFConverterModule
+from app.utils import startup_timer
 
 
 class MainWindow(QMainWindow):
@@ -33,6 +32,7 @@ class MainWindow(QMainWindow):
         self.settings_panel = None
         self.workspace_panel = None
         self.startup_dialog = None
+        self._modules_warmed = False
 
         # 用于窗口拖动的变量
         self.drag_position = QPoint()
@@ -43,8 +43,8 @@ class MainWindow(QMainWindow):
         # 显示启动对话框
         self.show_startup_dialog()
 
-        # 延迟初始化UI，给启动对话框显示时间
-        QTimer.singleShot(1000, self.delayed_init)
+        # 在下一轮事件循环中初始化UI，启动对话框先完成绘制
+        QTimer.singleShot(0, self.delayed_init)
 
     def init_ui(self):
         """初始化用户界面"""
@@ -140,17 +140,15 @@ class MainWindow(QMainWindow):
         
     def register_modules(self):
         """注册功能模块 - 懒加载版本"""
-        # 使用模块构造函数注册，实现懒加载
-        from app.modules.deduplication import DeduplicationModule
-        from app.modules.avif_converter import AVIFConverterModule
-        
-        # 注册模块构造函数，而不是立即实例化
-        self.function_manager.register_module_constructor("deduplication", DeduplicationModule, "图片去重")
-        self.function_manager.register_module_constructor("avif_converter", AVIFConverterModule, "AVIF转换")
-        
+        from app.modules import MODULE_MANIFESTS
+
+        # 根据模块清单注册，模块在首次激活时才导入和实例化
+        for info in MODULE_MANIFESTS:
+            self.function_manager.register_manifest(info)
+
         # 更新功能面板
         self.function_panel.update_modules()
-        
+
     def on_function_selected(self, module_name: str):
         """处理功能选择事件"""
         self.function_manager.activate_module(module_name)
@@ -395,6 +393,18 @@ class MainWindow(QMainWindow):
             self.show()
             self.center_window()
 
+    def paintEvent(self, event):
+        """记录主窗口首次绘制时间"""
+        super().paintEvent(event)
+        startup_timer.report_first_paint()
+
+    def showEvent(self, event):
+        """窗口首次显示后在后台预热功能模块"""
+        super().showEvent(event)
+        if not self._modules_warmed and self.function_manager.module_infos:
+            self._modules_warmed = True
+            self.function_manager.warm_up_modules()
+
     def center_window(self):
         """居中显示窗口"""
         screen = self.screen().availableGeometry()
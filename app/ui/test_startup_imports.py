@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+启动导入回归测试
+
+GUI 启动路径不应加载 numpy、imagehash、Pillow 等重量级依赖。
+"""
+
+import os
+import sys
+import unittest
+
+# 添加项目路径到sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(project_root, 'benchmarks'))
+
+try:
+    import PyQt6  # noqa: F401
+except ImportError:
+    PyQt6 = None
+
+from import_time import FORBIDDEN_MODULES, measure_startup_imports
+
+
+@unittest.skipIf(PyQt6 is None, "需要PyQt6")
+class TestStartupImports(unittest.TestCase):
+    """启动导入测试"""
+
+    def test_no_heavy_modules_on_startup(self):
+        """启动路径不加载重量级模块"""
+        result = measure_startup_imports()
+        self.assertEqual(result["forbidden"], [],
+                         f"启动路径不应加载 {FORBIDDEN_MODULES} 中的模块")
+
+    def test_lazy_module_loads_on_first_use(self):
+        """延迟模块在首次访问属性时才导入"""
+        sys.path.insert(0, project_root)
+        from app.utils.lazy_import import is_loaded, lazy_module
+
+        loaded = []
+        proxy = lazy_module("colorsys", on_load=lambda module: loaded.append(module.__name__))
+        self.assertFalse(is_loaded(proxy))
+        self.assertEqual(proxy.rgb_to_hsv(1.0, 0.0, 0.0)[0], 0.0)
+        self.assertTrue(is_loaded(proxy))
+        self.assertEqual(loaded, ["colorsys"])
+
+
+if __name__ == '__main__':
+    unittest.main()
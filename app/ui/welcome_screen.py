@@ -3,16 +3,17 @@
 欢迎屏幕组件 - 右侧工作区纯图片显示
 """
 
+import os
 import random
 import time
-import urllib.request
 from pathlib import Path
 
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QImage, QPixmap
 from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
 
 from app.ui.theme import Theme
+from app.utils.background_cache import BackgroundCache, is_network_available
 
 
 # 全局变量用于存储预加载的图片和加载状态
@@ -42,7 +43,7 @@ class GlobalImageLoader:
             self.image_loader = None
     
     def start_early_download(self):
-        """启动早期图片下载"""
+        """启动后台缓存刷新（网络可用时下载新图片，不阻塞首次绘制）"""
         if self.image_loader is None or not self.image_loader.isRunning():
             self.image_loader = ImageLoader()
             # Connect to store the result in global variables
@@ -72,16 +73,22 @@ class GlobalImageLoader:
 
 
 class ImageLoader(QThread):
-    """异步图片加载线程"""
+    """
+    后台背景图片刷新线程
+
+    先快速探测网络，不可用时直接结束；可用时下载一张新图片写入本地缓存。
+    """
 
     image_loaded = pyqtSignal(QPixmap)
     loading_completed = pyqtSignal()
 
-    def __init__(self, timeout_seconds: float = 3, max_attempt_duration: float = 5, max_urls: int = 2):
+    def __init__(self, timeout_seconds: float = 3, max_attempt_duration: float = 5, max_urls: int = 2,
+                 cache: BackgroundCache | None = None):
         super().__init__()
         self.timeout_seconds = timeout_seconds
         self.max_attempt_duration = max_attempt_duration
         self.max_urls = max_urls
+        self.cache = cache or BackgroundCache()
         self.urls = self._generate_reliable_urls()
 
     def _generate_reliable_urls(self) -> list[str]:
@@ -102,63 +109,64 @@ class ImageLoader(QThread):
         return primary_urls + backup_urls
 
     def run(self) -> None:
-        """在后台线程加载图片"""
-        print("开始加载网络图片...")
-        start_time = time.monotonic()
-
+        """在后台线程刷新缓存"""
         try:
-            for index, url in enumerate(self.urls[: self.max_urls], start=1):
-                if time.monotonic() - start_time >= self.max_attempt_duration:
-                    print("超过图片下载的时间预算，停止请求")
-                    break
-
-                try:
-                    print(f"正在尝试加载第 {index} 个图片源: {url}")
-                    request = urllib.request.Request(
-                        url,
-                        headers={
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                        },
-                    )
-                    with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
-                        image_data = response.read()
-                        print(f"成功下载图片数据，大小 {len(image_data)} 字节")
-
-                    image = QImage()
-                    if not image.loadFromData(image_data):
-                        print("图片数据解析失败")
-                        continue
-
-                    pixmap = QPixmap.fromImage(image)
-                    if pixmap.isNull():
-                        print("图片转换失败，pixmap 为空")
-                        continue
-
-                    print(f"成功转换图片，尺寸 {pixmap.width()}x{pixmap.height()}")
-                    
-                    # 保存到全局变量供后续使用
-                    global preloaded_pixmap
-                    preloaded_pixmap = pixmap
-                    
-                    self.image_loaded.emit(pixmap)
-                    self.loading_completed.emit()
-                    return
-                except Exception as exc:
-                    print(f"URL {url} 加载失败: {exc}")
-
-            print("所有网络图片加载失败，使用本地兜底图片")
-            self.image_loaded.emit(QPixmap())
-            self.loading_completed.emit()
+            if not self.cache.needs_refresh():
+                print("背景图片缓存已是最新，跳过下载")
+                return
+            if not is_network_available(timeout=self.timeout_seconds):
+                print("网络不可用，跳过背景图片下载")
+                return
+            self._download()
         except Exception as exc:
             print(f"图片加载异常: {exc}")
-            self.image_loaded.emit(QPixmap())
+        finally:
             self.loading_completed.emit()
 
+    def _download(self) -> None:
+        """下载一张图片并写入缓存"""
+        # urllib/http/ssl 导入较慢，放到后台线程中
+        import urllib.request
+
+        print("开始加载网络图片...")
+        start_time = time.monotonic()
+
+        for index, url in enumerate(self.urls[: self.max_urls], start=1):
+            if time.monotonic() - start_time >= self.max_attempt_duration:
+                print("超过图片下载的时间预算，停止请求")
+                break
+
+            try:
+                print(f"正在尝试加载第 {index} 个图片源: {url}")
+                request = urllib.request.Request(
+                    url,
+                    headers={
+                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                    },
+                )
+                with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
+                    image_data = response.read()
+                    print(f"成功下载图片数据，大小 {len(image_data)} 字节")
+
+                image = QImage()
+                if not image.loadFromData(image_data):
+                    print("图片数据解析失败")
+                    continue
+
+                path = self.cache.add(image_data)
+                print(f"背景图片已缓存: {path}")
+                self.image_loaded.emit(QPixmap.fromImage(image))
+                return
+            except Exception as exc:
+                print(f"URL {url} 加载失败: {exc}")
+
+        print("网络图片下载失败，下次启动时重试")
+
 
 class WelcomeScreen(QWidget):
     """
     欢迎屏幕 - 在右侧工作区显示撑满的图片
-    优先网络高清图片，失败时回退到本地图像
+    立即显示本地缓存图片（或内置占位图），网络图片只在后台补充缓存
     """
 
     image_loading_completed = pyqtSignal()
@@ -167,6 +175,7 @@ class WelcomeScreen(QWidget):
         super().__init__(parent)
         self.image_loader: ImageLoader | None = None
         self.original_pixmap: QPixmap | None = None
+        self.showing_placeholder = False
         self.base_label_style = f"""
             QLabel {{
                 background-color: {Theme.BG_DARK};
@@ -175,29 +184,24 @@ class WelcomeScreen(QWidget):
             }}
         """
         self.init_ui()
-        
-        # Check if a preloaded pixmap is available through the global loader
-        from .welcome_screen import GlobalImageLoader
-        global_loader = GlobalImageLoader()
-        
-        # Check if a preloaded pixmap is available either as parameter or globally
+
+        # 立即从本地绘制：传入的图片 > 缓存图片 > 内置占位图，从不等待网络
         if preloaded_pixmap_arg is not None and not preloaded_pixmap_arg.isNull():
             print("欢迎屏幕: 使用传入的预加载图片")
-            self.on_image_loaded(preloaded_pixmap_arg)
-            self.on_loading_completed()
-        elif global_loader.is_loading_completed() and global_loader.get_preloaded_image() is not None:
-            print("欢迎屏幕: 使用全局预加载的图片")
-            self.on_image_loaded(global_loader.get_preloaded_image())
-            self.on_loading_completed()
-        else:
-            # If early download is still in progress, wait for it; otherwise start new download
-            if global_loader.image_loader and global_loader.image_loader.isRunning():
-                print("欢迎屏幕: 早期下载仍在进行，等待结果...")
-                global_loader.image_loader.image_loaded.connect(self.on_image_loaded)
-                global_loader.image_loader.loading_completed.connect(self.on_loading_completed)
-            else:
-                print("欢迎屏幕: 开始新的图片下载")
-                self.load_image()
+            self._apply_pixmap(preloaded_pixmap_arg)
+        elif not self.load_cached_image():
+            self.showing_placeholder = self.load_local_image()
+
+        # 后台刷新缓存；缓存为空时用下载到的图片替换占位图
+        global_loader = GlobalImageLoader()
+        if global_loader.image_loader is None:
+            global_loader.start_early_download()
+        self.image_loader = global_loader.image_loader
+        if self.image_loader.isRunning():
+            self.image_loader.image_loaded.connect(self.on_image_loaded)
+
+        # 等信号连接完成后再通知主窗口可以显示
+        QTimer.singleShot(0, self.on_loading_completed)
 
     def init_ui(self) -> None:
         """初始化UI"""
@@ -208,26 +212,33 @@ class WelcomeScreen(QWidget):
         self.image_label = QLabel()
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.image_label.setStyleSheet(self.base_label_style)
-        self.image_label.setText("正在加载高清背景图片...")
         layout.addWidget(self.image_label)
 
-    def load_image(self) -> None:
-        """异步加载图片"""
-        placeholder_loaded = self.load_local_image(show_failure_message=False)
-        if not placeholder_loaded:
-            self.image_label.setText("正在加载高清背景图片...")
+    def load_cached_image(self) -> bool:
+        """从本地缓存加载背景图片"""
+        path = BackgroundCache().pick()
+        if not path:
+            return False
 
-        self.image_loader = ImageLoader()
-        self.image_loader.image_loaded.connect(self.on_image_loaded)
-        self.image_loader.loading_completed.connect(self.on_loading_completed)
-        self.image_loader.start()
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            print(f"缓存图片无效，已删除: {path}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False
+
+        print(f"欢迎屏幕: 使用缓存图片 {path}")
+        self._apply_pixmap(pixmap)
+        return True
 
     def on_image_loaded(self, pixmap: QPixmap) -> None:
-        """图片加载完成回调"""
-        if pixmap.isNull():
-            self.load_local_image()
+        """后台下载完成回调：只替换占位图，已显示的缓存图片保持不变"""
+        if pixmap.isNull() or not self.showing_placeholder:
             return
 
+        self.showing_placeholder = False
         self._apply_pixmap(pixmap)
 
     def on_loading_completed(self) -> None:
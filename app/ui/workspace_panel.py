@@ -4,7 +4,7 @@
 """
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QStackedWidget,
-                             QFrame, QPushButton, QTextEdit, QSplitter, QScrollArea,
+                             QFrame, QPushButton, QSplitter, QScrollArea,
                              QGridLayout, QSizePolicy, QProgressBar, QCheckBox)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QPixmap, QPainter, QColor, QImage
@@ -13,6 +13,7 @@ from app.core.base_module import BaseFunctionModule
 from app.utils.image_utils import ImageUtils
 from app.ui.theme import Spacing
 from app.ui.welcome_screen import WelcomeScreen
+from app.ui.components.log_view import LogView
 
 
 class DuplicateGroupWidget(QFrame):
@@ -297,10 +298,9 @@ class DeduplicationWorkspace(QWidget):
         log_title.setStyleSheet("font-weight: bold; color: white;")
         log_layout.addWidget(log_title)
         
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
+        self.log_text = LogView()
         self.log_text.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: #1e1e1e;
                 color: white;
                 border: 1px solid #3f3f46;
@@ -329,8 +329,7 @@ class DeduplicationWorkspace(QWidget):
 
     def add_log_message(self, message: str, level: str):
         """添加日志消息"""
-        formatted_message = f"[{level.upper()}] {message}"
-        self.log_text.append(formatted_message)
+        self.log_text.add_message(message, level)
         
     def show_results(self, result_data: dict):
         """显示结果"""
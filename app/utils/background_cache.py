@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+欢迎屏幕背景图片本地缓存
+
+启动时直接从本地缓存（或内置占位图）绘制欢迎屏幕，
+网络可用时才在后台下载新图片补充缓存，供下次启动轮换使用。
+"""
+
+import os
+import socket
+import time
+from typing import List, Optional
+
+from app.utils.resource_path import get_user_data_dir
+
+# 缓存中保留的图片数量
+DEFAULT_MAX_IMAGES = 5
+
+
+class BackgroundCache:
+    """
+    轮换式背景图片缓存
+
+    每次取图时返回最久未显示的缓存图片，并更新其修改时间，实现轮换。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_images: int = DEFAULT_MAX_IMAGES):
+        self.cache_dir = cache_dir or os.path.join(get_user_data_dir(), "backgrounds")
+        self.max_images = max_images
+
+    def _list_images(self) -> List[str]:
+        """按修改时间从旧到新列出缓存图片"""
+        try:
+            names = [name for name in os.listdir(self.cache_dir) if name.endswith(".jpg")]
+        except OSError:
+            return []
+        paths = [os.path.join(self.cache_dir, name) for name in names]
+        return sorted(paths, key=lambda path: os.path.getmtime(path))
+
+    def pick(self) -> Optional[str]:
+        """
+        取一张缓存图片用于显示
+
+        Returns:
+            Optional[str]: 图片路径，缓存为空时返回None
+        """
+        images = self._list_images()
+        if not images:
+            return None
+
+        path = images[0]
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def add(self, data: bytes) -> str:
+        """
+        写入一张新图片，并淘汰超出数量上限的旧图片
+
+        Args:
+            data: 图片文件内容
+
+        Returns:
+            str: 写入的文件路径
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"bg-{time.time_ns()}.jpg")
+        temp_path = path + ".part"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        images = self._list_images()
+        for old_path in images[:max(0, len(images) - self.max_images)]:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+        return path
+
+    def needs_refresh(self, max_age: float = 24 * 3600) -> bool:
+        """
+        是否需要下载新图片：缓存未满，或最新一张图片已超过 max_age 秒
+        """
+        images = self._list_images()
+        if len(images) < self.max_images:
+            return True
+        # 修改时间在轮换时会被更新，下载时间取自文件名
+        newest = max(self._downloaded_at(path) for path in images)
+        return time.time() - newest > max_age
+
+    @staticmethod
+    def _downloaded_at(path: str) -> float:
+        """从文件名 bg-<纳秒时间戳>.jpg 中解析下载时间"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            return int(name.split("-", 1)[1]) / 1e9
+        except (IndexError, ValueError):
+            return 0.0
+
+
+def is_network_available(host: str = "picsum.photos", port: int = 443, timeout: float = 1.0) -> bool:
+    """
+    快速探测网络是否可用
+
+    Args:
+        host: 探测的主机名
+        port: 端口
+        timeout: 超时时间（秒）
+
+    Returns:
+        bool: 能否建立TCP连接
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
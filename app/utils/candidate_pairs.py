@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+候选重复对索引
+
+扫描时一次性计算所有图片两两之间的汉明距离（numpy 向量化，按块处理控制内存），
+只保留距离不超过最大半径的候选对及其距离。调整相似度阈值时直接在内存中
+按新阈值重新分组，无需重新发现文件、解码和计算哈希。
+
+分组语义与逐对比较的贪心算法一致：按扫描顺序，每个尚未归组的图片
+吸收其后所有尚未归组、且与它的相似度不低于阈值的图片。
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+
+from app.utils.lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+# 保留候选对的最低相似度：阈值不低于此值时可直接在内存中重新分组
+RECLUSTER_MIN_THRESHOLD = 0.80
+
+# 每块距离矩阵的最大元素数（uint64），约 32MB
+_BLOCK_ELEMENTS = 4_000_000
+
+
+def distance_for_threshold(threshold: float, bits: int) -> int:
+    """
+    计算相似度阈值对应的最大汉明距离
+
+    与 ImageUtils.calculate_similarity 使用相同的浮点计算，保证边界一致。
+
+    Args:
+        threshold: 相似度阈值 (0-1)
+        bits: 哈希位数
+
+    Returns:
+        int: 最大汉明距离，阈值高于1时为-1
+    """
+    max_distance = -1
+    for distance in range(bits + 1):
+        if 1 - (distance / bits) >= threshold:
+            max_distance = distance
+    return max_distance
+
+
+class CandidatePairs:
+    """
+    候选重复对索引
+
+    保存扫描顺序的路径列表、打包后的哈希位矩阵，以及距离不超过 max_distance 的
+    候选对 (i, j, distance)，其中 i < j。
+    """
+
+    def __init__(self, paths: List[str], rows, bits: int):
+        self.paths = paths
+        self.bits = bits
+        self.max_distance = -1
+        self.comparisons = 0
+        self._rows = rows
+        self._first = np.empty(0, dtype=np.int32)
+        self._second = np.empty(0, dtype=np.int32)
+        self._distances = np.empty(0, dtype=np.uint16)
+
+    @classmethod
+    def from_hashes(cls, hashes: Dict) -> "CandidatePairs":
+        """
+        从 路径 -> imagehash.ImageHash 映射（按扫描顺序）创建索引
+
+        Args:
+            hashes: 文件路径到哈希值的映射
+
+        Returns:
+            CandidatePairs: 尚未计算候选对的索引
+        """
+        paths = list(hashes.keys())
+        if not paths:
+            return cls(paths, np.empty((0, 0), dtype=np.uint64), 0)
+
+        bits = hashes[paths[0]].hash.size
+        packed = np.stack([np.packbits(hashes[path].hash.flatten()) for path in paths])
+        # 补齐到8字节整数倍，按 uint64 异或与计数
+        padding = (-packed.shape[1]) % 8
+        if padding:
+            packed = np.pad(packed, ((0, 0), (0, padding)))
+        rows = np.ascontiguousarray(packed).view(np.uint64)
+        return cls(paths, rows, bits)
+
+    @property
+    def pair_count(self) -> int:
+        """已保留的候选对数量"""
+        return len(self._distances)
+
+    def covers(self, threshold: float) -> bool:
+        """已保留的候选对是否足以按该阈值分组"""
+        return self.bits > 0 and distance_for_threshold(threshold, self.bits) <= self.max_distance
+
+    def build(self, threshold: float, progress_callback: Optional[Callable[[float, str], None]] = None,
+              should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        计算所有相似度不低于 threshold 的候选对
+
+        Args:
+            threshold: 保留候选对的最低相似度
+            progress_callback: 进度回调函数 callback(progress, message)，进度范围 70-100
+            should_stop: 停止检查函数 should_stop() -> bool
+
+        Returns:
+            bool: 是否完成（被停止时返回False，已有候选对保持不变）
+        """
+        count = len(self.paths)
+        max_distance = distance_for_threshold(threshold, self.bits) if self.bits else -1
+        first_parts, second_parts, distance_parts = [], [], []
+        block = max(1, _BLOCK_ELEMENTS // max(1, count))
+        comparisons = 0
+        # 64位哈希只有一个字，按一维数组比较，省去按字求和
+        single_word = self._rows.ndim == 2 and self._rows.shape[1] == 1
+        rows = self._rows[:, 0] if single_word else self._rows
+
+        for start in range(0, count, block):
+            if should_stop and should_stop():
+                return False
+
+            end = min(start + block, count)
+            # 块内每行与其后所有行比较
+            xor = rows[start:end, None] ^ rows[None, start + 1:]
+            distances = np.bitwise_count(xor)
+            if not single_word:
+                distances = distances.sum(axis=2, dtype=np.uint16)
+            # 一维 flatnonzero 比二维 nonzero 快一个数量级
+            hits = np.flatnonzero(distances <= max_distance)
+            if len(hits):
+                rows_index, cols_index = np.divmod(hits, distances.shape[1])
+                first = rows_index + start
+                second = cols_index + start + 1
+                upper = second > first
+                first_parts.append(first[upper].astype(np.int32))
+                second_parts.append(second[upper].astype(np.int32))
+                distance_parts.append(distances.ravel()[hits[upper]].astype(np.uint16))
+            comparisons += (end - start) * (2 * count - start - end - 1) // 2
+
+            if progress_callback:
+                progress = 70 + end / count * 30  # 70-100%
+                progress_callback(progress, f"查找重复项... {end}/{count}")
+
+        if first_parts:
+            self._first = np.concatenate(first_parts)
+            self._second = np.concatenate(second_parts)
+            self._distances = np.concatenate(distance_parts)
+        self.max_distance = max_distance
+        self.comparisons = comparisons
+        return True
+
+    def group(self, threshold: float) -> Dict[str, List[str]]:
+        """
+        按阈值贪心分组
+
+        Args:
+            threshold: 相似度阈值，需满足 covers(threshold)
+
+        Returns:
+            Dict[str, List[str]]: 重复图片组，键为主图片路径，值为相似图片路径列表
+        """
+        if not self.covers(threshold):
+            raise ValueError(f"候选对只覆盖汉明距离 {self.max_distance} 以内，无法按阈值 {threshold} 分组")
+
+        limit = distance_for_threshold(threshold, self.bits)
+        selected = self._distances <= limit
+        first = self._first[selected]
+        second = self._second[selected]
+
+        duplicates = {}
+        processed = np.zeros(len(self.paths), dtype=bool)
+        # 候选对按 (i, j) 升序生成，按 i 切分即得到每个图片之后的邻居
+        starts = np.flatnonzero(np.r_[True, first[1:] != first[:-1]]) if len(first) else []
+        bounds = list(starts) + [len(first)]
+        for k in range(len(bounds) - 1):
+            i = first[bounds[k]]
+            if processed[i]:
+                continue
+            neighbors = second[bounds[k]:bounds[k + 1]]
+            members = neighbors[~processed[neighbors]]
+            if not len(members):
+                continue
+            processed[i] = True
+            processed[members] = True
+            duplicates[self.paths[i]] = [self.paths[j] for j in members]
+        return duplicates
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+并行目录遍历
+
+os.walk 逐个列出目录，在 NFS/SMB 上每次 listdir/stat 都要等待一次往返，
+目录数很多时仅遍历就要数十分钟。DirectoryWalker 在任务执行服务的 IO 池中
+同时列出多个目录（在途数量有上限），按先序（自顶向下）流式产出结果；
+同一目录内按名称排序，扫描顺序不受列出任务完成先后的影响，依赖扫描顺序的
+分组结果保持确定。
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.task_executor import IO_POOL, TaskQueueFull, get_task_executor
+
+
+def _list_directory(path: str, with_stat: bool, follow_symlinks: bool,
+                    exclude: Optional[Callable[[str], bool]] = None) -> Tuple[List[os.DirEntry], List[str]]:
+    """
+    列出一个目录（在 IO 池中执行）
+
+    Args:
+        path: 目录路径
+        with_stat: 是否同时获取文件的 stat（结果缓存在 DirEntry 中）
+        follow_symlinks: 是否进入指向目录的符号链接
+        exclude: 可选的目录排除函数 exclude(目录路径) -> bool，被排除的目录不再列出
+
+    Returns:
+        Tuple[List[os.DirEntry], List[str]]: (文件条目, 子目录路径)，均按名称排序
+    """
+    files, subdirs = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # 与 os.walk 一致：默认不进入指向目录的符号链接
+                if (follow_symlinks or not entry.is_symlink()) and not (exclude and exclude(entry.path)):
+                    subdirs.append(entry.path)
+                continue
+            if with_stat:
+                try:
+                    entry.stat()
+                except OSError:
+                    continue
+            files.append(entry)
+    files.sort(key=lambda entry: entry.name)
+    subdirs.sort()
+    return files, subdirs
+
+
+class DirectoryWalker:
+    """
+    并行目录遍历器
+
+    Args:
+        max_depth: 最大深度，0 表示只列出根目录，None 表示不限
+        window: 同时在途的目录列出任务数，默认为 IO 池线程数
+        with_stat: 是否在 IO 池中同时获取文件的 stat，调用方随后调用 entry.stat() 不再访问文件系统
+        follow_symlinks: 是否进入指向目录的符号链接
+        exclude: 可选的目录排除函数 exclude(目录路径) -> bool，被排除的目录整体跳过
+        metrics: 可选的扫描指标收集器（ScanMetrics）
+    """
+
+    def __init__(self, max_depth: Optional[int] = None, window: Optional[int] = None,
+                 with_stat: bool = False, follow_symlinks: bool = False,
+                 exclude: Optional[Callable[[str], bool]] = None, metrics=None):
+        self.max_depth = max_depth
+        self.window = window
+        self.with_stat = with_stat
+        self.follow_symlinks = follow_symlinks
+        self.exclude = exclude
+        self.metrics = metrics
+
+    def walk(self, root: str, should_stop: Optional[Callable[[], bool]] = None
+             ) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+        """
+        按先序（自顶向下，同级按名称）产出每个目录的文件
+
+        无法列出的目录被跳过（计入指标 directory_errors）。
+
+        Args:
+            root: 根目录
+            should_stop: 停止检查函数 should_stop() -> bool
+
+        Returns:
+            Iterator[Tuple[str, List[os.DirEntry]]]: (目录路径, 文件条目)
+        """
+        executor = get_task_executor()
+        window = max(1, self.window or executor.workers(IO_POOL))
+        depths: Dict[str, int] = {root: 0}
+        # 已提交、尚未产出的目录
+        futures: Dict[str, Future] = {}
+        # 在途（尚未展开子目录）的任务
+        in_flight: Dict[Future, str] = {}
+        submitted = set()
+        # 待提交的目录，后进先出，使预取顺序接近产出顺序
+        queued: List[str] = []
+        # 产出顺序（先序遍历）的栈
+        stack: List[str] = [root]
+
+        def submit(path: str) -> Future:
+            submitted.add(path)
+            try:
+                future = executor.submit_io(_list_directory, path, self.with_stat, self.follow_symlinks,
+                                            self.exclude, name="list_directory", timeout=0)
+            except TaskQueueFull:
+                # 队列已满时在当前线程中直接列出
+                future = Future()
+                try:
+                    future.set_result(_list_directory(path, self.with_stat, self.follow_symlinks, self.exclude))
+                except Exception as e:
+                    future.set_exception(e)
+            futures[path] = future
+            in_flight[future] = path
+            return future
+
+        def expand(future: Future):
+            """已列出的目录：子目录加入待提交队列"""
+            path = in_flight.pop(future)
+            depth = depths[path]
+            if future.exception() is not None or (self.max_depth is not None and depth >= self.max_depth):
+                return
+            _, subdirs = future.result()
+            for subdir in reversed(subdirs):
+                depths[subdir] = depth + 1
+                queued.append(subdir)
+
+        try:
+            while stack:
+                if should_stop and should_stop():
+                    break
+
+                path = stack.pop()
+                future = futures[path] if path in submitted else submit(path)
+                # 等待当前目录期间，已完成的其他目录继续展开，保持窗口满载
+                while True:
+                    for done in [f for f in in_flight if f.done()]:
+                        expand(done)
+                    while queued and len(in_flight) < window:
+                        queued_path = queued.pop()
+                        if queued_path not in submitted:
+                            submit(queued_path)
+                    if future.done() or (should_stop and should_stop()):
+                        break
+                    wait(list(in_flight), timeout=0.1, return_when=FIRST_COMPLETED)
+                if not future.done():
+                    break
+                if future in in_flight:
+                    expand(future)
+
+                del futures[path]
+                depth = depths.pop(path)
+                try:
+                    files, subdirs = future.result()
+                except OSError:
+                    if self.metrics is not None:
+                        self.metrics.add("directory_errors")
+                    continue
+                if self.metrics is not None:
+                    self.metrics.add("directories_listed")
+                if self.max_depth is None or depth < self.max_depth:
+                    stack.extend(reversed(subdirs))
+                yield path, files
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+    def files(self, root: str, should_stop: Optional[Callable[[], bool]] = None) -> Iterator[os.DirEntry]:
+        """
+        按先序产出所有文件条目
+
+        Args:
+            root: 根目录
+            should_stop: 停止检查函数 should_stop() -> bool
+
+        Returns:
+            Iterator[os.DirEntry]: 文件条目
+        """
+        for _, files in self.walk(root, should_stop):
+            yield from files
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+文件发现阶段的过滤规则
+
+缩略图缓存、.git、node_modules、Lightroom 预览以及小图标等文件不会是用户要找的
+重复图片，却同样要被解码与计算哈希。DiscoveryFilter 在遍历时就排除它们：
+- 排除规则：glob（不含 / 时匹配文件或目录名，含 / 时匹配完整路径）或以 re: 开头的
+  正则表达式（在完整路径中搜索）；匹配的目录整体跳过，不再列出
+- 文件大小：来自遍历时在 IO 池中获取的 stat
+- 最小尺寸：只读取文件头获取宽高，在 IO 池中并行进行
+"""
+
+import fnmatch
+import os
+import re
+import sys
+from typing import Callable, Iterable, List, Optional
+
+from app.core.task_executor import IO_POOL, get_task_executor
+
+# 默认排除规则
+DEFAULT_EXCLUDES = (
+    ".git", ".svn", "node_modules", "__MACOSX", ".thumbnails", ".cache",
+    "@eaDir", "#recycle", "$RECYCLE.BIN", ".Trash*", "*.lrdata",
+)
+
+
+def parse_patterns(text: str) -> List[str]:
+    """
+    解析用户输入的排除规则（以逗号、分号或换行分隔）
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        List[str]: 排除规则
+    """
+    return [pattern.strip() for pattern in re.split(r"[,;\n]", text or "") if pattern.strip()]
+
+
+class DiscoveryFilter:
+    """
+    文件发现过滤器
+
+    Args:
+        excludes: 排除规则
+        min_size: 最小文件大小（字节），0 表示不限
+        max_size: 最大文件大小（字节），0 表示不限
+        min_dimension: 宽和高的最小值（像素），0 表示不限
+
+    Raises:
+        ValueError: 正则表达式无效
+    """
+
+    def __init__(self, excludes: Iterable[str] = (), min_size: int = 0, max_size: int = 0,
+                 min_dimension: int = 0):
+        self.excludes = list(excludes)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_dimension = min_dimension
+
+        flags = re.IGNORECASE if sys.platform == "win32" else 0
+        name_parts, path_parts = [], []
+        for pattern in self.excludes:
+            if pattern.startswith("re:"):
+                # 正则表达式在路径中任意位置匹配
+                path_parts.append(f"(?s:.*(?:{pattern[3:]}))")
+            elif "/" in pattern or "\\" in pattern:
+                path_parts.append(fnmatch.translate(pattern.replace("\\", "/")))
+            else:
+                name_parts.append(fnmatch.translate(pattern))
+        try:
+            self._name_re = re.compile("|".join(name_parts), flags) if name_parts else None
+            self._path_re = re.compile("|".join(path_parts), flags) if path_parts else None
+        except re.error as e:
+            raise ValueError(f"无效的排除规则: {e}") from e
+
+    @property
+    def needs_stat(self) -> bool:
+        """是否需要文件大小"""
+        return bool(self.min_size or self.max_size)
+
+    def is_excluded(self, path: str) -> bool:
+        """
+        路径（文件或目录）是否匹配排除规则
+
+        Args:
+            path: 文件或目录路径
+
+        Returns:
+            bool: 是否排除
+        """
+        if self._name_re is not None and self._name_re.match(os.path.basename(path)):
+            return True
+        return self._path_re is not None and bool(self._path_re.match(path.replace("\\", "/")))
+
+    def accepts_entry(self, entry: os.DirEntry) -> bool:
+        """
+        按排除规则与文件大小判断文件条目
+
+        Args:
+            entry: 遍历得到的文件条目
+
+        Returns:
+            bool: 是否保留
+        """
+        if self.is_excluded(entry.path):
+            return False
+        if self.needs_stat:
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                return True
+            if size < self.min_size or (self.max_size and size > self.max_size):
+                return False
+        return True
+
+    def accepts_dimensions(self, file_path: str) -> bool:
+        """
+        按文件头中的宽高判断文件（无法读取时保留，由后续处理报告错误）
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            bool: 是否保留
+        """
+        if not self.min_dimension:
+            return True
+        # 延迟导入，避免 image_utils 与本模块循环导入
+        from app.utils.image_utils import ImageUtils
+
+        info = ImageUtils.get_image_info(file_path)
+        if info.get('error'):
+            return True
+        return min(info['width'], info['height']) >= self.min_dimension
+
+    def filter_dimensions(self, image_files: List[str], should_stop: Optional[Callable[[], bool]] = None,
+                          metrics=None) -> List[str]:
+        """
+        在 IO 池中并行读取文件头，去除尺寸过小的文件
+
+        Args:
+            image_files: 文件路径列表
+            should_stop: 停止检查函数 should_stop() -> bool
+            metrics: 可选的扫描指标收集器（ScanMetrics）
+
+        Returns:
+            List[str]: 保留的文件（保持原顺序）
+        """
+        if not self.min_dimension:
+            return image_files
+        kept = []
+        for file_path, future in get_task_executor().map(IO_POOL, self.accepts_dimensions, image_files,
+                                                          name="read_header"):
+            if should_stop and should_stop():
+                break
+            if future.cancelled() or future.exception() is not None or future.result():
+                kept.append(file_path)
+            elif metrics is not None:
+                metrics.add("files_filtered_dimensions")
+        return kept
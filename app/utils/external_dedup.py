@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+外存去重
+
+文件数达到千万级时，路径 -> ImageHash 字典与全部候选对都放不进内存。
+ExternalDuplicateFinder 把哈希与路径按扫描顺序写入工作目录，之后每一步只把
+一个分桶读入内存，峰值内存由配置的预算决定，与图库大小无关：
+1. 按哈希前缀分桶、桶内排序，合并完全相同的哈希，扫描顺序中的第一个作为代表
+2. 把 64 位哈希分成 d+1 段（d 为阈值对应的最大汉明距离），距离不超过 d 的两个哈希
+   至少有一段完全相同。每一段按段值前缀分桶，桶内排序后只比较段值相同的代表，
+   命中的候选对按第一个图片的序号分桶写回磁盘
+3. 按序号顺序逐桶读入候选对，以与 CandidatePairs.group 相同的贪心语义分组并流式产出
+
+常驻内存的只有每个文件1字节的归组标记，以及哈希完全相同的重复文件列表（与结果规模相当）。
+每段越短，段值相同的图片越多，比较次数随之增加：默认阈值 0.95 时每段 16 位，
+不支持低于 0.9 的阈值（每段不足 10 位，几乎所有图片两两比较）。
+
+发现阶段的路径列表由 PathSpool 保存，文件数达到外存去重的门槛后写入磁盘；
+结果由 collect_groups 写入报告文件，内存中只保留用于显示的一部分。
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+from contextlib import nullcontext
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.utils.candidate_pairs import distance_for_threshold
+from app.utils.lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+# 环境变量：文件数达到该值时使用外存去重（0 表示不使用）
+EXTERNAL_DEDUP_FILES_ENV = "IMAGETRIM_EXTERNAL_DEDUP_FILES"
+# 环境变量：外存去重的内存预算（MB）
+EXTERNAL_DEDUP_MEMORY_ENV = "IMAGETRIM_EXTERNAL_DEDUP_MB"
+# 环境变量：工作目录所在的目录，默认为系统临时目录
+EXTERNAL_DEDUP_DIR_ENV = "IMAGETRIM_EXTERNAL_DEDUP_DIR"
+
+# 默认启用外存去重的文件数
+DEFAULT_MIN_FILES = 1_000_000
+
+# 默认内存预算
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+
+# 支持的哈希位数
+HASH_BITS = 64
+
+# 支持的最低相似度阈值
+MIN_THRESHOLD = 0.9
+
+# 桶内处理每条记录的内存估算（记录本身、排序索引与临时数组）
+_BYTES_PER_RECORD = 96
+
+# 计算哈希时每个文件在内存中的估算占用（路径、ImageHash、字典项）
+_BYTES_PER_HASHED_FILE = 1024
+
+# 同时打开的分桶文件数上限
+_MAX_BUCKETS = 512
+
+# 顺序读取工作文件时每次读入的记录数
+_STREAM_RECORDS = 1 << 20
+
+# 顺序读取路径文件时每次读入的字节数
+_READ_BLOCK = 1 << 20
+
+# 把 inode 编号散列到分桶（64 位黄金比例乘法散列）
+_INODE_HASH = 0x9E3779B97F4A7C15
+
+
+def _min_files() -> int:
+    """启用外存去重的文件数（IMAGETRIM_EXTERNAL_DEDUP_FILES），0 表示不使用"""
+    try:
+        return int(os.environ.get(EXTERNAL_DEDUP_FILES_ENV, DEFAULT_MIN_FILES))
+    except ValueError:
+        return DEFAULT_MIN_FILES
+
+
+def _memory_bytes() -> int:
+    """外存去重的内存预算（IMAGETRIM_EXTERNAL_DEDUP_MB）"""
+    try:
+        return int(float(os.environ[EXTERNAL_DEDUP_MEMORY_ENV]) * 1024 * 1024)
+    except (KeyError, ValueError):
+        return DEFAULT_MEMORY_BYTES
+
+
+def _bucket_bits(records: int, records_per_bucket: int) -> int:
+    """使每个分桶不超过 records_per_bucket 条记录所需的桶号位数（受桶数上限约束）"""
+    if records <= records_per_bucket:
+        return 0
+    return min(math.ceil(math.log2(records / records_per_bucket)), int(math.log2(_MAX_BUCKETS)))
+
+
+class _BucketFiles:
+    """
+    一组追加写入的分桶文件，每条记录为 columns 个 uint64
+
+    Args:
+        directory: 工作目录
+        name: 文件名前缀
+        count: 分桶数
+        columns: 每条记录的列数
+    """
+
+    def __init__(self, directory: str, name: str, count: int, columns: int):
+        self.paths = [os.path.join(directory, f"{name}-{k}.bin") for k in range(count)]
+        self.columns = columns
+        self.bytes_written = 0
+        self._files = [open(path, "wb") for path in self.paths]
+
+    def write(self, bucket_ids, records):
+        """
+        把记录追加到各自的分桶
+
+        Args:
+            bucket_ids: 每条记录的桶号
+            records: 记录，形状为 (n, columns) 的 uint64 数组
+        """
+        if not len(records):
+            return
+        order = np.argsort(bucket_ids, kind="stable")
+        bucket_ids = bucket_ids[order]
+        records = records[order]
+        bounds = np.flatnonzero(bucket_ids[1:] != bucket_ids[:-1]) + 1
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(records)]):
+            records[start:end].tofile(self._files[int(bucket_ids[start])])
+        self.bytes_written += records.nbytes
+
+    def close(self):
+        """结束写入"""
+        for f in self._files:
+            if not f.closed:
+                f.close()
+
+    def read(self, bucket: int):
+        """
+        读入一个分桶并删除其文件
+
+        Returns:
+            形状为 (n, columns) 的 uint64 数组
+        """
+        path = self.paths[bucket]
+        records = np.fromfile(path, dtype=np.uint64).reshape(-1, self.columns)
+        os.remove(path)
+        return records
+
+
+class ExternalDuplicateFinder:
+    """
+    外存去重
+
+    用法：按扫描顺序多次调用 add_many 写入哈希，再迭代 groups() 取得重复组；
+    用作上下文管理器，退出时删除工作目录。
+
+    Args:
+        threshold: 相似度阈值
+        memory_bytes: 内存预算（字节），决定每个分桶的大小与计算哈希的分块大小
+        work_dir: 工作目录所在的目录，默认为系统临时目录
+        metrics: 可选的扫描指标收集器（ScanMetrics）
+
+    Raises:
+        ValueError: 阈值低于 MIN_THRESHOLD
+    """
+
+    def __init__(self, threshold: float, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 work_dir: Optional[str] = None, metrics=None):
+        if threshold < MIN_THRESHOLD:
+            raise ValueError(f"外存去重的相似度阈值不能低于 {MIN_THRESHOLD:.0%}（当前为 {threshold:.0%}）")
+        self.threshold = threshold
+        self.max_distance = distance_for_threshold(threshold, HASH_BITS)
+        self.memory_bytes = max(memory_bytes, 16 * 1024 * 1024)
+        self.metrics = metrics
+        self.count = 0
+        self.directory = tempfile.mkdtemp(prefix="imagetrim-dedup-", dir=work_dir)
+        self._hashes = open(self._path("hashes.bin"), "wb")
+        self._paths = open(self._path("paths.bin"), "wb")
+        self._offsets = open(self._path("offsets.bin"), "wb")
+        np.zeros(1, dtype=np.uint64).tofile(self._offsets)
+        self._path_bytes = 0
+        self._spilled = 0
+
+    @classmethod
+    def from_environment(cls, threshold: float, file_count: int,
+                         metrics=None) -> Optional["ExternalDuplicateFinder"]:
+        """
+        按环境变量创建；文件数低于 IMAGETRIM_EXTERNAL_DEDUP_FILES（默认100万）时返回None
+
+        Args:
+            threshold: 相似度阈值
+            file_count: 待扫描的文件数
+            metrics: 可选的扫描指标收集器
+
+        Raises:
+            ValueError: 需要使用外存去重但阈值低于 MIN_THRESHOLD（调用方应改为在内存中比较）
+        """
+        min_files = _min_files()
+        if min_files <= 0 or file_count < min_files:
+            return None
+        return cls(threshold, _memory_bytes(), os.environ.get(EXTERNAL_DEDUP_DIR_ENV) or None, metrics)
+
+    @property
+    def chunk_files(self) -> int:
+        """每次计算哈希的文件数，使内存中的哈希字典不超过预算"""
+        return max(1000, self.memory_bytes // _BYTES_PER_HASHED_FILE)
+
+    @property
+    def result_files(self) -> int:
+        """结果中保留在内存里用于显示的文件数"""
+        return self.chunk_files
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def add_many(self, hashes: Dict):
+        """
+        按扫描顺序追加一批哈希
+
+        Args:
+            hashes: 文件路径到 64 位 imagehash.ImageHash 的映射（按扫描顺序）
+
+        Raises:
+            ValueError: 哈希不是 64 位，或文件数超出上限
+        """
+        if not hashes:
+            return
+        bits = np.stack([image_hash.hash.reshape(-1) for image_hash in hashes.values()])
+        if bits.shape[1] != HASH_BITS:
+            raise ValueError(f"外存去重只支持 {HASH_BITS} 位哈希，当前为 {bits.shape[1]} 位")
+        if self.count + len(hashes) >= 1 << 32:
+            raise ValueError("外存去重最多支持 2^32 个文件")
+
+        np.packbits(bits, axis=1).view(">u8").reshape(-1).astype(np.uint64).tofile(self._hashes)
+        encoded = [os.fsencode(file_path) for file_path in hashes]
+        lengths = np.fromiter(map(len, encoded), dtype=np.uint64, count=len(encoded))
+        offsets = np.cumsum(lengths) + np.uint64(self._path_bytes)
+        offsets.tofile(self._offsets)
+        self._paths.write(b"".join(encoded))
+        self._path_bytes = int(offsets[-1])
+        self.count += len(encoded)
+
+    def groups(self, progress_callback: Optional[Callable[[float, str], None]] = None,
+               should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[str, List[str]]]:
+        """
+        按扫描顺序流式产出重复组，结果与 CandidatePairs.group(threshold) 相同
+
+        Args:
+            progress_callback: 进度回调函数 callback(progress, message)，进度范围 70-100
+            should_stop: 停止检查函数 should_stop() -> bool，停止时不再产出
+
+        Returns:
+            Iterator[Tuple[str, List[str]]]: (主图片路径, 相似图片路径列表)
+        """
+        for f in (self._hashes, self._paths, self._offsets):
+            f.close()
+        count = self.count
+        if count < 2 or self.max_distance < 0:
+            return
+
+        records_per_bucket = max(1024, self.memory_bytes // _BYTES_PER_RECORD)
+        hashes = np.memmap(self._path("hashes.bin"), dtype=np.uint64, mode="r", shape=(count,))
+        with self.metrics.phase("comparison") if self.metrics else nullcontext():
+            unique, dup_reps, dup_members = self._collapse(hashes, records_per_bucket)
+            pairs = self._find_pairs(unique, records_per_bucket, progress_callback, should_stop)
+        del hashes
+        if pairs is None:
+            return
+        if self.metrics:
+            self.metrics.set_phase_items("comparison", count)
+            self.metrics.add("exact_duplicates", len(dup_members))
+            self.metrics.add("external_spilled_bytes", self._spilled)
+
+        offsets = np.memmap(self._path("offsets.bin"), dtype=np.uint64, mode="r", shape=(count + 1,))
+        blob = np.memmap(self._path("paths.bin"), dtype=np.uint8, mode="r")
+
+        def path(index) -> str:
+            return os.fsdecode(blob[int(offsets[index]):int(offsets[index + 1])].tobytes())
+
+        processed = np.zeros(count, dtype=bool)
+        span = math.ceil(count / len(pairs.paths))
+        for bucket in range(len(pairs.paths)):
+            if should_stop and should_stop():
+                return
+            keys = np.unique(pairs.read(bucket))
+            first = (keys >> np.uint64(32)).astype(np.int64)
+            second = (keys & np.uint64(0xFFFFFFFF)).astype(np.int64)
+            if self.metrics:
+                self.metrics.add("candidate_pairs", len(keys))
+
+            # 组的起点：有候选对的代表，以及有完全相同副本的代表
+            low, high = np.searchsorted(dup_reps, [bucket * span, (bucket + 1) * span])
+            for i in np.union1d(first, dup_reps[low:high]):
+                if processed[i]:
+                    continue
+                start, end = np.searchsorted(first, [i, i + 1])
+                neighbors = second[start:end]
+                neighbors = neighbors[~processed[neighbors]]
+                # 代表被吸收时，其完全相同的副本一同吸收
+                reps = np.r_[i, neighbors]
+                lefts = np.searchsorted(dup_reps, reps, side="left")
+                rights = np.searchsorted(dup_reps, reps, side="right")
+                members = np.sort(np.concatenate(
+                    [neighbors] + [dup_members[a:b] for a, b in zip(lefts, rights) if b > a]
+                ))
+                if not len(members):
+                    continue
+                processed[i] = True
+                processed[members] = True
+                yield path(i), [path(j) for j in members]
+
+            if progress_callback:
+                progress = 95 + (bucket + 1) / len(pairs.paths) * 5  # 95-100%
+                progress_callback(progress, f"分组... {bucket + 1}/{len(pairs.paths)}")
+
+    def _collapse(self, hashes, records_per_bucket: int):
+        """
+        合并完全相同的哈希
+
+        Returns:
+            (代表的 (哈希, 序号) 数组, 按代表排序的副本所属代表, 对应的副本序号)
+        """
+        count = len(hashes)
+        bits = _bucket_bits(count, records_per_bucket)
+        buckets = _BucketFiles(self.directory, "exact", 1 << bits, 2)
+        try:
+            for start in range(0, count, _STREAM_RECORDS):
+                values = np.asarray(hashes[start:start + _STREAM_RECORDS])
+                ids = values >> np.uint64(HASH_BITS - bits) if bits else np.zeros(len(values), dtype=np.uint64)
+                index = np.arange(start, start + len(values), dtype=np.uint64)
+                buckets.write(ids, np.column_stack((values, index)))
+        finally:
+            buckets.close()
+        self._spilled += buckets.bytes_written
+
+        unique_parts, rep_parts, member_parts = [], [], []
+        for bucket in range(len(buckets.paths)):
+            records = buckets.read(bucket)
+            records = records[np.lexsort((records[:, 1], records[:, 0]))]
+            is_first = np.r_[True, records[1:, 0] != records[:-1, 0]]
+            reps = records[is_first, 1][np.cumsum(is_first) - 1]
+            unique_parts.append(records[is_first])
+            rep_parts.append(reps[~is_first])
+            member_parts.append(records[~is_first, 1])
+
+        unique = np.concatenate(unique_parts)
+        dup_reps = np.concatenate(rep_parts).astype(np.int64)
+        dup_members = np.concatenate(member_parts).astype(np.int64)
+        order = np.lexsort((dup_members, dup_reps))
+        return unique, dup_reps[order], dup_members[order]
+
+    def _bands(self) -> List[Tuple[int, int]]:
+        """哈希的分段 (起始位, 位数)；距离不超过 max_distance 的两个哈希至少有一段相同"""
+        bands = self.max_distance + 1
+        if bands > HASH_BITS:
+            # 阈值为0：所有图片两两相似
+            return [(0, 0)]
+        bounds = [round(HASH_BITS * b / bands) for b in range(bands + 1)]
+        return [(bounds[b], bounds[b + 1] - bounds[b]) for b in range(bands)]
+
+    def _find_pairs(self, unique, records_per_bucket: int, progress_callback, should_stop) -> Optional[_BucketFiles]:
+        """
+        查找代表之间距离不超过 max_distance 的候选对
+
+        Returns:
+            Optional[_BucketFiles]: 按第一个图片的序号分桶的候选对 (i << 32 | j)，被停止时返回None
+        """
+        pair_count = min(_MAX_BUCKETS, max(1, math.ceil(self.count / records_per_bucket)))
+        span = np.uint64(math.ceil(self.count / pair_count))
+        pairs = _BucketFiles(self.directory, "pairs", pair_count, 1)
+        bands = self._bands()
+        comparisons = 0
+        try:
+            for band, (low, width) in enumerate(bands):
+                bits = min(width, _bucket_bits(len(unique), records_per_bucket))
+                buckets = _BucketFiles(self.directory, f"band{band}", 1 << bits, 3)
+                mask = np.uint64((1 << width) - 1)
+                try:
+                    for start in range(0, len(unique), _STREAM_RECORDS):
+                        chunk = unique[start:start + _STREAM_RECORDS]
+                        keys = (chunk[:, 0] >> np.uint64(low)) & mask
+                        ids = keys >> np.uint64(width - bits) if bits else np.zeros(len(keys), dtype=np.uint64)
+                        buckets.write(ids, np.column_stack((keys, chunk[:, 1], chunk[:, 0])))
+                finally:
+                    buckets.close()
+                self._spilled += buckets.bytes_written
+
+                for bucket in range(len(buckets.paths)):
+                    if should_stop and should_stop():
+                        return None
+                    records = buckets.read(bucket)
+                    records = records[np.lexsort((records[:, 1], records[:, 0]))]
+                    comparisons += self._match_bucket(records, pairs, span)
+                    if progress_callback:
+                        done = band + (bucket + 1) / len(buckets.paths)
+                        progress = 70 + done / len(bands) * 25  # 70-95%
+                        progress_callback(progress, f"查找重复项... 分段 {band + 1}/{len(bands)}")
+        finally:
+            pairs.close()
+        self._spilled += pairs.bytes_written
+        if self.metrics:
+            self.metrics.add("comparisons", comparisons)
+        return pairs
+
+    def _match_bucket(self, records, pairs: _BucketFiles, span) -> int:
+        """
+        比较一个分桶（已按段值、序号排序）内段值相同的记录，候选对写入 pairs
+
+        依次比较相隔 1、2、3… 条的记录，每轮只保留段值仍然相同的位置，
+        比较次数等于各段值内的图片对数。
+
+        Returns:
+            int: 比较次数
+        """
+        keys, index, values = records[:, 0], records[:, 1], records[:, 2]
+        active = np.flatnonzero(keys[1:] == keys[:-1])
+        offset = 1
+        comparisons = 0
+        while len(active):
+            comparisons += len(active)
+            distances = np.bitwise_count(values[active] ^ values[active + offset])
+            hits = active[distances <= self.max_distance]
+            if len(hits):
+                first, second = index[hits], index[hits + offset]
+                pairs.write(first // span, ((first << np.uint64(32)) | second)[:, None])
+            offset += 1
+            active = active[active + offset < len(keys)]
+            active = active[keys[active + offset] == keys[active]]
+        return comparisons
+
+    def close(self):
+        """删除工作目录"""
+        for f in (self._hashes, self._paths, self._offsets):
+            f.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "ExternalDuplicateFinder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class PathSpool:
+    """
+    按发现顺序保存的路径列表
+
+    路径数未达到 limit 时保存在内存中；达到后全部写入工作目录（以空字符分隔），
+    之后追加的路径直接写入文件，内存中只保留计数。用作上下文管理器，退出时删除工作目录。
+
+    Args:
+        limit: 内存中保存的路径数上限，None 表示始终保存在内存中
+        memory_bytes: 去除硬链接时的内存预算（字节）
+        work_dir: 工作目录所在的目录，默认为系统临时目录
+    """
+
+    def __init__(self, limit: Optional[int] = None, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 work_dir: Optional[str] = None):
+        self.limit = limit
+        self.memory_bytes = max(memory_bytes, 16 * 1024 * 1024)
+        self.work_dir = work_dir
+        self.directory = None
+        self._paths: List[str] = []
+        self._file = None
+        self._count = 0
+
+    @classmethod
+    def from_environment(cls) -> "PathSpool":
+        """按外存去重的环境变量创建：文件数达到 IMAGETRIM_EXTERNAL_DEDUP_FILES 时写入磁盘"""
+        min_files = _min_files()
+        return cls(min_files if min_files > 0 else None, _memory_bytes(),
+                   os.environ.get(EXTERNAL_DEDUP_DIR_ENV) or None)
+
+    @property
+    def spilled(self) -> bool:
+        """路径是否已写入磁盘"""
+        return self.directory is not None
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, "paths.bin")
+
+    def append(self, file_path: str):
+        """追加一个路径"""
+        if self._file is not None:
+            self._file.write(os.fsencode(file_path) + b"\0")
+        else:
+            self._paths.append(file_path)
+            if self.limit is not None and len(self._paths) >= self.limit:
+                self._spill()
+        self._count += 1
+
+    def extend(self, file_paths: Iterable[str]):
+        """按顺序追加路径（可以是惰性产出的迭代器）"""
+        for file_path in file_paths:
+            self.append(file_path)
+
+    def _spill(self):
+        """把内存中的路径写入工作目录，之后的路径直接追加到文件"""
+        self.directory = tempfile.mkdtemp(prefix="imagetrim-paths-", dir=self.work_dir)
+        self._file = open(self._path(), "wb")
+        for file_path in self._paths:
+            self._file.write(os.fsencode(file_path) + b"\0")
+        self._paths = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        if self._file is None:
+            yield from self._paths
+            return
+        self._file.flush()
+        yield from self._read()
+
+    def _read(self) -> Iterator[str]:
+        """按顺序读出路径文件中的路径"""
+        with open(self._path(), "rb") as f:
+            rest = b""
+            while True:
+                block = f.read(_READ_BLOCK)
+                if not block:
+                    break
+                parts = (rest + block).split(b"\0")
+                rest = parts.pop()
+                for part in parts:
+                    yield os.fsdecode(part)
+
+    def drop_aliases(self, should_stop: Optional[Callable[[], bool]] = None) -> int:
+        """
+        按 (st_dev, st_ino) 去除指向同一物理文件的路径（硬链接、符号链接），每个物理文件保留第一个路径
+
+        已写入磁盘时按 inode 分桶排序查找重复，内存占用不超过预算。
+
+        Args:
+            should_stop: 停止检查函数 should_stop() -> bool，停止时不做修改
+
+        Returns:
+            int: 去除的路径数
+        """
+        if not self.spilled:
+            from app.utils.image_utils import ImageUtils
+            unique, _ = ImageUtils.unique_physical_files(self._paths)
+            removed = len(self._paths) - len(unique)
+            self._paths = unique
+            self._count = len(unique)
+            return removed
+
+        self._file.flush()
+        records_per_bucket = max(1024, self.memory_bytes // _BYTES_PER_RECORD)
+        bits = _bucket_bits(self._count, records_per_bucket)
+        buckets = _BucketFiles(self.directory, "inodes", 1 << bits, 3)
+        try:
+            paths = iter(self)
+            start = 0
+            while True:
+                if should_stop and should_stop():
+                    return 0
+                chunk = list(islice(paths, _STREAM_RECORDS))
+                if not chunk:
+                    break
+                records = []
+                for index, file_path in enumerate(chunk, start):
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    # 部分文件系统不提供 inode 编号（为0），无法判断是否为同一文件
+                    if stat.st_ino:
+                        records.append((stat.st_dev, stat.st_ino, index))
+                start += len(chunk)
+                if records:
+                    records = np.array(records, dtype=np.uint64)
+                    ids = ((records[:, 1] * np.uint64(_INODE_HASH)) >> np.uint64(HASH_BITS - bits)
+                           if bits else np.zeros(len(records), dtype=np.uint64))
+                    buckets.write(ids, records)
+        finally:
+            buckets.close()
+
+        alias_parts = []
+        for bucket in range(len(buckets.paths)):
+            records = buckets.read(bucket)
+            records = records[np.lexsort((records[:, 2], records[:, 1], records[:, 0]))]
+            same = (records[1:, 0] == records[:-1, 0]) & (records[1:, 1] == records[:-1, 1])
+            alias_parts.append(records[1:, 2][same])
+        aliases = np.sort(np.concatenate(alias_parts)) if alias_parts else np.zeros(0, dtype=np.uint64)
+        if not len(aliases):
+            return 0
+
+        # 重写路径文件，跳过被去除的路径
+        self._file.close()
+        temp_path = f"{self._path()}.tmp"
+        position = 0
+        with open(temp_path, "wb") as f:
+            for index, file_path in enumerate(self._read()):
+                if position < len(aliases) and aliases[position] == index:
+                    position += 1
+                    continue
+                f.write(os.fsencode(file_path) + b"\0")
+        os.replace(temp_path, self._path())
+        self._file = open(self._path(), "ab")
+        self._count -= len(aliases)
+        return len(aliases)
+
+    def close(self):
+        """删除工作目录"""
+        if self._file is not None:
+            self._file.close()
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "PathSpool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def collect_groups(groups: Iterable[Tuple[str, List[str]]], max_files: int,
+                   report_path: str) -> Tuple[Dict[str, List[str]], int, int]:
+    """
+    收集流式产出的重复组
+
+    全部组逐行写入报告文件（JSON Lines，每行 {"primary": 主图片, "duplicates": [相似图片]}），
+    内存中只保留前 max_files 个文件所在的组用于显示（至少保留第一组）。没有重复组时不创建报告文件。
+
+    Args:
+        groups: (主图片路径, 相似图片路径列表)
+        max_files: 内存中保留的文件数上限
+        report_path: 报告文件路径
+
+    Returns:
+        Tuple[Dict[str, List[str]], int, int]: (保留的重复组, 总组数, 重复文件总数)
+    """
+    shown: Dict[str, List[str]] = {}
+    shown_files = 0
+    total_groups = 0
+    total_duplicates = 0
+    full = False
+    report = None
+    try:
+        for primary, members in groups:
+            if report is None:
+                os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+                report = open(report_path, "w", encoding="utf-8")
+            report.write(json.dumps({"primary": primary, "duplicates": members}, ensure_ascii=False) + "\n")
+            total_groups += 1
+            total_duplicates += len(members)
+            if not full and (not shown or shown_files + 1 + len(members) <= max_files):
+                shown[primary] = members
+                shown_files += 1 + len(members)
+            else:
+                full = True
+    finally:
+        if report is not None:
+            report.close()
+    return shown, total_groups, total_duplicates
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+紧凑的文件表
+
+每个已索引的文件原本要占用一个完整的路径字符串、一个带 numpy 布尔数组的 ImageHash
+以及若干列表/字典项，约 1KB。FileTable 按列保存同样的信息：
+- 目录去重后编号，每个文件只记录目录编号（uint32）
+- 文件名连续存放在一个字节块中，另记偏移与长度
+- 打包后的哈希为 uint64 数组，大小、修改时间各一列
+每个文件约 40 字节加文件名长度，百万级文件的表在数十 MB 以内。表可以保存为文件，
+载入时直接内存映射，无需逐条解析，路径只在需要时才拼接为字符串。
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from app.utils.lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+# 文件头：标识、格式版本，随后是各列的长度
+_MAGIC = b"IMTTABLE"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQQQQ")
+
+
+def _align(size: int) -> int:
+    """向上对齐到8字节"""
+    return (size + 7) & ~7
+
+
+class FileTable:
+    """
+    紧凑的文件表（只读）
+
+    Args:
+        directories: 目录（以分隔符结尾，目录 + 文件名即为完整路径）
+        dir_ids: 每个文件的目录编号（uint32）
+        names: 文件名字节块（uint8，os.fsencode 编码）
+        name_offsets: 每个文件名在字节块中的偏移（uint64）
+        name_lengths: 每个文件名的字节数（uint32）
+        hashes: 打包的哈希（uint64，形状为 (文件数, 字数)，即 hash_to_bytes 的结果按8字节一字）
+        sizes: 文件大小（int64）
+        mtimes: 修改时间（纳秒，int64）
+        generation: 数据版本（由来源定义，用于判断保存的表是否过期）
+    """
+
+    def __init__(self, directories: List[str], dir_ids, names, name_offsets, name_lengths,
+                 hashes, sizes, mtimes, generation: int = 0):
+        self.directories = directories
+        self.dir_ids = dir_ids
+        self.names = names
+        self.name_offsets = name_offsets
+        self.name_lengths = name_lengths
+        self.hashes = hashes
+        self.sizes = sizes
+        self.mtimes = mtimes
+        self.generation = generation
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, int, int, bytes]], words: int = 1,
+                     generation: int = 0) -> "FileTable":
+        """
+        从记录逐条创建（记录可以惰性生成，不需要整体放入内存）
+
+        Args:
+            records: (路径, 大小, 修改时间, 打包的哈希)
+            words: 每个哈希的 uint64 字数，不足的哈希以0补齐
+            generation: 数据版本
+
+        Returns:
+            FileTable: 文件表
+        """
+        directories: List[str] = []
+        directory_ids = {}
+        dir_ids = array("I")
+        names = bytearray()
+        name_offsets = array("Q")
+        name_lengths = array("I")
+        hashes = bytearray()
+        sizes = array("q")
+        mtimes = array("q")
+        width = words * 8
+
+        for file_path, size, mtime_ns, packed in records:
+            name = os.path.basename(file_path)
+            directory = file_path[:len(file_path) - len(name)]
+            dir_id = directory_ids.get(directory)
+            if dir_id is None:
+                dir_id = directory_ids[directory] = len(directories)
+                directories.append(directory)
+            encoded = os.fsencode(name)
+            dir_ids.append(dir_id)
+            name_offsets.append(len(names))
+            name_lengths.append(len(encoded))
+            names += encoded
+            hashes += packed[:width].ljust(width, b"\0")
+            sizes.append(size)
+            mtimes.append(mtime_ns)
+
+        return cls(
+            directories,
+            np.frombuffer(dir_ids, dtype=np.uint32),
+            np.frombuffer(bytes(names), dtype=np.uint8),
+            np.frombuffer(name_offsets, dtype=np.uint64),
+            np.frombuffer(name_lengths, dtype=np.uint32),
+            np.frombuffer(bytes(hashes), dtype=np.uint64).reshape(len(sizes), words),
+            np.frombuffer(sizes, dtype=np.int64),
+            np.frombuffer(mtimes, dtype=np.int64),
+            generation
+        )
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def words(self) -> int:
+        """每个哈希的 uint64 字数"""
+        return self.hashes.shape[1]
+
+    def path(self, index: int) -> str:
+        """
+        第 index 个文件的完整路径
+
+        Args:
+            index: 文件序号
+
+        Returns:
+            str: 路径
+        """
+        offset = int(self.name_offsets[index])
+        name = self.names[offset:offset + int(self.name_lengths[index])].tobytes()
+        return self.directories[int(self.dir_ids[index])] + os.fsdecode(name)
+
+    def paths(self) -> Iterator[str]:
+        """按顺序产出所有路径"""
+        for index in range(len(self)):
+            yield self.path(index)
+
+    def under(self, prefixes: List[str]):
+        """
+        位于指定路径前缀下的文件（按目录判断，每个目录只比较一次）
+
+        Args:
+            prefixes: 以分隔符结尾的目录前缀
+
+        Returns:
+            bool 数组：每个文件是否位于某个前缀之下
+        """
+        prefixes = tuple(prefixes)
+        matched = np.fromiter((directory.startswith(prefixes) for directory in self.directories),
+                              dtype=bool, count=len(self.directories))
+        return matched[self.dir_ids] if len(self) else np.zeros(0, dtype=bool)
+
+    def subset(self, selected) -> "FileTable":
+        """
+        选出部分文件组成新表（文件名字节块与目录列表共享，不复制）
+
+        Args:
+            selected: bool 数组或序号数组
+
+        Returns:
+            FileTable: 新表
+        """
+        return FileTable(self.directories, self.dir_ids[selected], self.names, self.name_offsets[selected],
+                         self.name_lengths[selected], self.hashes[selected], self.sizes[selected],
+                         self.mtimes[selected], self.generation)
+
+    def save(self, file_path: str):
+        """
+        保存为文件（先写入临时文件再替换，读取方不会看到写了一半的文件）
+
+        Args:
+            file_path: 文件路径
+        """
+        directories = b"\0".join(os.fsencode(directory) for directory in self.directories)
+        # 各列依次存放，每列起始位置按8字节对齐
+        columns = [
+            np.asarray(self.hashes, dtype=np.uint64),
+            np.asarray(self.sizes, dtype=np.int64),
+            np.asarray(self.mtimes, dtype=np.int64),
+            np.asarray(self.name_offsets, dtype=np.uint64),
+            np.asarray(self.name_lengths, dtype=np.uint32),
+            np.asarray(self.dir_ids, dtype=np.uint32),
+            np.asarray(self.names, dtype=np.uint8),
+            np.frombuffer(directories, dtype=np.uint8),
+        ]
+        header = _HEADER.pack(_MAGIC, _VERSION, self.words, len(self), len(self.directories),
+                              len(self.names), len(directories), self.generation, 0)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            for column in columns:
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                column.tofile(f)
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str, mmap: bool = True) -> "FileTable":
+        """
+        载入保存的表
+
+        Args:
+            file_path: 文件路径
+            mmap: 是否内存映射（否则整体读入内存）
+
+        Returns:
+            FileTable: 文件表
+
+        Raises:
+            OSError: 文件无法读取
+            ValueError: 文件格式不正确
+        """
+        with open(file_path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"文件表已损坏: {file_path}")
+        magic, version, words, count, dir_count, names_length, dirs_length, generation, _ = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"不支持的文件表格式: {file_path}")
+
+        data = (np.memmap(file_path, dtype=np.uint8, mode="r") if mmap
+                else np.fromfile(file_path, dtype=np.uint8))
+        position = _HEADER.size
+
+        def column(dtype, length):
+            nonlocal position
+            position = _align(position)
+            size = length * np.dtype(dtype).itemsize
+            if position + size > len(data):
+                raise ValueError(f"文件表已损坏: {file_path}")
+            values = data[position:position + size].view(dtype)
+            position += size
+            return values
+
+        hashes = column(np.uint64, count * words).reshape(count, words)
+        sizes = column(np.int64, count)
+        mtimes = column(np.int64, count)
+        name_offsets = column(np.uint64, count)
+        name_lengths = column(np.uint32, count)
+        dir_ids = column(np.uint32, count)
+        names = column(np.uint8, names_length)
+        directories_blob = column(np.uint8, dirs_length).tobytes()
+        directories = [os.fsdecode(directory) for directory in directories_blob.split(b"\0")] if dir_count else []
+        if len(directories) != dir_count:
+            raise ValueError(f"文件表已损坏: {file_path}")
+        return cls(directories, dir_ids, names, name_offsets, name_lengths, hashes, sizes, mtimes, generation)
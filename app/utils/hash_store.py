@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+持久化图片哈希库与相似图片检索
+
+HashStore 把扫描时计算的感知哈希按 (路径, 文件大小, 修改时间) 保存在 SQLite 中，
+再次扫描未修改的文件时直接复用，不再解码。解码超时或导致解码进程崩溃的文件
+记入隔离列表，文件未修改前不再尝试解码。
+
+SimilarImageIndex 把哈希库载入为紧凑的文件表（FileTable），查询时对整个库做向量化的
+异或与位计数，百万级图库的单次查询在毫秒级完成，用于“以图搜图”。文件表保存在哈希库
+旁边，哈希库未变化时直接内存映射，不再逐条读取 SQLite。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.file_table import FileTable
+from app.utils.lazy_import import lazy_module
+from app.utils.resource_path import get_user_data_dir
+
+np = lazy_module("numpy")
+imagehash = lazy_module("imagehash")
+
+# 哈希库文件名（位于用户数据目录）
+HASH_STORE_NAME = "hash_index.sqlite3"
+
+
+def hash_to_bytes(image_hash) -> bytes:
+    """
+    将 imagehash.ImageHash 打包为字节串
+
+    Args:
+        image_hash: 哈希值
+
+    Returns:
+        bytes: 按位打包的哈希
+    """
+    return np.packbits(image_hash.hash.flatten()).tobytes()
+
+
+def hash_from_bytes(data: bytes, bits: int):
+    """
+    从字节串还原 imagehash.ImageHash
+
+    Args:
+        data: hash_to_bytes 的输出
+        bits: 哈希位数
+
+    Returns:
+        imagehash.ImageHash: 哈希值
+    """
+    flat = np.unpackbits(np.frombuffer(data, dtype=np.uint8))[:bits].astype(bool)
+    side = int(round(bits ** 0.5))
+    return imagehash.ImageHash(flat.reshape(side, side) if side * side == bits else flat)
+
+
+def _root_prefixes(roots: List[str]) -> List[str]:
+    """目录的路径前缀（以分隔符结尾），同时包含原样与规范化的写法，互为前缀的只保留较短者"""
+    prefixes = set()
+    for root in roots:
+        for variant in (root, os.path.normpath(root)):
+            stripped = variant.rstrip("/\\")
+            prefixes.add(stripped + (variant[len(stripped)] if len(variant) > len(stripped) else os.sep))
+    ordered = sorted(prefixes, key=len)
+    return [prefix for index, prefix in enumerate(ordered)
+            if not any(prefix.startswith(shorter) for shorter in ordered[:index])]
+
+
+class HashStore:
+    """
+    持久化图片哈希库
+
+    线程安全：所有访问共享一个连接并由锁保护，可在扫描线程与界面线程中同时使用。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_user_data_dir(), HASH_STORE_NAME)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " bits INTEGER NOT NULL,"
+            " hash BLOB NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS quarantine ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " reason TEXT NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        # 哈希表每次写入后递增的版本号，用于判断保存的文件表是否过期
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+        self._connection.commit()
+        self._pending: List[Tuple[str, int, int, int, bytes]] = []
+
+    def get(self, file_path: str, size: int, mtime_ns: int):
+        """
+        读取未修改文件的哈希
+
+        Args:
+            file_path: 文件路径
+            size: 当前文件大小
+            mtime_ns: 当前修改时间（纳秒）
+
+        Returns:
+            Optional[imagehash.ImageHash]: 记录存在且文件未修改时返回哈希，否则返回None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, bits, hash FROM hashes WHERE path = ?", (file_path,)
+            ).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        return hash_from_bytes(row[3], row[2])
+
+    def put(self, file_path: str, size: int, mtime_ns: int, image_hash):
+        """
+        保存一个哈希（批量写入，调用 flush 或累计一定数量后提交）
+
+        Args:
+            file_path: 文件路径
+            size: 文件大小
+            mtime_ns: 修改时间（纳秒）
+            image_hash: 哈希值
+        """
+        with self._lock:
+            self._pending.append((file_path, size, mtime_ns, image_hash.hash.size, hash_to_bytes(image_hash)))
+            if len(self._pending) >= 500:
+                self._flush_locked()
+
+    def flush(self):
+        """提交尚未写入的哈希"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, bits, hash) VALUES (?, ?, ?, ?, ?)",
+            self._pending
+        )
+        self._connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        self._connection.commit()
+        self._pending.clear()
+
+    def quarantine(self, file_path: str, size: int, mtime_ns: int, reason: str):
+        """
+        将文件记入隔离列表
+
+        Args:
+            file_path: 文件路径
+            size: 文件大小
+            mtime_ns: 修改时间（纳秒）
+            reason: 原因
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO quarantine (path, size, mtime_ns, reason, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (file_path, size, mtime_ns, reason, time.time())
+            )
+            self._connection.commit()
+
+    def quarantine_reason(self, file_path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """
+        查询未修改文件的隔离原因
+
+        Returns:
+            Optional[str]: 文件在隔离列表中且未修改时返回原因，否则返回None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, reason FROM quarantine WHERE path = ?", (file_path,)
+            ).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        return row[2]
+
+    def quarantined(self) -> List[Tuple[str, str, float]]:
+        """
+        隔离列表
+
+        Returns:
+            List[Tuple[str, str, float]]: (路径, 原因, 记录时间)，按记录时间排序
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT path, reason, recorded_at FROM quarantine ORDER BY recorded_at"
+            ).fetchall()
+
+    def clear_quarantine(self):
+        """清空隔离列表，下次扫描时重新尝试解码"""
+        with self._lock:
+            self._connection.execute("DELETE FROM quarantine")
+            self._connection.commit()
+
+    def count(self) -> int:
+        """已索引的图片数量"""
+        with self._lock:
+            self._flush_locked()
+            return self._connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def file_table(self, bits: int = 64, mmap: bool = True) -> FileTable:
+        """
+        指定位数的全部记录组成的文件表
+
+        表保存在哈希库旁边（<哈希库>.<位数>.table）；哈希库自上次保存以来没有写入时直接载入
+        （默认内存映射），否则从 SQLite 逐行重建并保存。
+
+        Args:
+            bits: 哈希位数
+            mmap: 是否内存映射保存的表
+
+        Returns:
+            FileTable: 文件表
+        """
+        table_path = f"{self.db_path}.{bits}.table"
+        with self._lock:
+            self._flush_locked()
+            generation = self._connection.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+        try:
+            table = FileTable.load(table_path, mmap)
+            if table.generation == generation:
+                return table
+        except (OSError, ValueError):
+            pass
+
+        with self._lock:
+            # 逐行读取，不把全部记录同时放入内存
+            rows = self._connection.execute(
+                "SELECT path, size, mtime_ns, hash FROM hashes WHERE bits = ?", (bits,)
+            )
+            table = FileTable.from_records(rows, words=-(-bits // 64), generation=generation)
+        try:
+            table.save(table_path)
+        except OSError as e:
+            print(f"警告: 无法保存文件表 {table_path}: {e}")
+        return table
+
+    def close(self):
+        """提交并关闭"""
+        with self._lock:
+            self._flush_locked()
+            self._connection.close()
+
+
+class SimilarImageIndex:
+    """
+    相似图片检索索引
+
+    从 HashStore 的文件表载入，查询时对整个库向量化计算汉明距离。
+    """
+
+    def __init__(self, table: FileTable, bits: int):
+        self.table = table
+        self.bits = bits
+
+    @classmethod
+    def from_store(cls, store: HashStore, bits: int = 64, roots: Optional[List[str]] = None) -> "SimilarImageIndex":
+        """
+        从哈希库载入索引
+
+        Args:
+            store: 哈希库
+            bits: 哈希位数（只载入该位数的记录）
+            roots: 只载入这些目录下的图片，None表示整个哈希库
+
+        Returns:
+            SimilarImageIndex: 检索索引
+        """
+        table = store.file_table(bits)
+        if roots is not None:
+            table = table.subset(table.under(_root_prefixes(roots)))
+        return cls(table, bits)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def search(self, image_hash, max_distance: int, limit: int = 50,
+               exclude: Optional[str] = None) -> List[Tuple[str, int]]:
+        """
+        查找与哈希相近的图片
+
+        Args:
+            image_hash: 查询哈希
+            max_distance: 最大汉明距离
+            limit: 最多返回的结果数
+            exclude: 排除的路径（通常是查询图片自身）
+
+        Returns:
+            List[Tuple[str, int]]: 按距离升序排列的 (路径, 距离)；已删除或已修改的文件被跳过
+        """
+        if not len(self.table) or image_hash.hash.size != self.bits:
+            return []
+
+        query = np.frombuffer(hash_to_bytes(image_hash).ljust(self.table.words * 8, b"\0"), dtype=np.uint64)
+        distances = np.bitwise_count(self.table.hashes ^ query).sum(axis=1, dtype=np.uint16)
+        candidates = np.flatnonzero(distances <= max_distance)
+        # 稳定排序：距离相同时保持索引顺序
+        candidates = candidates[np.argsort(distances[candidates], kind="stable")]
+
+        matches = []
+        for index in candidates:
+            path = self.table.path(index)
+            if path == exclude or not self._is_current(index, path):
+                continue
+            matches.append((path, int(distances[index])))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def _is_current(self, index: int, path: str) -> bool:
+        """索引中的记录与磁盘上的文件是否一致"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == self.table.sizes[index] and stat.st_mtime_ns == self.table.mtimes[index]
+
+    def search_files(self, file_paths: List[str], max_distance: int, limit: int = 50,
+                     progress_callback=None, should_stop=None) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        以图搜图：计算每个查询图片的哈希并在索引中检索
+
+        Args:
+            file_paths: 查询图片路径列表
+            max_distance: 最大汉明距离
+            limit: 每个查询最多返回的结果数
+            progress_callback: 进度回调函数 callback(progress, message)
+            should_stop: 停止检查函数 should_stop() -> bool
+
+        Returns:
+            Dict[str, List[Tuple[str, int]]]: 查询图片到匹配结果的映射，只包含有匹配的查询
+        """
+        from app.core.task_executor import get_task_executor
+        from app.utils.image_utils import ImageUtils
+
+        executor = get_task_executor()
+        results = {}
+        total = len(file_paths)
+        for idx, file_path in enumerate(file_paths):
+            if should_stop and should_stop():
+                break
+            try:
+                info = ImageUtils.get_image_info(file_path)
+                with executor.decode_slot(info['decoded_bytes']):
+                    image_hash = ImageUtils.calculate_hash(file_path)
+            except Exception as e:
+                print(f"警告: 无法处理文件 {file_path}: {e}")
+                continue
+
+            matches = self.search(image_hash, max_distance, limit, exclude=file_path)
+            if matches:
+                results[file_path] = matches
+            if progress_callback:
+                progress_callback((idx + 1) / total * 100, f"检索相似图片... {idx+1}/{total}")
+        return results
@@ -3,17 +3,18 @@
 
 from __future__ import annotations
 
+import importlib.util
+import sys
 import threading
 from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-from PIL import Image, ImageFile
-from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtCore import QObject, QRunnable, QThread, QThreadPool, Qt, pyqtSignal
 from PyQt6.QtGui import QColor, QImage, QPainter, QPixmap
 
-
-ImageFile.LOAD_TRUNCATED_IMAGES = True
+from app.core.task_executor import get_task_executor
+from app.utils.image_utils import ImageUtils
 
 
 @dataclass(frozen=True)
@@ -23,72 +24,54 @@ class _CacheKey:
     path: str
     width: int
     height: int
+    dpr: float = 1.0
 
 
 class _ThumbnailTaskSignals(QObject):
     """缩略图生成任务信号"""
 
-    finished = pyqtSignal(str, int, int, object, str)
+    finished = pyqtSignal(str, int, int, float, object, str)
 
 
 class _ThumbnailTask(QRunnable):
-    """后台生成缩略图任务"""
+    """
+    后台生成缩略图任务
+
+    直接产出最终显示用的图像：按设备像素比换算物理尺寸，居中裁剪填满目标区域，
+    GUI 线程只需设置 pixmap，无需再做任何缩放。
+    """
 
-    def __init__(self, file_path: str, width: int, height: int):
+    def __init__(self, file_path: str, width: int, height: int, dpr: float = 1.0):
         super().__init__()
         self.file_path = file_path
         self.width = width
         self.height = height
+        self.dpr = dpr
         self.signals = _ThumbnailTaskSignals()
 
     def run(self):
         """执行生成逻辑"""
         try:
-            qimage = self._load_qimage(self.file_path, self.width, self.height)
-            self.signals.finished.emit(self.file_path, self.width, self.height, qimage, "")
+            # 与扫描、转换共享解码内存额度与 CPU 名额：大图不会与其他解码同时占满内存，
+            # 线程数也不超过CPU核数
+            executor = get_task_executor()
+            info = ImageUtils.get_image_info(self.file_path)
+            with executor.decode_slot(info['decoded_bytes']), executor.cpu_slot():
+                qimage = self._load_qimage(self.file_path, self.width, self.height, self.dpr)
+            self.signals.finished.emit(self.file_path, self.width, self.height, self.dpr, qimage, "")
         except Exception as exc:  # pylint: disable=broad-except
-            self.signals.finished.emit(self.file_path, self.width, self.height, None, str(exc))
+            self.signals.finished.emit(self.file_path, self.width, self.height, self.dpr, None, str(exc))
 
     @staticmethod
-    def _load_qimage(file_path: str, target_width: int, target_height: int) -> QImage:
-        """读取文件并转换为QImage"""
-        with Image.open(file_path) as img:
-            if img.width <= 0 or img.height <= 0:
-                raise ValueError("无效的图像尺寸")
-
-            # 限制极端大图到合理范围
-            max_side = max(target_width * 4, target_height * 4, 4096)
-            if img.width > max_side or img.height > max_side:
-                img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
-
-            # 统一转换到支持的模式
-            if img.mode in ("RGBA", "LA"):
-                converted = img.convert("RGBA")
-                fmt = QImage.Format.Format_RGBA8888
-                bytes_per_line = converted.width * 4
-                buffer_mode = "RGBA"
-            else:
-                converted = img.convert("RGB")
-                fmt = QImage.Format.Format_RGB888
-                bytes_per_line = converted.width * 3
-                buffer_mode = "RGB"
-
-            # 根据目标尺寸等比缩放
-            converted.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-            width, height = converted.size
-            if converted.mode == "RGBA":
-                fmt = QImage.Format.Format_RGBA8888
-                bytes_per_line = width * 4
-                buffer_mode = "RGBA"
-            else:
-                fmt = QImage.Format.Format_RGB888
-                bytes_per_line = width * 3
-                buffer_mode = "RGB"
-
-            buffer = converted.tobytes("raw", buffer_mode)
-
-        qimage = QImage(buffer, width, height, bytes_per_line, fmt)
-        return qimage.copy()
+    def _load_qimage(file_path: str, target_width: int, target_height: int, dpr: float = 1.0) -> QImage:
+        """读取文件，生成居中裁剪、已按设备像素比缩放的QImage"""
+        pixel_width = max(1, round(target_width * dpr))
+        pixel_height = max(1, round(target_height * dpr))
+
+        thumbnail = ImageUtils.get_cover_thumbnail(file_path, (pixel_width, pixel_height))
+        qimage = ImageUtils.pil_to_qimage(thumbnail)
+        qimage.setDevicePixelRatio(dpr)
+        return qimage
 
 
 class ImageCacheManager(QObject):
@@ -102,11 +85,25 @@ class ImageCacheManager(QObject):
         self._cache: "OrderedDict[_CacheKey, QPixmap]" = OrderedDict()
         self._loading: Dict[_CacheKey, int] = {}
         self._lock = threading.Lock()
-        self._thread_pool = QThreadPool.globalInstance()
-
-    def get_thumbnail_pixmap(self, file_path: str, width: int, height: int) -> Optional[QPixmap]:
-        """获取或异步生成缩略图"""
-        key = _CacheKey(file_path, width, height)
+        # 独立的线程池：请求排队在后台解码，不占用全局线程池
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(max(1, QThread.idealThreadCount() - 1))
+
+    def get_thumbnail_pixmap(self, file_path: str, width: int, height: int,
+                             dpr: float = 1.0) -> Optional[QPixmap]:
+        """
+        获取或异步生成缩略图
+
+        Args:
+            file_path: 图片路径
+            width: 逻辑宽度
+            height: 逻辑高度
+            dpr: 设备像素比，生成的图片为 width*dpr x height*dpr 像素
+
+        Returns:
+            Optional[QPixmap]: 已缓存的缩略图；尚未生成时返回None，生成后通过 thumbnail_ready 通知
+        """
+        key = _CacheKey(file_path, width, height, dpr)
 
         with self._lock:
             if key in self._cache:
@@ -118,7 +115,7 @@ class ImageCacheManager(QObject):
 
             self._loading[key] = 1
 
-        task = _ThumbnailTask(file_path, width, height)
+        task = _ThumbnailTask(file_path, width, height, dpr)
         task.signals.finished.connect(self._on_task_finished)
         self._thread_pool.start(task)
         return None
@@ -128,14 +125,15 @@ class ImageCacheManager(QObject):
         with self._lock:
             self._cache.clear()
 
-    def _on_task_finished(self, file_path: str, width: int, height: int, qimage: Optional[QImage], error: str):
-        key = _CacheKey(file_path, width, height)
+    def _on_task_finished(self, file_path: str, width: int, height: int, dpr: float,
+                          qimage: Optional[QImage], error: str):
+        key = _CacheKey(file_path, width, height, dpr)
 
         with self._lock:
             self._loading.pop(key, None)
 
         if qimage is None or qimage.isNull():
-            pixmap = self._create_placeholder(width, height, error)
+            pixmap = self._create_placeholder(width, height, dpr, error)
         else:
             pixmap = QPixmap.fromImage(qimage)
 
@@ -147,9 +145,10 @@ class ImageCacheManager(QObject):
         self.thumbnail_ready.emit(file_path, width, height, pixmap)
 
     @staticmethod
-    def _create_placeholder(width: int, height: int, error: str) -> QPixmap:
+    def _create_placeholder(width: int, height: int, dpr: float, error: str) -> QPixmap:
         """生成占位图"""
-        image = QImage(max(width, 1), max(height, 1), QImage.Format.Format_RGB32)
+        image = QImage(max(round(width * dpr), 1), max(round(height * dpr), 1), QImage.Format.Format_RGB32)
+        image.setDevicePixelRatio(dpr)
         image.fill(0xFF2D2D2D)
 
         if error:
@@ -170,3 +169,24 @@ def get_image_cache() -> ImageCacheManager:
     if _singleton_cache is None:
         _singleton_cache = ImageCacheManager()
     return _singleton_cache
+
+
+def check_thumbnail_service() -> List[str]:
+    """
+    启动自检：确认异步缩略图服务可用
+
+    不导入 Pillow（避免拖慢启动），只检查其是否可被导入。
+
+    Returns:
+        List[str]: 发现的问题，为空表示正常
+    """
+    problems = []
+    if importlib.util.find_spec("PIL") is None:
+        problems.append("未安装 Pillow，无法生成缩略图")
+    if QThread.idealThreadCount() < 1:
+        problems.append("无法确定可用的线程数")
+    # 以其他名称（如 utils.image_cache_enhanced）重复导入会产生多个缓存单例
+    for name, module in list(sys.modules.items()):
+        if name != __name__ and name.endswith("image_cache_enhanced") and module is not sys.modules[__name__]:
+            problems.append(f"缩略图缓存模块被重复导入为 {name}")
+    return problems
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+图片预取与预解码
+
+按调用方给出的优先顺序，在后台线程池中预先解码屏幕尺寸的预览图，
+结果保存在有内存上限的 LRU 缓存中。用于重复组审阅时在成员之间快速切换：
+当前图片的相邻成员、前后重复组的成员在用户切换之前已经解码完成。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from app.utils.image_utils import ImageUtils
+
+# 默认内存上限：256MB（4K 屏幕的预览图约 32MB/张）
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+
+class _PrefetchTaskSignals(QObject):
+    """预取任务信号"""
+
+    finished = pyqtSignal(str, object, str)  # (路径, QImage, 错误信息)
+
+
+class _PrefetchTask(QRunnable):
+    """后台解码一张预览图"""
+
+    def __init__(self, file_path: str, max_size: Tuple[int, int], signals: _PrefetchTaskSignals,
+                 on_start: Callable[[str], bool]):
+        super().__init__()
+        self.file_path = file_path
+        self.max_size = max_size
+        self.signals = signals
+        self.on_start = on_start
+
+    def run(self):
+        # 排队期间已不再需要时直接跳过
+        if not self.on_start(self.file_path):
+            return
+        try:
+            preview = ImageUtils.get_preview(self.file_path, self.max_size)
+            qimage = ImageUtils.pil_to_qimage(preview)
+            self.signals.finished.emit(self.file_path, qimage, "")
+        except Exception as exc:  # pylint: disable=broad-except
+            self.signals.finished.emit(self.file_path, None, str(exc))
+
+
+class ImagePrefetcher(QObject):
+    """
+    有内存上限的预览图预取器
+
+    每次调用 prefetch 给出新的期望列表（按优先级排序），未开始的旧任务被丢弃。
+    超出内存上限时优先淘汰不在期望列表中的图片；期望列表本身放不下时，
+    只保留排在前面的部分。
+    """
+
+    image_ready = pyqtSignal(str, QImage)
+    image_failed = pyqtSignal(str, str)
+
+    def __init__(self, max_size: Tuple[int, int], memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 max_workers: int = 2, parent=None):
+        super().__init__(parent)
+        self.max_size = max_size
+        self.memory_budget = memory_budget
+        self._cache: "OrderedDict[str, QImage]" = OrderedDict()
+        self._cache_bytes = 0
+        self._wanted: List[str] = []
+        self._loading: Set[str] = set()
+        self._running: Set[str] = set()
+        # 解码失败的图片及错误信息，不再重复预取
+        self._failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(max_workers)
+        self._signals = _PrefetchTaskSignals()
+        self._signals.finished.connect(self._on_task_finished)
+
+    @property
+    def cache_bytes(self) -> int:
+        """缓存占用的字节数"""
+        return self._cache_bytes
+
+    def get(self, file_path: str) -> Optional[QImage]:
+        """
+        获取已解码的预览图
+
+        Args:
+            file_path: 图片路径
+
+        Returns:
+            Optional[QImage]: 预览图，未解码完成时返回None
+        """
+        with self._lock:
+            image = self._cache.get(file_path)
+            if image is not None:
+                self._cache.move_to_end(file_path)
+            return image
+
+    def failure(self, file_path: str) -> Optional[str]:
+        """
+        查询图片的预取是否已失败
+
+        Args:
+            file_path: 图片路径
+
+        Returns:
+            Optional[str]: 失败时返回错误信息，否则返回None
+        """
+        with self._lock:
+            return self._failed.get(file_path)
+
+    def prefetch(self, file_paths: List[str]):
+        """
+        设置期望预取的图片列表（排在前面的优先解码）
+
+        Args:
+            file_paths: 图片路径列表
+        """
+        # 去重并保持顺序
+        wanted = list(dict.fromkeys(file_paths))
+        # 丢弃尚未开始的旧任务；正在执行的任务完成后按期望列表决定是否保留
+        self._thread_pool.clear()
+        with self._lock:
+            self._wanted = wanted
+            self._loading = set(self._running)
+        self._schedule()
+
+    def clear(self):
+        """停止预取并释放缓存"""
+        with self._lock:
+            self._wanted = []
+            self._cache.clear()
+            self._cache_bytes = 0
+            self._failed.clear()
+        self._thread_pool.clear()
+        with self._lock:
+            self._loading = set(self._running)
+
+    def _schedule(self):
+        """按优先级提交尚未缓存的图片，预计占用超出内存上限时停止"""
+        with self._lock:
+            budget = self.memory_budget
+            for file_path in self._wanted:
+                image = self._cache.get(file_path)
+                if image is not None:
+                    budget -= image.sizeInBytes()
+                    continue
+                # 未解码的图片按预览图上限估算占用
+                budget -= self.max_size[0] * self.max_size[1] * 4
+                if budget < 0:
+                    break
+                if file_path in self._loading or file_path in self._failed:
+                    continue
+                self._loading.add(file_path)
+                self._thread_pool.start(_PrefetchTask(file_path, self.max_size, self._signals, self._on_task_started))
+
+    def _on_task_started(self, file_path: str) -> bool:
+        """任务开始执行时调用（工作线程），返回是否仍需要解码"""
+        with self._lock:
+            if file_path not in self._wanted:
+                self._loading.discard(file_path)
+                return False
+            self._running.add(file_path)
+            return True
+
+    def _on_task_finished(self, file_path: str, qimage: Optional[QImage], error: str):
+        with self._lock:
+            self._running.discard(file_path)
+            self._loading.discard(file_path)
+        if qimage is None or qimage.isNull():
+            with self._lock:
+                self._failed[file_path] = error
+            self.image_failed.emit(file_path, error)
+            return
+
+        with self._lock:
+            if file_path not in self._wanted:
+                return
+            if file_path not in self._cache:
+                self._cache[file_path] = qimage
+                self._cache_bytes += qimage.sizeInBytes()
+            self._evict()
+            kept = file_path in self._cache
+
+        if kept:
+            self.image_ready.emit(file_path, qimage)
+        # 实际占用可能小于估算，继续提交排在后面的图片
+        self._schedule()
+
+    def _evict(self):
+        """淘汰缓存直到不超过内存上限：先淘汰不需要的，再淘汰优先级最低的"""
+        priority = {path: index for index, path in enumerate(self._wanted)}
+        while self._cache_bytes > self.memory_budget and self._cache:
+            unwanted = next((path for path in self._cache if path not in priority), None)
+            victim = unwanted or max(self._cache, key=lambda path: priority[path])
+            self._cache_bytes -= self._cache.pop(victim).sizeInBytes()
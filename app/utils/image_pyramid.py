@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+图片金字塔（多级纹理 / 瓦片）
+
+用于查看超大图片：先解码屏幕尺寸的预览图，再在后台解码一次并逐级对半缩小
+生成金字塔。显示时只取可见区域、最接近当前缩放比例的层级中的瓦片，不再对
+整张大图做缩放。
+
+解码经过任务执行服务的解码内存额度（decode_slot）。打开文件时在当前线程内跳过
+Pillow 的像素数检查（ImageUtils.unlimited_pixels），可以查看超过完整解码上限的图片；
+全部层级超出解码内存预算时，最底层按 2 的整数倍缩小（JPEG 直接 draft() 缩小解码），
+保留的内存不超过预算。
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from app.core.task_executor import get_task_executor
+from app.utils.image_utils import Image, ImageUtils
+
+# 瓦片边长（像素）
+TILE_SIZE = 256
+
+
+class ImagePyramid:
+    """
+    图片金字塔
+
+    层级 0 为原图（超出解码内存预算时为按 base_factor 缩小的图），其上每层对半缩小，
+    最顶层不大于一个瓦片。线程安全：build 在后台线程执行，完成前 is_ready 为 False。
+    """
+
+    def __init__(self, file_path: str, tile_size: int = TILE_SIZE):
+        self.file_path = file_path
+        self.tile_size = tile_size
+        self.base_factor = 1
+        self._levels: List[Image.Image] = []
+        self._lock = threading.Lock()
+
+        # 只读取文件头获取尺寸
+        with ImageUtils.unlimited_pixels():
+            info = ImageUtils.get_image_info(file_path)
+        if info.get('error'):
+            raise ValueError(info['error'])
+        self.width, self.height = info['width'], info['height']
+        self.mode = info['mode']
+        self.decoded_bytes = info['decoded_bytes']
+
+    @property
+    def is_ready(self) -> bool:
+        """金字塔是否已生成"""
+        return bool(self._levels)
+
+    @property
+    def level_count(self) -> int:
+        """层级数量（生成前为0）"""
+        return len(self._levels)
+
+    def load_preview(self, max_size: Tuple[int, int]) -> Image.Image:
+        """
+        解码屏幕尺寸的预览图
+
+        Args:
+            max_size: 最大像素尺寸
+
+        Returns:
+            Image.Image: 预览图
+        """
+        with get_task_executor().decode_slot(self.decoded_bytes), ImageUtils.unlimited_pixels():
+            return ImageUtils.get_preview(self.file_path, max_size, max_pixels=None)
+
+    def _base_factor(self, budget: int) -> int:
+        """使全部层级（约为最底层的 4/3）不超过预算的最底层缩小倍数（2 的整数次幂）"""
+        factor = 1
+        while factor < max(self.width, self.height) and ImageUtils.decoded_bytes(
+                math.ceil(self.width / factor), math.ceil(self.height / factor), "RGBA") * 4 // 3 > budget:
+            factor *= 2
+        return factor
+
+    def build(self, should_stop: Optional[Callable[[], bool]] = None, budget: Optional[int] = None) -> bool:
+        """
+        解码原图并生成各层级
+
+        Args:
+            should_stop: 停止检查函数，返回True时中止（在打开、解码、转换前后与每次缩小之间检查）
+            budget: 全部层级的内存上限（字节），默认为解码内存预算
+
+        Returns:
+            bool: 是否生成完成
+        """
+        def stopped() -> bool:
+            return bool(should_stop and should_stop())
+
+        executor = get_task_executor()
+        factor = self._base_factor(budget or executor.decode_budget)
+        base_size = (max(1, math.ceil(self.width / factor)), max(1, math.ceil(self.height / factor)))
+        if stopped():
+            return False
+
+        with ImageUtils.unlimited_pixels(), Image.open(self.file_path) as img:
+            if img.format == "JPEG" and factor > 1:
+                # 在解码时按 1/2、1/4、1/8 缩小，不产生原尺寸的位图
+                img.draft(None, base_size)
+            if stopped():
+                return False
+            mode = "RGBA" if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info else "RGB"
+            # 不限制像素数，但无法缩小解码的格式按原尺寸解码后超出解码内存预算时拒绝
+            ImageUtils.limit_decode(img, base_size, max_pixels=None, max_bytes=executor.decode_budget, mode=mode)
+            with executor.decode_slot(ImageUtils.decoded_bytes(img.width, img.height, mode)):
+                if stopped():
+                    return False
+                img.load()
+                if stopped():
+                    return False
+                level = img.convert(mode) if img.mode != mode else img
+                # 其他格式无法缩小解码，解码后立即缩小到预算内的尺寸
+                remaining = max(1, round(level.width / base_size[0]))
+                if remaining > 1:
+                    level = level.reduce(remaining)
+                elif level is img:
+                    level = img.copy()
+        if stopped():
+            return False
+        self.base_factor = factor
+
+        levels = [level]
+        while max(level.size) > self.tile_size:
+            if should_stop and should_stop():
+                return False
+            level = level.reduce(2)
+            levels.append(level)
+
+        with self._lock:
+            self._levels = levels
+        return True
+
+    def level_for_scale(self, scale: float) -> int:
+        """
+        选择与缩放比例最接近、且分辨率不低于显示需要的层级
+
+        Args:
+            scale: 显示缩放比例（屏幕像素 / 原图像素）
+
+        Returns:
+            int: 层级编号
+        """
+        level = 0
+        for index in range(1, len(self._levels)):
+            if self.level_factor(index) <= 1.0 / scale:
+                level = index
+        return level
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        """层级的像素尺寸"""
+        return self._levels[level].size
+
+    def level_factor(self, level: int) -> float:
+        """层级相对原图的缩小倍数（按宽度计算，处理奇数尺寸的取整）"""
+        return self.width / self._levels[level].width
+
+    def tile_grid(self, level: int) -> Tuple[int, int]:
+        """
+        层级的瓦片行列数
+
+        Returns:
+            Tuple[int, int]: (列数, 行数)
+        """
+        width, height = self.level_size(level)
+        return math.ceil(width / self.tile_size), math.ceil(height / self.tile_size)
+
+    def tile_rect(self, level: int, col: int, row: int) -> Tuple[int, int, int, int]:
+        """
+        瓦片在层级坐标中的区域
+
+        Returns:
+            Tuple[int, int, int, int]: (left, top, right, bottom)
+        """
+        width, height = self.level_size(level)
+        left = col * self.tile_size
+        top = row * self.tile_size
+        return left, top, min(left + self.tile_size, width), min(top + self.tile_size, height)
+
+    def tile(self, level: int, col: int, row: int) -> Image.Image:
+        """
+        获取一个瓦片
+
+        Args:
+            level: 层级
+            col: 列号
+            row: 行号
+
+        Returns:
+            Image.Image: 瓦片图像
+        """
+        with self._lock:
+            source = self._levels[level]
+        return source.crop(self.tile_rect(level, col, row))
@@ -3,20 +3,65 @@
 图片处理工具
 """
 
+from __future__ import annotations
+
+import io
+import math
 import os
-from typing import List, Tuple, Dict
-from PIL import Image, ImageFile
-import imagehash
-import numpy as np
+import threading
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple, Dict, Optional
+from app.utils.lazy_import import lazy_module
+from app.utils.scan_metrics import ScanMetrics
+from app.utils.candidate_pairs import CandidatePairs, distance_for_threshold
+from app.core.task_executor import IO_POOL, get_task_executor
+from app.utils.read_ahead import MemoryReader, ReadBuffer
+from app.utils.dir_walker import DirectoryWalker
+from app.utils.isolated_decoder import DecodeIsolationError
+
+
+# 当前线程是否跳过 Pillow 的像素数检查（见 ImageUtils.unlimited_pixels）
+_pixel_check = threading.local()
+
+
+def _init_pil(image_module):
+    """Pillow 首次导入时的初始化"""
+    # 设置图像加载限制，防止DOS攻击：超过上限时 Pillow 发出警告，超过两倍时拒绝打开
+    image_module.MAX_IMAGE_PIXELS = MAX_DECODE_PIXELS
+
+    # 按解码内存预算缩小解码的路径（查看器的图片金字塔）可以在当前线程内临时跳过检查，
+    # 其他线程中的 Image.open 不受影响
+    bomb_check = image_module._decompression_bomb_check
+
+    def _decompression_bomb_check(size):
+        if not getattr(_pixel_check, "lifted", False):
+            bomb_check(size)
 
-# 尝试导入AVIF支持
-try:
-    import pillow_avif
-except ImportError:
-    pass  # 如果没有安装AVIF插件，继续运行但不支持AVIF
+    image_module._decompression_bomb_check = _decompression_bomb_check
 
-# 设置图像加载限制，防止DOS攻击
-Image.MAX_IMAGE_PIXELS = 178956970  # 默认限制
+    # 允许加载截断的图像
+    from PIL import ImageFile
+    ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+    # 尝试导入AVIF支持
+    try:
+        import pillow_avif
+    except ImportError:
+        pass  # 如果没有安装AVIF插件，继续运行但不支持AVIF
+
+
+# 完整解码的像素数上限，防止DOS攻击
+MAX_DECODE_PIXELS = 178956970
+
+# 发现文件时每批按尺寸过滤的文件数
+_DIMENSION_FILTER_BATCH = 10000
+
+# Pillow 与 imagehash（依赖 numpy/scipy/PyWavelets）在首次使用时才导入，避免拖慢启动
+Image = lazy_module("PIL.Image", on_load=_init_pil)
+ImageFile = lazy_module("PIL.ImageFile")
+ExifTags = lazy_module("PIL.ExifTags")
+imagehash = lazy_module("imagehash")
 
 
 class ImageUtils:
@@ -25,53 +70,164 @@ class ImageUtils:
     """
 
     @staticmethod
-    def get_image_files(path: str, include_subdirs: bool = True, progress_callback=None) -> List[str]:
+    @contextmanager
+    def unlimited_pixels():
+        """
+        在当前线程内跳过 Pillow 的像素数检查
+
+        只用于按解码内存预算缩小解码、不会按原尺寸无限制分配内存的路径（如 ImagePyramid）。
+        """
+        previous = getattr(_pixel_check, "lifted", False)
+        _pixel_check.lifted = True
+        try:
+            yield
+        finally:
+            _pixel_check.lifted = previous
+
+    @staticmethod
+    def get_image_files(path: str, include_subdirs: bool = True, progress_callback=None,
+                        should_stop=None, metrics: Optional[ScanMetrics] = None,
+                        discovery_filter=None) -> List[str]:
         """
         获取目录中的所有图片文件
 
+        子目录在 IO 池中并行列出，结果按先序（同级按名称）排列。
+
         Args:
             path: 目录路径
             include_subdirs: 是否包含子目录
             progress_callback: 进度回调函数 callback(count) 每找到一个文件调用
+            should_stop: 停止检查函数 should_stop() -> bool
+            metrics: 可选的扫描指标收集器
+            discovery_filter: 可选的过滤规则（DiscoveryFilter），匹配排除规则的目录不再遍历
 
         Returns:
             List[str]: 图片文件路径列表
         """
+        return list(ImageUtils.iter_image_files(path, include_subdirs, progress_callback, should_stop,
+                                                metrics, discovery_filter))
+
+    @staticmethod
+    def iter_image_files(path: str, include_subdirs: bool = True, progress_callback=None,
+                         should_stop=None, metrics: Optional[ScanMetrics] = None,
+                         discovery_filter=None) -> Iterator[str]:
+        """
+        逐个产出目录中的图片文件（参数与顺序同 get_image_files），不在内存中保留完整列表
+
+        Returns:
+            Iterator[str]: 图片文件路径
+        """
         image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp', '.avif'}
-        image_files = []
 
         if os.path.isfile(path):
             if os.path.splitext(path)[1].lower() in image_extensions:
-                image_files.append(path)
                 if progress_callback:
                     progress_callback(1)
+                yield path
         elif os.path.isdir(path):
-            if include_subdirs:
-                for root, _, files in os.walk(path):
-                    for file in files:
-                        if os.path.splitext(file)[1].lower() in image_extensions:
-                            image_files.append(os.path.join(root, file))
-                            # 每找到一个文件就回调一次
-                            if progress_callback:
-                                progress_callback(len(image_files))
-            else:
-                for file in os.listdir(path):
-                    file_path = os.path.join(path, file)
-                    if os.path.isfile(file_path) and os.path.splitext(file)[1].lower() in image_extensions:
-                        image_files.append(file_path)
-                        # 每找到一个文件就回调一次
-                        if progress_callback:
-                            progress_callback(len(image_files))
+            walker = DirectoryWalker(
+                max_depth=None if include_subdirs else 0,
+                with_stat=discovery_filter is not None and discovery_filter.needs_stat,
+                exclude=discovery_filter.is_excluded if discovery_filter is not None else None,
+                metrics=metrics
+            )
+            found = 0
+            # 尺寸过滤需要读取文件头，按批在 IO 池中并行进行
+            batch = []
+            for entry in walker.files(path, should_stop):
+                if os.path.splitext(entry.name)[1].lower() in image_extensions:
+                    if discovery_filter is not None and not discovery_filter.accepts_entry(entry):
+                        if metrics:
+                            metrics.add("files_filtered")
+                        continue
+                    found += 1
+                    # 每找到一个文件就回调一次
+                    if progress_callback:
+                        progress_callback(found)
+                    if discovery_filter is None:
+                        yield entry.path
+                        continue
+                    batch.append(entry.path)
+                    if len(batch) >= _DIMENSION_FILTER_BATCH:
+                        yield from discovery_filter.filter_dimensions(batch, should_stop, metrics)
+                        batch = []
+
+            if batch:
+                yield from discovery_filter.filter_dimensions(batch, should_stop, metrics)
+
+    @staticmethod
+    def normalize_roots(paths: List[str]) -> List[str]:
+        """
+        规范化扫描路径
+
+        解析符号链接得到真实路径，去除重复的路径以及被其他路径包含的子路径，
+        避免同一文件被多个扫描路径重复收集。
+
+        Args:
+            paths: 扫描路径列表
+
+        Returns:
+            List[str]: 规范化后的路径列表（保持原有顺序）
+        """
+        resolved = []
+        for path in paths:
+            real = os.path.realpath(path)
+            if real not in resolved:
+                resolved.append(real)
+
+        def contains(parent: str, child: str) -> bool:
+            if parent == child or not os.path.isdir(parent):
+                return False
+            try:
+                return os.path.normcase(os.path.commonpath([parent, child])) == os.path.normcase(parent)
+            except ValueError:  # 不同驱动器
+                return False
+
+        return [path for path in resolved if not any(contains(other, path) for other in resolved)]
+
+    @staticmethod
+    def unique_physical_files(image_files: List[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        按 (st_dev, st_ino) 去除指向同一物理文件的路径（硬链接、符号链接）
+
+        Args:
+            image_files: 图片文件路径列表
+
+        Returns:
+            Tuple[List[str], Dict[str, List[str]]]: (每个物理文件保留第一个路径的列表,
+                保留路径 -> 被跳过的其他路径)
+        """
+        unique = []
+        aliases: Dict[str, List[str]] = {}
+        seen: Dict[Tuple[int, int], str] = {}
+        for file_path in image_files:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                unique.append(file_path)
+                continue
+
+            # 部分文件系统不提供 inode 编号（为0），无法判断是否为同一文件
+            if not stat.st_ino:
+                unique.append(file_path)
+                continue
 
-        return image_files
+            key = (stat.st_dev, stat.st_ino)
+            if key in seen:
+                aliases.setdefault(seen[key], []).append(file_path)
+            else:
+                seen[key] = file_path
+                unique.append(file_path)
+        return unique, aliases
 
     @staticmethod
-    def calculate_hash(file_path: str) -> imagehash.ImageHash:
+    def calculate_hash(file_path: str, data=None) -> imagehash.ImageHash:
         """
         计算图片哈希值
 
         Args:
             file_path: 图片文件路径
+            data: 可选的已读入内存的文件内容，提供时不再读取文件
 
         Returns:
             imagehash.ImageHash: 图片哈希值
@@ -80,19 +236,18 @@ class ImageUtils:
             # 设置加载截断处理，避免因截断图像导致的错误
             ImageFile.LOAD_TRUNCATED_IMAGES = True
             
-            with Image.open(file_path) as img:
-                # 检查图像尺寸是否超过限制
-                if img.width * img.height > Image.MAX_IMAGE_PIXELS:
-                    raise Exception(f"图像尺寸过大 ({img.width}x{img.height}={img.width * img.height} pixels)，超过限制 {Image.MAX_IMAGE_PIXELS} pixels")
-                
-                # 调整图像大小以提高处理速度并减少内存使用
+            with Image.open(MemoryReader(data) if data is not None else file_path) as img:
+                # 调整图像大小以提高处理速度并减少内存使用：thumbnail 先对 JPEG 使用 draft()
+                # 缩放解码，其他格式解码后立即 reduce() 整数倍缩小，再做 LANCZOS 重采样
                 max_dimension = 512
+                # 超过像素数上限或解码内存预算的图片：JPEG 缩小解码，其他格式拒绝
+                ImageUtils.limit_decode(img, (max_dimension * 2, max_dimension * 2))
                 if img.width > max_dimension or img.height > max_dimension:
-                    img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+                    img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS, reducing_gap=2.0)
                     
                 return imagehash.phash(img)
         except Exception as e:
-            raise Exception(f"计算图片哈希值失败: {file_path}, 错误: {str(e)}")
+            raise Exception(f"计算图片哈希值失败: {file_path}, 错误: {str(e)}") from e
 
     @staticmethod
     def calculate_similarity(hash1: imagehash.ImageHash, hash2: imagehash.ImageHash) -> float:
@@ -113,7 +268,8 @@ class ImageUtils:
         return similarity
 
     @staticmethod
-    def find_duplicates(image_files: List[str], threshold: float = 0.95, progress_callback=None, should_stop=None) -> Dict[str, List[str]]:
+    def find_duplicates(image_files: List[str], threshold: float = 0.95, progress_callback=None, should_stop=None,
+                        metrics: Optional[ScanMetrics] = None) -> Dict[str, List[str]]:
         """
         查找重复图片
 
@@ -122,6 +278,7 @@ class ImageUtils:
             threshold: 相似度阈值
             progress_callback: 进度回调函数 callback(progress, message)
             should_stop: 停止检查函数 should_stop() -> bool
+            metrics: 可选的扫描指标收集器
 
         Returns:
             Dict[str, List[str]]: 重复图片组，键为主图片路径，值为相似图片路径列表
@@ -129,69 +286,311 @@ class ImageUtils:
         if len(image_files) < 2:
             return {}
 
+        hashes = ImageUtils.compute_hashes(image_files, progress_callback, should_stop, metrics)
+        if not hashes or (should_stop and should_stop()):
+            return {}
+
+        # 阶段2: 查找重复项 (70% - 100%)
+        return ImageUtils.group_duplicates(hashes, threshold, progress_callback, should_stop, metrics)
+
+    @staticmethod
+    def find_duplicates_external(image_files: Iterable[str], finder, progress_callback=None, should_stop=None,
+                                 **hash_options) -> Iterator[Tuple[str, List[str]]]:
+        """
+        外存去重：分块计算哈希并写入 finder，再流式产出重复组
+
+        内存中同时只有一块文件的路径与哈希（块大小由 finder 的内存预算决定）。
+
+        Args:
+            image_files: 图片文件路径（列表或 PathSpool 等支持 len() 的可迭代对象，按顺序读取一次）
+            finder: 外存去重器（ExternalDuplicateFinder）
+            progress_callback: 进度回调函数 callback(progress, message)
+            should_stop: 停止检查函数 should_stop() -> bool
+            **hash_options: 传给 compute_hashes 的其他参数（metrics、store、scheduler 等）
+
+        Returns:
+            Iterator[Tuple[str, List[str]]]: (主图片路径, 相似图片路径列表)，与 group_duplicates 的结果相同
+        """
         total_files = len(image_files)
+        chunk_size = finder.chunk_files
+        paths = iter(image_files)
+        offset = 0
+        while True:
+            chunk = list(islice(paths, chunk_size))
+            if not chunk:
+                break
+
+            def chunk_progress(progress, message, offset=offset, size=len(chunk)):
+                if progress_callback:
+                    done = offset + (progress - 40) / 30 * size
+                    progress_callback(40 + done / total_files * 30, f"计算图片哈希值... {int(done)}/{total_files}")
 
-        # 阶段1: 计算所有图片的哈希值 (40% - 70%)
-        hashes = {}
-        for idx, file_path in enumerate(image_files):
-            # 检查是否需要停止
+            finder.add_many(ImageUtils.compute_hashes(chunk, chunk_progress, should_stop, **hash_options))
             if should_stop and should_stop():
-                return {}
+                return
+            offset += len(chunk)
 
-            try:
-                hashes[file_path] = ImageUtils.calculate_hash(file_path)
+        metrics = hash_options.get('metrics')
+        if metrics:
+            metrics.set_phase_items("hashing", total_files)
+        yield from finder.groups(progress_callback, should_stop)
+
+    @staticmethod
+    def compute_hashes(image_files: List[str], progress_callback=None, should_stop=None,
+                       metrics: Optional[ScanMetrics] = None, store=None,
+                       scheduler=None, read_ahead=None, decoder=None) -> Dict[str, imagehash.ImageHash]:
+        """
+        计算所有图片的哈希值（进度范围 40-70）
+
+        Args:
+            image_files: 图片文件路径列表
+            progress_callback: 进度回调函数 callback(progress, message)
+            should_stop: 停止检查函数 should_stop() -> bool
+            metrics: 可选的扫描指标收集器
+            store: 可选的持久化哈希库（HashStore），未修改的文件直接复用已保存的哈希
+            scheduler: 可选的读取调度器（IOScheduler），按存储特性安排读取顺序与预读
+            read_ahead: 可选的预读器（ReadAheadReader），在 IO 池中提前把文件读入内存，
+                从内存解码；与 scheduler 同时提供时只使用其安排的读取顺序
+            decoder: 可选的隔离解码进程池（IsolatedDecoder），在工作进程中限时解码；
+                超时、崩溃或超出内存的文件记入哈希库的隔离列表，未修改前不再尝试
+
+        Returns:
+            Dict[str, imagehash.ImageHash]: 文件路径到哈希值的映射（按扫描顺序），无法处理的文件被跳过
+        """
+        total_files = len(image_files)
+        hashes = {}
+        stats = {}
+        processed = 0
+
+        def report():
+            if progress_callback:
+                progress = 40 + processed / total_files * 30  # 40-70%
+                progress_callback(progress, f"计算图片哈希值... {processed}/{total_files}")
+
+        def record_failure(file_path, error):
+            if metrics:
+                metrics.record_failure(file_path, error)
+            else:
+                print(f"警告: 无法处理文件 {file_path}: {error}")
+
+        # 解码与转换、缩略图共享 CPU 名额
+        executor = get_task_executor()
+        with metrics.phase("hashing") if metrics else nullcontext():
+            # 先复用哈希库中未修改文件的哈希，只读取需要计算的文件
+            pending = []
+            for file_path in image_files:
+                if store is None:
+                    pending.append(file_path)
+                    continue
+                if should_stop and should_stop():
+                    break
+                try:
+                    stat = os.stat(file_path)
+                except OSError as e:
+                    record_failure(file_path, e)
+                    processed += 1
+                    continue
+                reason = store.quarantine_reason(file_path, stat.st_size, stat.st_mtime_ns)
+                if reason is not None:
+                    record_failure(file_path, DecodeIsolationError(f"已隔离: {reason}"))
+                    if metrics:
+                        metrics.add("quarantine_skipped")
+                    processed += 1
+                    continue
+                image_hash = store.get(file_path, stat.st_size, stat.st_mtime_ns)
+                if metrics:
+                    metrics.record_cache("hash_store", image_hash is not None)
+                if image_hash is None:
+                    stats[file_path] = stat
+                    pending.append(file_path)
+                else:
+                    hashes[file_path] = image_hash
+                    processed += 1
+                    report()
+
+            if read_ahead is not None:
+                read_order = [path for path, _ in scheduler.plan(pending)] if scheduler is not None else pending
+                sources = read_ahead.iterate(read_order, should_stop)
+            else:
+                read_order = scheduler.iterate(pending, should_stop) if scheduler is not None else pending
+                sources = (ReadBuffer(file_path) for file_path in read_order)
+
+            def hash_source(source):
+                """解码一个文件并计算哈希，结束时归还预读缓冲区"""
+                with source:
+                    if source.error is not None:
+                        raise source.error
+                    # 先只读取文件头估算解码内存，在途解码的总内存不超过预算
+                    info = ImageUtils.get_image_info(source.path, source.data)
+                    with executor.decode_slot(info['decoded_bytes']), executor.cpu_slot():
+                        if decoder is not None:
+                            return decoder.calculate_hash(source.path, source.data), len(source.data or b"")
+                        return ImageUtils.calculate_hash(source.path, source.data), len(source.data or b"")
+
+            def outcomes():
+                """按读取顺序产出 (文件路径, (哈希, 读入的字节数), 异常)"""
+                if decoder is None:
+                    for source in sources:
+                        try:
+                            yield source.path, hash_source(source), None
+                        except Exception as e:
+                            yield source.path, None, e
+                    return
+                # 隔离解码时各工作进程同时解码，IO 线程只负责等待结果
+                for source, future in executor.map(IO_POOL, hash_source, sources, name="decode",
+                                                   window=decoder.workers):
+                    error = future.exception()
+                    yield source.path, None if error else future.result(), error
+
+            for file_path, result, error in outcomes():
+                # 检查是否需要停止
+                if should_stop and should_stop():
+                    break
+
+                processed += 1
+                stat = stats.get(file_path)
+                try:
+                    if error is not None:
+                        raise error
+                    image_hash, length = result
+                    hashes[file_path] = image_hash
+
+                    if store is not None:
+                        store.put(file_path, stat.st_size, stat.st_mtime_ns, image_hash)
+                    if metrics:
+                        metrics.add("files_hashed")
+                        metrics.add("bytes_read", length or (stat.st_size if stat else os.path.getsize(file_path)))
+                except DecodeIsolationError as e:
+                    # 超时、崩溃或超出内存的文件记入隔离列表，未修改前不再尝试
+                    record_failure(file_path, e)
+                    if store is not None:
+                        store.quarantine(file_path, stat.st_size, stat.st_mtime_ns, str(e))
+                    if metrics:
+                        metrics.add("files_quarantined")
+                except Exception as e:
+                    record_failure(file_path, e)
 
                 # 更新进度
-                if progress_callback:
-                    progress = 40 + (idx + 1) / total_files * 30  # 40-70%
-                    progress_callback(progress, f"计算图片哈希值... {idx+1}/{total_files}")
+                report()
 
-            except Exception as e:
-                print(f"警告: 无法处理文件 {file_path}: {e}")
+        if store is not None:
+            store.flush()
+        if metrics:
+            metrics.set_phase_items("hashing", total_files)
+        if store is not None or scheduler is not None:
+            # 读取顺序可能与扫描顺序不同，分组依赖扫描顺序
+            hashes = {file_path: hashes[file_path] for file_path in image_files if file_path in hashes}
+        return hashes
 
-        if not hashes:
-            return {}
+    @staticmethod
+    def group_duplicates(hashes: Dict[str, imagehash.ImageHash], threshold: float = 0.95,
+                         progress_callback=None, should_stop=None,
+                         metrics: Optional[ScanMetrics] = None) -> Dict[str, List[str]]:
+        """
+        根据已计算的哈希值对图片分组
 
-        # 阶段2: 查找重复项 (70% - 100%)
-        duplicates = {}
-        processed = set()
-        hash_items = list(hashes.items())
-        total_comparisons = len(hash_items)
+        Args:
+            hashes: 文件路径到哈希值的映射（按扫描顺序）
+            threshold: 相似度阈值
+            progress_callback: 进度回调函数 callback(progress, message)，进度范围 70-100
+            should_stop: 停止检查函数 should_stop() -> bool
+            metrics: 可选的扫描指标收集器
 
-        for i, (file1, hash1) in enumerate(hash_items):
-            # 检查是否需要停止
-            if should_stop and should_stop():
-                return duplicates
+        Returns:
+            Dict[str, List[str]]: 重复图片组，键为主图片路径，值为相似图片路径列表
+        """
+        candidates = ImageUtils.build_candidate_pairs(hashes, threshold, progress_callback, should_stop, metrics)
+        if candidates is None:
+            return {}
+        return candidates.group(threshold)
 
-            if file1 in processed:
-                continue
+    @staticmethod
+    def match_reference(hashes: Dict[str, imagehash.ImageHash], reference_index, threshold: float = 0.95,
+                        progress_callback=None, should_stop=None,
+                        metrics: Optional[ScanMetrics] = None) -> Dict[str, List[str]]:
+        """
+        参考图库模式：只比较 待查图片之间 以及 待查图片与参考图库之间 的图片对
 
-            group = [file1]
-            processed.add(file1)
+        待查图片先按阈值贪心分组；组内任一成员与参考图库中的图片相似时，
+        以距离最近的参考图片作为主图片（保留），整组待查图片作为重复项。
+        参考图库内部的图片对不参与比较。
 
-            for file2, hash2 in hash_items[i+1:]:
-                if file2 in processed:
+        Args:
+            hashes: 待查图片路径到哈希值的映射（按扫描顺序）
+            reference_index: 参考图库的检索索引（SimilarImageIndex）
+            threshold: 相似度阈值
+            progress_callback: 进度回调函数 callback(progress, message)，进度范围 70-100
+            should_stop: 停止检查函数 should_stop() -> bool
+            metrics: 可选的扫描指标收集器
+
+        Returns:
+            Dict[str, List[str]]: 重复图片组，键为主图片路径（参考图片或待查图片），值为待查图片路径列表
+        """
+        candidates = ImageUtils.build_candidate_pairs(hashes, threshold, None, should_stop, metrics)
+        if candidates is None:
+            return {}
+        query_groups = candidates.group(threshold)
+
+        duplicates: Dict[str, List[str]] = {}
+        grouped = {file_path for files in query_groups.values() for file_path in files}
+        total = len(hashes)
+        max_distance = distance_for_threshold(threshold, reference_index.bits)
+        with metrics.phase("reference_matching") if metrics else nullcontext():
+            for idx, file_path in enumerate(hashes):
+                if should_stop and should_stop():
+                    return duplicates
+                if file_path in grouped:
                     continue
 
-                try:
-                    similarity = ImageUtils.calculate_similarity(hash1, hash2)
-                    if similarity >= threshold:
-                        group.append(file2)
-                        processed.add(file2)
-                except Exception as e:
-                    print(f"警告: 比较文件时出错 {file1} 和 {file2}: {e}")
+                members = [file_path] + query_groups.get(file_path, [])
+                best = None
+                for member in members:
+                    found = reference_index.search(hashes[member], max_distance, limit=1, exclude=member)
+                    if found and (best is None or found[0][1] < best[1]):
+                        best = found[0]
 
-            # 如果组中有多个文件，则认为是重复项
-            if len(group) > 1:
-                duplicates[group[0]] = group[1:]
+                if best is not None:
+                    duplicates.setdefault(best[0], []).extend(members)
+                elif len(members) > 1:
+                    duplicates[members[0]] = members[1:]
 
-            # 更新进度
-            if progress_callback:
-                progress = 70 + (i + 1) / total_comparisons * 30  # 70-100%
-                progress_callback(progress, f"查找重复项... {i+1}/{total_comparisons}")
+                if progress_callback:
+                    progress = 70 + (idx + 1) / total * 30  # 70-100%
+                    progress_callback(progress, f"与参考图库比较... {idx+1}/{total}")
 
+        if metrics:
+            metrics.set_phase_items("reference_matching", total)
+            metrics.add("comparisons", total * len(reference_index))
         return duplicates
 
+    @staticmethod
+    def build_candidate_pairs(hashes: Dict[str, imagehash.ImageHash], min_threshold: float,
+                              progress_callback=None, should_stop=None,
+                              metrics: Optional[ScanMetrics] = None) -> Optional[CandidatePairs]:
+        """
+        计算相似度不低于 min_threshold 的全部候选对，供之后按任意更高阈值重新分组
+
+        Args:
+            hashes: 文件路径到哈希值的映射（按扫描顺序）
+            min_threshold: 保留候选对的最低相似度
+            progress_callback: 进度回调函数 callback(progress, message)，进度范围 70-100
+            should_stop: 停止检查函数 should_stop() -> bool
+            metrics: 可选的扫描指标收集器
+
+        Returns:
+            Optional[CandidatePairs]: 候选对索引，被停止时返回None
+        """
+        with metrics.phase("comparison") if metrics else nullcontext():
+            candidates = CandidatePairs.from_hashes(hashes)
+            completed = candidates.build(min_threshold, progress_callback, should_stop)
+        if not completed:
+            return None
+        if metrics:
+            metrics.set_phase_items("comparison", len(hashes))
+            metrics.add("comparisons", candidates.comparisons)
+            metrics.add("candidate_pairs", candidates.pair_count)
+        return candidates
+
     @staticmethod
     def get_thumbnail(file_path: str, size: Tuple[int, int] = (100, 100)) -> Image.Image:
         """
@@ -210,8 +609,8 @@ class ImageUtils:
             
             with Image.open(file_path) as img:
                 # 检查图像尺寸是否超过限制
-                if img.width * img.height > Image.MAX_IMAGE_PIXELS:
-                    raise Exception(f"图像尺寸过大 ({img.width}x{img.height}={img.width * img.height} pixels)，超过限制 {Image.MAX_IMAGE_PIXELS} pixels")
+                if img.width * img.height > MAX_DECODE_PIXELS:
+                    raise Exception(f"图像尺寸过大 ({img.width}x{img.height}={img.width * img.height} pixels)，超过限制 {MAX_DECODE_PIXELS} pixels")
                 
                 img.thumbnail(size, Image.Resampling.LANCZOS)
                 return img.copy()
@@ -219,6 +618,199 @@ class ImageUtils:
             # 返回默认图像或空白图像
             return Image.new('RGB', size, color='gray')
 
+    @staticmethod
+    def get_cover_thumbnail(file_path: str, size: Tuple[int, int]) -> Image.Image:
+        """
+        生成填满指定尺寸的缩略图（居中裁剪）
+
+        按代价从低到高选择解码方式，避免为小缩略图完整解码大图：
+        1. JPEG 内嵌的 EXIF 缩略图（足够大且宽高比一致时）
+        2. JPEG 的 draft() DCT 缩放解码（1/2、1/4、1/8）
+        3. 其他格式在 resize 时通过 reducing_gap 先用 reduce() 整数倍缩小
+        最后只做一次带裁剪框的重采样。缩小解码后仍超过像素数上限或解码内存预算时拒绝
+        （见 limit_decode），解码内存由调用方通过 decode_slot 申请。
+
+        Args:
+            file_path: 图片文件路径
+            size: 目标像素尺寸 (宽, 高)
+
+        Returns:
+            Image.Image: RGB 或 RGBA 模式的缩略图，尺寸恰好为 size
+        """
+        width, height = max(1, size[0]), max(1, size[1])
+
+        with Image.open(file_path) as img:
+            if img.width <= 0 or img.height <= 0:
+                raise ValueError("无效的图像尺寸")
+
+            # 覆盖目标区域所需的最小源尺寸
+            scale = max(width / img.width, height / img.height)
+            needed = (max(1, math.ceil(img.width * scale)), max(1, math.ceil(img.height * scale)))
+
+            source = None
+            if img.format == "JPEG":
+                source = ImageUtils._exif_thumbnail(img, needed)
+                if source is None:
+                    img.draft(None, needed)
+            if source is None:
+                source = img
+
+            mode = "RGBA" if source.mode in ("RGBA", "LA", "PA") or "transparency" in source.info else "RGB"
+            if source is img:
+                ImageUtils.limit_decode(img, needed, mode=mode)
+            if source.mode != mode:
+                source = source.convert(mode)
+
+            box = ImageUtils._cover_box(source.width, source.height, width, height)
+            return source.resize((width, height), Image.Resampling.LANCZOS, box=box, reducing_gap=3.0)
+
+    @staticmethod
+    def get_preview(file_path: str, max_size: Tuple[int, int],
+                    max_pixels: Optional[int] = MAX_DECODE_PIXELS) -> Image.Image:
+        """
+        生成不超过指定尺寸的预览图（保持宽高比，不裁剪）
+
+        JPEG 使用 draft() 缩放解码，其他格式用 reduce() 先整数倍缩小，
+        解码成本与屏幕尺寸相关而不是原图尺寸。
+
+        Args:
+            file_path: 图片文件路径
+            max_size: 最大像素尺寸 (宽, 高)
+            max_pixels: 完整解码的像素数上限，None 表示只受解码内存预算限制
+
+        Returns:
+            Image.Image: RGB 或 RGBA 模式的预览图
+        """
+        with Image.open(file_path) as img:
+            if img.width <= 0 or img.height <= 0:
+                raise ValueError("无效的图像尺寸")
+
+            scale = min(1.0, max_size[0] / img.width, max_size[1] / img.height)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            if img.format == "JPEG":
+                img.draft(None, size)
+
+            mode = "RGBA" if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info else "RGB"
+            ImageUtils.limit_decode(img, size, max_pixels=max_pixels, mode=mode)
+            source = img.convert(mode) if img.mode != mode else img
+            if source.size == size:
+                return source.copy()
+            return source.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    @staticmethod
+    def limit_decode(img: Image.Image, size: Tuple[int, int], max_pixels: Optional[int] = MAX_DECODE_PIXELS,
+                     max_bytes: Optional[int] = None, mode: Optional[str] = None):
+        """
+        完整解码前检查解码代价（在 load() 之前调用）
+
+        像素数超过 max_pixels 或解码内存超过 max_bytes 时，JPEG 用 draft() 缩小解码到不小于
+        size 的尺寸；仍然超出（或无法缩小解码的格式）时拒绝。解码内存预算对同时进行的解码
+        限流，但超过整个预算的单个图片会被单独放行，这里保证它不会按原尺寸分配内存。
+
+        Args:
+            img: 已打开、尚未解码的图像
+            size: 需要的最小尺寸
+            max_pixels: 像素数上限，None 表示不限
+            max_bytes: 解码内存上限（字节），默认为任务执行服务的解码内存预算
+            mode: 解码后要转换成的模式（转换会再占用一份内存）
+
+        Raises:
+            ValueError: 图像超出上限
+        """
+        if max_bytes is None:
+            max_bytes = get_task_executor().decode_budget
+
+        def exceeds() -> bool:
+            nbytes = ImageUtils.decoded_bytes(img.width, img.height, img.mode)
+            if mode is not None and mode != img.mode:
+                nbytes += ImageUtils.decoded_bytes(img.width, img.height, mode)
+            return (max_pixels is not None and img.width * img.height > max_pixels) or nbytes > max_bytes
+
+        if exceeds() and img.format == "JPEG":
+            img.draft(None, size)
+        if exceeds():
+            raise ValueError(
+                f"图像尺寸过大 ({img.width}x{img.height}={img.width * img.height} pixels)，"
+                f"超过完整解码的上限（{max_pixels or '不限'} pixels，{max_bytes // (1024 * 1024)} MB）"
+            )
+
+    @staticmethod
+    def pil_to_qimage(img: Image.Image):
+        """
+        将 PIL 图像转换为 QImage（数据已复制，可跨线程使用）
+
+        Args:
+            img: PIL 图像
+
+        Returns:
+            QImage: 转换后的图像
+        """
+        from PyQt6.QtGui import QImage
+
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+
+        if img.mode == "RGBA":
+            fmt = QImage.Format.Format_RGBA8888
+            bytes_per_line = img.width * 4
+        else:
+            fmt = QImage.Format.Format_RGB888
+            bytes_per_line = img.width * 3
+
+        buffer = img.tobytes("raw", img.mode)
+        return QImage(buffer, img.width, img.height, bytes_per_line, fmt).copy()
+
+    @staticmethod
+    def _exif_thumbnail(img: Image.Image, needed: Tuple[int, int]) -> Optional[Image.Image]:
+        """
+        读取 JPEG 内嵌的 EXIF 缩略图
+
+        仅当缩略图不小于所需尺寸、且宽高比与原图一致（没有黑边）时使用。
+        """
+        try:
+            exif_data = img.info.get("exif")
+            if not exif_data:
+                return None
+            ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+            offset = ifd1.get(0x0201)  # JPEGInterchangeFormat
+            length = ifd1.get(0x0202)  # JPEGInterchangeFormatLength
+            if not offset or not length:
+                return None
+
+            # 偏移量相对于 TIFF 头，EXIF 数据以 "Exif\0\0" 开头
+            start = 6 + offset if exif_data.startswith(b"Exif\x00\x00") else offset
+            thumb = Image.open(io.BytesIO(exif_data[start:start + length]))
+            thumb.load()
+        except Exception:
+            return None
+
+        if thumb.width < needed[0] or thumb.height < needed[1]:
+            return None
+        if abs(thumb.width / thumb.height - img.width / img.height) > 0.02 * (img.width / img.height):
+            return None
+        return thumb
+
+    @staticmethod
+    def _cover_box(src_width: int, src_height: int, dst_width: int, dst_height: int) -> Tuple[float, float, float, float]:
+        """
+        计算“填满”目标区域时需要保留的源图区域（居中裁剪）
+
+        Returns:
+            Tuple[float, float, float, float]: (left, top, right, bottom)
+        """
+        src_ratio = src_width / src_height
+        dst_ratio = dst_width / dst_height
+        if src_ratio > dst_ratio:
+            # 源图更宽，裁掉左右
+            crop_width = src_height * dst_ratio
+            left = (src_width - crop_width) / 2
+            return (left, 0.0, left + crop_width, float(src_height))
+
+        # 源图更高，裁掉上下
+        crop_height = src_width / dst_ratio
+        top = (src_height - crop_height) / 2
+        return (0.0, top, float(src_width), top + crop_height)
+
     @staticmethod
     def convert_to_avif(source_path: str, target_path: str, quality: int = 85):
         """
@@ -241,8 +833,8 @@ class ImageUtils:
             
             with Image.open(source_path) as img:
                 # 检查图像尺寸是否超过限制
-                if img.width * img.height > Image.MAX_IMAGE_PIXELS:
-                    raise Exception(f"图像尺寸过大 ({img.width}x{img.height}={img.width * img.height} pixels)，超过限制 {Image.MAX_IMAGE_PIXELS} pixels")
+                if img.width * img.height > MAX_DECODE_PIXELS:
+                    raise Exception(f"图像尺寸过大 ({img.width}x{img.height}={img.width * img.height} pixels)，超过限制 {MAX_DECODE_PIXELS} pixels")
                 
                 # 转换为RGB模式（如果需要）
                 if img.mode not in ('RGB', 'RGBA'):
@@ -254,31 +846,30 @@ class ImageUtils:
             raise Exception(f"转换图片失败: {source_path} -> {target_path}, 错误: {str(e)}")
 
     @staticmethod
-    def get_image_info(file_path: str) -> dict:
+    def get_image_info(file_path: str, data=None) -> dict:
         """
-        获取图片信息
+        获取图片信息（只读取文件头，不解码像素）
 
         Args:
             file_path: 图片文件路径
+            data: 可选的已读入内存的文件内容
 
         Returns:
-            dict: 图片信息
+            dict: 图片信息，decoded_bytes 为完整解码所需内存的估算值
         """
         try:
             # 设置加载截断处理，避免因截断图像导致的错误
             ImageFile.LOAD_TRUNCATED_IMAGES = True
             
-            with Image.open(file_path) as img:
-                # 检查图像尺寸是否超过限制
-                if img.width * img.height > Image.MAX_IMAGE_PIXELS:
-                    raise Exception(f"图像尺寸过大 ({img.width}x{img.height}={img.width * img.height} pixels)，超过限制 {Image.MAX_IMAGE_PIXELS} pixels")
-                
+            # 只读取文件头，不限制像素数：由调用方按 decoded_bytes 决定如何解码
+            with Image.open(MemoryReader(data) if data is not None else file_path) as img:
                 return {
                     'format': img.format,
                     'mode': img.mode,
                     'size': img.size,
                     'width': img.width,
-                    'height': img.height
+                    'height': img.height,
+                    'decoded_bytes': ImageUtils.decoded_bytes(img.width, img.height, img.mode)
                 }
         except Exception as e:
             return {
@@ -287,5 +878,31 @@ class ImageUtils:
                 'size': (0, 0),
                 'width': 0,
                 'height': 0,
+                'decoded_bytes': 0,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    @staticmethod
+    def decoded_bytes(width: int, height: int, mode: str) -> int:
+        """
+        估算解码后的像素内存
+
+        Args:
+            width: 宽度
+            height: 高度
+            mode: PIL 图像模式
+
+        Returns:
+            int: 字节数
+        """
+        if mode in ("I", "F"):
+            bytes_per_band = 4
+        elif mode.startswith("I;16"):
+            bytes_per_band = 2
+        else:
+            bytes_per_band = 1
+        try:
+            bands = Image.getmodebands(mode)
+        except (KeyError, ValueError):
+            bands = 4
+        return width * height * bands * bytes_per_band
\ No newline at end of file
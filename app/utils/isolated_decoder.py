@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+隔离的解码进程
+
+个别截断或构造异常的文件即使开启 LOAD_TRUNCATED_IMAGES 也可能让解码卡住数分钟，
+或使原生解码库崩溃，扫描线程随之挂起或整个程序退出。IsolatedDecoder 在独立的
+工作进程中计算哈希：
+- 每个文件有解码时限，超时的进程被终止
+- 工作进程的地址空间有上限，超出时解码失败而不是耗尽内存。只在支持 RLIMIT_AS 的
+  POSIX 平台上生效；Windows 上工作进程不限制内存，只隔离超时与崩溃
+- 进程崩溃或被终止后，下一次请求时自动启动新的进程
+失败按原因抛出 DecodeTimeout / DecodeCrashed / DecodeMemoryExceeded，
+调用方据此把文件记入隔离列表（HashStore.quarantine）。
+"""
+
+import io
+import multiprocessing
+import os
+import queue
+import threading
+from typing import Callable, Optional
+
+from app.utils.hash_store import hash_from_bytes, hash_to_bytes
+
+# 环境变量：是否启用隔离解码（0 表示在扫描线程中直接解码）
+DECODE_ISOLATION_ENV = "IMAGETRIM_DECODE_ISOLATION"
+# 环境变量：单个文件的解码时限（秒）
+DECODE_TIMEOUT_ENV = "IMAGETRIM_DECODE_TIMEOUT"
+# 环境变量：工作进程的内存上限（MB）
+DECODE_MEMORY_ENV = "IMAGETRIM_DECODE_MEMORY_MB"
+
+# 默认解码时限（秒）
+DEFAULT_TIMEOUT = 60.0
+
+# 默认工作进程内存上限（在进程启动后的占用之上追加）
+DEFAULT_MEMORY_LIMIT = 2048 * 1024 * 1024
+
+# 等待工作进程启动（导入依赖）的时限（秒），不计入文件的解码时限
+_STARTUP_TIMEOUT = 120.0
+
+
+class DecodeIsolationError(Exception):
+    """隔离解码失败（文件应记入隔离列表）"""
+
+
+class DecodeTimeout(DecodeIsolationError):
+    """解码超时"""
+
+
+class DecodeCrashed(DecodeIsolationError):
+    """解码进程崩溃"""
+
+
+class DecodeMemoryExceeded(DecodeIsolationError):
+    """解码超出内存上限"""
+
+
+def _address_space() -> int:
+    """当前进程的虚拟内存大小（仅 Linux，其他平台为0）"""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def memory_limit_supported() -> bool:
+    """平台是否支持限制工作进程的地址空间（POSIX 的 RLIMIT_AS，Windows 不支持）"""
+    try:
+        import resource
+    except ImportError:
+        return False
+    return hasattr(resource, "RLIMIT_AS")
+
+
+def _limit_memory(limit: int):
+    """限制当前进程的地址空间（平台不支持时忽略）"""
+    try:
+        import resource
+    except ImportError:
+        return
+    ceiling = _address_space() + limit
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (ceiling, ceiling))
+    except (ValueError, OSError):
+        pass
+
+
+def _worker_main(connection, memory_limit: int):
+    """
+    工作进程主循环：启动完成后发送 "ready"，随后接收 (路径, 文件内容) ，返回 (状态, 结果)
+
+    状态为 "ok"（结果为 (位数, 打包的哈希)）、"memory"（结果为错误信息）
+    或 "error"（结果为原始异常，无法序列化时为错误信息）。
+    """
+    from app.utils.image_utils import Image, ImageUtils
+
+    # 先计算一次哈希完成所有延迟导入，再设置上限，上限只约束解码本身
+    warmup = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(warmup, format="PNG")
+    ImageUtils.calculate_hash("warmup.png", warmup.getbuffer())
+    if memory_limit:
+        _limit_memory(memory_limit)
+    connection.send(("ready", None))
+
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        file_path, data = request
+        try:
+            image_hash = ImageUtils.calculate_hash(file_path, data)
+            response = ("ok", (image_hash.hash.size, hash_to_bytes(image_hash)))
+        except MemoryError:
+            response = ("memory", "解码超出内存上限")
+        except Exception as e:
+            root = e.__cause__ or e
+            response = ("memory", "解码超出内存上限") if isinstance(root, MemoryError) else ("error", root)
+        try:
+            connection.send(response)
+        except Exception:
+            # 异常对象无法序列化时只返回错误信息
+            connection.send(("error", str(response[1])))
+
+
+class _Worker:
+    """一个解码进程及其通信管道"""
+
+    def __init__(self, memory_limit: int):
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, memory_limit),
+                                       name="imagetrim-decode", daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+
+    def wait_ready(self):
+        """等待进程完成启动"""
+        if self.ready:
+            return
+        try:
+            if self.connection.poll(_STARTUP_TIMEOUT) and self.connection.recv()[0] == "ready":
+                self.ready = True
+                return
+        except (EOFError, OSError):
+            pass
+        raise RuntimeError("解码进程启动失败")
+
+    def kill(self):
+        """终止进程"""
+        try:
+            self.process.kill()
+            self.process.join(5)
+        finally:
+            self.connection.close()
+
+    def stop(self):
+        """通知进程退出"""
+        try:
+            self.connection.send(None)
+            self.process.join(2)
+        except (OSError, ValueError):
+            pass
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.connection.close()
+
+
+class IsolatedDecoder:
+    """
+    隔离解码进程池
+
+    线程安全：可在多个线程中同时调用 calculate_hash，同时进行的解码不超过进程数。
+    工作进程第一次启动失败后不再重试，之后的文件直接在调用线程中解码，
+    并通过 log_callback 报告、在扫描指标中记为 decode_isolation_unavailable。
+
+    Args:
+        workers: 工作进程数
+        timeout: 单个文件的解码时限（秒）
+        memory_limit: 每个工作进程在启动占用之上允许的内存（字节），0 表示不限；
+            平台不支持时（Windows）不生效，见 memory_limited
+        metrics: 可选的扫描指标收集器（ScanMetrics）
+        log_callback: 可选的日志回调 callback(message, level)，默认打印到标准输出
+    """
+
+    def __init__(self, workers: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                 memory_limit: int = DEFAULT_MEMORY_LIMIT, metrics=None,
+                 log_callback: Optional[Callable[[str, str], None]] = None):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.metrics = metrics
+        self.log_callback = log_callback
+        self.restarts = 0
+        self._idle = queue.Queue()
+        # None 表示尚未启动（或已终止）的进程名额，取用时再启动
+        for _ in range(self.workers):
+            self._idle.put(None)
+        self._lock = threading.Lock()
+        self._closed = False
+        # 工作进程无法启动（如打包环境不支持 spawn）时改为在调用线程中解码
+        self.unavailable = False
+
+    @classmethod
+    def from_environment(cls, workers: int = 1, metrics=None,
+                         log_callback: Optional[Callable[[str, str], None]] = None) -> Optional["IsolatedDecoder"]:
+        """
+        按环境变量创建；IMAGETRIM_DECODE_ISOLATION=0 时返回None（不隔离）
+
+        Args:
+            workers: 工作进程数
+            metrics: 可选的扫描指标收集器
+            log_callback: 可选的日志回调 callback(message, level)
+        """
+        if os.environ.get(DECODE_ISOLATION_ENV, "1").strip() == "0":
+            return None
+        try:
+            timeout = float(os.environ.get(DECODE_TIMEOUT_ENV, DEFAULT_TIMEOUT))
+        except ValueError:
+            timeout = DEFAULT_TIMEOUT
+        try:
+            memory_limit = int(float(os.environ[DECODE_MEMORY_ENV]) * 1024 * 1024)
+        except (KeyError, ValueError):
+            memory_limit = DEFAULT_MEMORY_LIMIT
+        return cls(workers, timeout, memory_limit, metrics, log_callback)
+
+    @property
+    def memory_limited(self) -> bool:
+        """工作进程的内存上限是否生效"""
+        return bool(self.memory_limit) and memory_limit_supported()
+
+    def calculate_hash(self, file_path: str, data=None):
+        """
+        在工作进程中计算图片哈希
+
+        Args:
+            file_path: 图片文件路径
+            data: 可选的已读入内存的文件内容
+
+        Returns:
+            imagehash.ImageHash: 图片哈希值
+
+        Raises:
+            DecodeTimeout / DecodeCrashed / DecodeMemoryExceeded: 应记入隔离列表的失败
+            Exception: 普通的解码失败
+        """
+        if self.unavailable:
+            return self._calculate_in_process(file_path, data)
+
+        worker = self._idle.get()
+        try:
+            try:
+                if worker is None:
+                    worker = _Worker(self.memory_limit)
+                worker.wait_ready()
+            except Exception as e:
+                if worker is not None:
+                    self._discard(worker)
+                    worker = None
+                self._mark_unavailable(e)
+                return self._calculate_in_process(file_path, data)
+            try:
+                worker.connection.send((file_path, bytes(data) if data is not None else None))
+                if not worker.connection.poll(self.timeout):
+                    self._discard(worker)
+                    worker = None
+                    raise DecodeTimeout(f"解码超过 {self.timeout:g} 秒: {file_path}")
+                status, result = worker.connection.recv()
+            except (EOFError, OSError) as e:
+                self._discard(worker)
+                worker = None
+                raise DecodeCrashed(f"解码进程异常退出: {file_path}") from e
+        finally:
+            self._idle.put(worker)
+
+        if status == "ok":
+            bits, packed = result
+            return hash_from_bytes(packed, bits)
+        if status == "memory":
+            raise DecodeMemoryExceeded(f"{result}: {file_path}")
+        if isinstance(result, BaseException):
+            raise Exception(f"计算图片哈希值失败: {file_path}, 错误: {str(result)}") from result
+        raise Exception(f"计算图片哈希值失败: {file_path}, 错误: {result}")
+
+    def _mark_unavailable(self, error: Exception):
+        """首次启动失败后不再尝试启动工作进程"""
+        with self._lock:
+            if self.unavailable:
+                return
+            self.unavailable = True
+        lost = "超时、崩溃与内存上限的隔离" if self.memory_limited else "超时与崩溃的隔离"
+        message = f"解码进程启动失败（{error}），改为在扫描线程中解码，{lost}不再生效"
+        if self.metrics is not None:
+            self.metrics.add("decode_isolation_unavailable")
+        if self.log_callback is not None:
+            self.log_callback(message, "warning")
+        else:
+            print(f"警告: {message}")
+
+    @staticmethod
+    def _calculate_in_process(file_path: str, data=None):
+        """在调用线程中计算哈希"""
+        from app.utils.image_utils import ImageUtils
+        return ImageUtils.calculate_hash(file_path, data)
+
+    def _discard(self, worker: _Worker):
+        """终止出错的进程，下次请求时启动新的进程"""
+        worker.kill()
+        with self._lock:
+            self.restarts += 1
+
+    def shutdown(self):
+        """关闭所有工作进程"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in range(self.workers):
+            worker = self._idle.get()
+            if worker is not None:
+                worker.stop()
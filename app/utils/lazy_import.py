@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+延迟导入工具
+
+numpy、imagehash（scipy、PyWavelets）、Pillow 及其插件导入耗时较长，
+GUI 启动路径上只创建代理对象，首次访问属性时才真正导入。
+"""
+
+import importlib
+import threading
+import types
+from typing import Callable, Optional
+
+
+class LazyModule(types.ModuleType):
+    """
+    延迟导入的模块代理
+
+    首次访问属性时导入目标模块，并执行可选的初始化回调。
+    """
+
+    def __init__(self, name: str, on_load: Optional[Callable[[types.ModuleType], None]] = None):
+        super().__init__(name)
+        self.__dict__["_lazy_on_load"] = on_load
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is not None:
+            return module
+
+        with self.__dict__["_lazy_lock"]:
+            module = self.__dict__["_lazy_module"]
+            if module is None:
+                module = importlib.import_module(self.__name__)
+                on_load = self.__dict__["_lazy_on_load"]
+                if on_load:
+                    on_load(module)
+                self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self._load(), key, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name: str, on_load: Optional[Callable[[types.ModuleType], None]] = None) -> LazyModule:
+    """
+    创建延迟导入的模块代理
+
+    Args:
+        name: 模块全名，如 "PIL.Image"
+        on_load: 可选，模块首次导入后调用的初始化函数
+
+    Returns:
+        LazyModule: 模块代理，使用方式与普通模块相同
+    """
+    return LazyModule(name, on_load)
+
+
+def is_loaded(module) -> bool:
+    """
+    判断延迟模块是否已经真正导入
+
+    Args:
+        module: lazy_module 返回的代理或普通模块
+
+    Returns:
+        bool: 是否已导入
+    """
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_module"] is not None
+    return True
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+长耗时操作的性能剖析钩子
+
+通过环境变量 IMAGETRIM_PROFILE 启用（也可调用 set_profile_mode 由设置项开启）：
+
+- cprofile: 使用 cProfile 记录调用线程，输出 pstats 文件（.prof）
+- sample:   后台线程周期性采样调用线程的调用栈，输出折叠栈文件（.folded），
+            可直接交给 flamegraph.pl / speedscope 生成火焰图
+
+未启用时被装饰的函数直接调用，不做任何额外工作。
+"""
+
+import cProfile
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+from app.utils.resource_path import get_user_data_dir
+
+PROFILE_ENV = "IMAGETRIM_PROFILE"
+PROFILE_DIR_ENV = "IMAGETRIM_PROFILE_DIR"
+PROFILE_MODES = ("cprofile", "sample")
+
+# 设置项覆盖的剖析模式；None 表示使用环境变量
+_mode_override: Optional[str] = None
+
+
+def set_profile_mode(mode: Optional[str]):
+    """
+    设置剖析模式，优先于环境变量
+
+    Args:
+        mode: cprofile / sample，传入空字符串关闭，None 恢复使用环境变量
+    """
+    global _mode_override
+    if mode and mode not in PROFILE_MODES:
+        raise ValueError(f"未知的剖析模式: {mode}")
+    _mode_override = mode
+
+
+def get_profile_mode() -> Optional[str]:
+    """
+    获取当前的剖析模式
+
+    Returns:
+        Optional[str]: cprofile / sample，未启用时返回None
+    """
+    mode = _mode_override if _mode_override is not None else os.environ.get(PROFILE_ENV, "")
+    mode = mode.strip().lower()
+    if mode in ("1", "true", "yes"):
+        return "cprofile"
+    return mode if mode in PROFILE_MODES else None
+
+
+class StackSampler:
+    """
+    调用栈采样器
+
+    在后台线程中按固定间隔读取目标线程的当前栈帧，统计折叠栈出现次数。
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="imagetrim-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        """按 Brendan Gregg 折叠栈格式写出采样结果"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _resolve_output_dir(output_dir: Optional[str]) -> str:
+    """确定剖析结果的输出目录"""
+    directory = os.environ.get(PROFILE_DIR_ENV) or output_dir
+    if not directory or not os.path.isdir(directory):
+        directory = os.path.join(get_user_data_dir(), "profiles")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def profiled(name: str, output_dir: Optional[Callable[..., Optional[str]]] = None):
+    """
+    剖析长耗时操作的装饰器
+
+    Args:
+        name: 输出文件名前缀，如 scan / convert
+        output_dir: 可选，接收被装饰函数的参数并返回输出目录（例如转换的目标目录）；
+                    未提供或目录不存在时写入用户数据目录下的 profiles 子目录
+
+    Returns:
+        Callable: 装饰器
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            mode = get_profile_mode()
+            if mode is None:
+                return func(*args, **kwargs)
+
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                profiler = StackSampler(threading.get_ident())
+                profiler.start()
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if mode == "cprofile":
+                    profiler.disable()
+                else:
+                    profiler.stop()
+
+                try:
+                    directory = _resolve_output_dir(output_dir(*args, **kwargs) if output_dir else None)
+                    extension = "prof" if mode == "cprofile" else "folded"
+                    path = os.path.join(directory, time.strftime(f"{name}-%Y%m%d-%H%M%S.{extension}"))
+                    if mode == "cprofile":
+                        profiler.dump_stats(path)
+                    else:
+                        profiler.write(path)
+                    print(f"[PROFILE] {name} 剖析结果已写入: {path}")
+                except Exception as e:
+                    print(f"[PROFILE] 写入剖析结果失败: {e}")
+
+        return wrapper
+    return decorator
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+限速合并的进度与日志通道
+
+工作线程每处理一个文件就发送一次跨线程信号时，十万级文件会产生同样数量的
+排队事件，拖慢工作线程并阻塞界面事件循环。ProgressChannel 在工作线程一侧
+只记录状态（加锁写入，不发送信号），界面线程按固定频率（默认 20Hz）取出：
+- 进度只保留最新一次
+- 日志按到达顺序整批转发
+空闲时不运行定时器；每个刷新周期最多只有一次跨线程唤醒。
+"""
+
+import threading
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# 默认刷新间隔（毫秒），即 20Hz
+DEFAULT_INTERVAL_MS = 50
+
+
+class ProgressChannel(QObject):
+    """
+    进度与日志通道
+
+    需在界面线程创建；report_progress 与 log 可在任意线程调用。
+    """
+
+    progress_updated = pyqtSignal(float, str)  # 进度更新 (百分比, 消息)
+    log_message = pyqtSignal(str, str)         # 日志消息 (消息, 级别)
+    _wake = pyqtSignal()
+
+    def __init__(self, interval_ms: int = DEFAULT_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._progress: Optional[Tuple[float, str]] = None
+        self._logs: List[Tuple[str, str]] = []
+        self._scheduled = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        # 从工作线程发出时为排队连接，在界面线程启动定时器
+        self._wake.connect(self._timer.start)
+
+    def report_progress(self, value: float, message: str):
+        """
+        记录进度（覆盖尚未刷新的旧进度）
+
+        Args:
+            value: 进度百分比
+            message: 进度消息
+        """
+        with self._lock:
+            self._progress = (value, message)
+            wake = not self._scheduled
+            self._scheduled = True
+        if wake:
+            self._wake.emit()
+
+    def log(self, message: str, level: str = "info"):
+        """
+        记录一条日志
+
+        Args:
+            message: 日志消息
+            level: 日志级别
+        """
+        with self._lock:
+            self._logs.append((message, level))
+            wake = not self._scheduled
+            self._scheduled = True
+        if wake:
+            self._wake.emit()
+
+    def flush(self):
+        """立即转发尚未刷新的日志与进度（仅在界面线程调用）"""
+        with self._lock:
+            progress, self._progress = self._progress, None
+            logs, self._logs = self._logs, []
+            self._scheduled = False
+        self._timer.stop()
+
+        for message, level in logs:
+            self.log_message.emit(message, level)
+        if progress is not None:
+            self.progress_updated.emit(*progress)
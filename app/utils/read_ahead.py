@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+预读缓冲池
+
+解码线程直接 Image.open(路径) 时，磁盘或网络读取与解码串行进行。ReadAheadReader
+在任务执行服务的 IO 池中按顺序提前读取其后的若干个文件，读入 BufferPool 中可复用的
+缓冲区；解码方从内存（MemoryReader，零拷贝）解码，读取延迟被计算时间掩盖。
+所有在途缓冲区的总字节数不超过预算（环境变量 IMAGETRIM_READ_AHEAD_MB 可调整）；
+预算不足时不再提前读取，轮到该文件时由解码方直接读取。
+"""
+
+import io
+import os
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.task_executor import TaskQueueFull, get_task_executor
+
+# 默认在途字节预算
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+# 环境变量：在途字节预算（MB）
+READ_AHEAD_BUDGET_ENV = "IMAGETRIM_READ_AHEAD_MB"
+
+# 默认预读深度（提前读取的文件数）
+DEFAULT_DEPTH = 8
+
+
+class BufferPool:
+    """
+    有总量上限的可复用缓冲池
+
+    Args:
+        budget_bytes: 在途缓冲区的总字节数上限；空闲缓冲区最多保留同样的字节数
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._free: List[bytearray] = []
+        self._free_bytes = 0
+
+    @property
+    def in_use(self) -> int:
+        """在途字节数"""
+        with self._lock:
+            return self._in_use
+
+    def try_acquire(self, size: int) -> Optional[bytearray]:
+        """
+        申请至少 size 字节的缓冲区
+
+        Args:
+            size: 所需字节数
+
+        Returns:
+            Optional[bytearray]: 缓冲区；超出预算时返回None
+        """
+        with self._lock:
+            if self._in_use + size > self.budget_bytes:
+                return None
+            self._in_use += size
+            # 复用足够大的最小空闲缓冲区
+            fitting = [buf for buf in self._free if len(buf) >= size]
+            if fitting:
+                buffer = min(fitting, key=len)
+                self._free.remove(buffer)
+                self._free_bytes -= len(buffer)
+                return buffer
+        return bytearray(size)
+
+    def release(self, buffer: bytearray, size: int):
+        """
+        归还缓冲区
+
+        Args:
+            buffer: try_acquire 返回的缓冲区
+            size: 申请时的字节数
+        """
+        with self._lock:
+            self._in_use -= size
+            if self._free_bytes + len(buffer) <= self.budget_bytes:
+                self._free.append(buffer)
+                self._free_bytes += len(buffer)
+
+
+class MemoryReader(io.RawIOBase):
+    """
+    内存中的只读文件对象（零拷贝，可直接传给 Image.open）
+
+    Args:
+        data: 文件内容
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        count = min(len(target), len(self._view) - self._position)
+        if count <= 0:
+            return 0
+        target[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        else:
+            position = len(self._view) + offset
+        self._position = max(0, position)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+class ReadBuffer:
+    """
+    一个文件的预读结果，用作上下文管理器，退出时归还缓冲区
+
+    Attributes:
+        path: 文件路径
+        data: 文件内容（memoryview）；为None且没有 error 时由使用方从路径读取
+        error: 读取失败的异常
+    """
+
+    def __init__(self, path: str, data=None, error: Optional[BaseException] = None,
+                 pool: Optional[BufferPool] = None, buffer: Optional[bytearray] = None, size: int = 0):
+        self.path = path
+        self.data = data
+        self.error = error
+        self._pool = pool
+        self._buffer = buffer
+        self._size = size
+
+    def release(self):
+        """归还缓冲区（data 随之失效）"""
+        if self._pool is not None and self._buffer is not None:
+            if self.data is not None:
+                self.data.release()
+            self._pool.release(self._buffer, self._size)
+            self._buffer = None
+        self.data = None
+
+    def __enter__(self) -> "ReadBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def read_file(file_path: str) -> memoryview:
+    """读取整个文件（不使用缓冲池）"""
+    with open(file_path, "rb") as f:
+        return memoryview(f.read())
+
+
+def _read_into_pool(file_path: str, pool: BufferPool) -> Optional[Tuple[bytearray, int, int]]:
+    """
+    在 IO 池中把文件读入缓冲池
+
+    Returns:
+        Optional[Tuple[bytearray, int, int]]: (缓冲区, 申请的字节数, 实际读取的字节数)；
+        超出预算时返回None，由解码方直接读取
+    """
+    with open(file_path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        buffer = pool.try_acquire(size)
+        if buffer is None:
+            return None
+        try:
+            view = memoryview(buffer)
+            length = 0
+            while length < size:
+                count = f.readinto(view[length:size])
+                if not count:
+                    break
+                length += count
+            view.release()
+        except BaseException:
+            pool.release(buffer, size)
+            raise
+        return buffer, size, length
+
+
+class ReadAheadReader:
+    """
+    按顺序预读文件
+
+    Args:
+        pool: 缓冲池，默认新建一个使用默认预算的缓冲池
+        depth: 预读深度
+        metrics: 可选的扫描指标收集器（ScanMetrics）
+    """
+
+    def __init__(self, pool: Optional[BufferPool] = None, depth: int = DEFAULT_DEPTH, metrics=None):
+        self.pool = pool or BufferPool()
+        self.depth = max(1, depth)
+        self.metrics = metrics
+
+    @classmethod
+    def from_environment(cls, metrics=None) -> "ReadAheadReader":
+        """按环境变量 IMAGETRIM_READ_AHEAD_MB（默认64）设置在途字节预算"""
+        try:
+            budget_bytes = int(float(os.environ[READ_AHEAD_BUDGET_ENV]) * 1024 * 1024)
+        except (KeyError, ValueError):
+            budget_bytes = DEFAULT_BUDGET_BYTES
+        return cls(BufferPool(max(0, budget_bytes)), metrics=metrics)
+
+    def iterate(self, paths: Iterable[str],
+                should_stop: Optional[Callable[[], bool]] = None) -> Iterator[ReadBuffer]:
+        """
+        按输入顺序产出每个文件的内容
+
+        调用方应在处理完后归还缓冲区（with 语句或 release）。
+
+        Args:
+            paths: 文件路径（可惰性生成）
+            should_stop: 停止检查函数 should_stop() -> bool
+
+        Returns:
+            Iterator[ReadBuffer]: 预读结果
+        """
+        executor = get_task_executor()
+        pending = deque()
+        path_iter = iter(paths)
+        exhausted = False
+
+        try:
+            while True:
+                # 保持 depth 个文件的读取在途
+                while not exhausted and len(pending) < self.depth:
+                    file_path = next(path_iter, None)
+                    if file_path is None:
+                        exhausted = True
+                        break
+                    try:
+                        future = executor.submit_io(_read_into_pool, file_path, self.pool,
+                                                    name="read_ahead", timeout=0)
+                    except TaskQueueFull:
+                        future = None
+                    pending.append((file_path, future))
+
+                if not pending or (should_stop and should_stop()):
+                    break
+
+                file_path, future = pending.popleft()
+                yield self._collect(file_path, future)
+        finally:
+            # 提前结束时取消尚未开始的读取，归还已读入的缓冲区
+            for _, future in pending:
+                if future is not None and not future.cancel():
+                    future.add_done_callback(self._discard)
+
+    def _collect(self, file_path: str, future) -> ReadBuffer:
+        """取得一个文件的读取结果，未能预读时直接读取"""
+        try:
+            result = future.result() if future is not None else None
+            if result is not None:
+                buffer, size, length = result
+                if self.metrics is not None:
+                    self.metrics.add("read_ahead_hits")
+                return ReadBuffer(file_path, memoryview(buffer)[:length], pool=self.pool,
+                                  buffer=buffer, size=size)
+
+            if self.metrics is not None:
+                self.metrics.add("read_ahead_misses")
+            return ReadBuffer(file_path, read_file(file_path))
+        except Exception as e:
+            return ReadBuffer(file_path, error=e)
+
+    def _discard(self, future):
+        """归还被放弃的预读结果"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        if result is not None:
+            buffer, size, _ = result
+            self.pool.release(buffer, size)
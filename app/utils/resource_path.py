@@ -102,3 +102,27 @@ def get_resource_dir() -> str:
         project_root = current_file.parent.parent.parent
         return os.path.join(project_root, "app", "resources")
 
+
+
+def get_user_data_dir() -> str:
+    """
+    获取用户数据目录（缓存、索引、剖析结果等可写文件的存放位置）
+
+    可通过环境变量 IMAGETRIM_DATA_DIR 覆盖。
+
+    Returns:
+        str: 用户数据目录的绝对路径（已确保存在）
+    """
+    data_dir = os.environ.get("IMAGETRIM_DATA_DIR")
+    if not data_dir:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            data_dir = os.path.join(base, "ImageTrim")
+        elif sys.platform == "darwin":
+            data_dir = os.path.expanduser("~/Library/Application Support/ImageTrim")
+        else:
+            base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+            data_dir = os.path.join(base, "imagetrim")
+
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.abspath(data_dir)
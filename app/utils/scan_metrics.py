@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+扫描指标收集
+
+记录扫描各阶段的耗时、吞吐量、读取字节数、按类型统计的解码失败、
+缓存命中率与比较次数，可随扫描结果一起发送，也可写出为JSON追踪文件
+（Chrome Trace Event 格式，可直接在 chrome://tracing 或 Perfetto 中打开）。
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+class ScanMetrics:
+    """
+    扫描指标收集器
+
+    线程安全，可在工作线程中累加计数器。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.started_at = time.time()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.failure_samples: List[Dict[str, str]] = []
+        self.caches: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self.events: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        计时一个扫描阶段
+
+        Args:
+            name: 阶段名称，如 discovery / hashing / comparison
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                entry = self.phases.setdefault(name, {"seconds": 0.0, "items": 0})
+                entry["seconds"] += end - start
+                self.events.append({
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                })
+
+    def set_phase_items(self, name: str, items: int):
+        """设置阶段处理的条目数，用于计算吞吐量"""
+        with self._lock:
+            entry = self.phases.setdefault(name, {"seconds": 0.0, "items": 0})
+            entry["items"] = items
+
+    def add(self, name: str, value: int = 1):
+        """累加计数器"""
+        with self._lock:
+            self.counters[name] += value
+
+    def record_failure(self, file_path: str, exc: BaseException):
+        """
+        记录一次处理失败
+
+        按异常的根本类型归类（优先使用 __cause__），并保留少量样例。
+        """
+        root = exc.__cause__ or exc
+        error_type = type(root).__name__
+        with self._lock:
+            self.failures[error_type] += 1
+            if len(self.failure_samples) < 50:
+                self.failure_samples.append({"path": file_path, "type": error_type, "error": str(root)})
+
+    def record_cache(self, name: str, hit: bool):
+        """记录一次缓存访问"""
+        with self._lock:
+            self.caches[name]["hits" if hit else "misses"] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出为可序列化的字典
+
+        Returns:
+            Dict[str, Any]: 指标数据
+        """
+        with self._lock:
+            phases = {}
+            for name, entry in self.phases.items():
+                seconds = entry["seconds"]
+                items = entry["items"]
+                phases[name] = {
+                    "seconds": seconds,
+                    "items": items,
+                    "items_per_second": items / seconds if seconds > 0 else 0.0,
+                }
+
+            caches = {}
+            for name, entry in self.caches.items():
+                total = entry["hits"] + entry["misses"]
+                caches[name] = dict(entry, hit_rate=entry["hits"] / total if total else 0.0)
+
+            return {
+                "started_at": self.started_at,
+                "wall_seconds": time.perf_counter() - self._origin,
+                "phases": phases,
+                "counters": dict(self.counters),
+                "failures": dict(self.failures),
+                "failure_samples": list(self.failure_samples),
+                "caches": caches,
+            }
+
+    def write_trace(self, path: str) -> str:
+        """
+        写出JSON追踪文件
+
+        Args:
+            path: 文件路径；如果是目录，则在其中生成带时间戳的文件名
+
+        Returns:
+            str: 实际写入的文件路径
+        """
+        if os.path.isdir(path):
+            path = os.path.join(path, time.strftime("scan-trace-%Y%m%d-%H%M%S.json"))
+
+        with self._lock:
+            events = list(self.events)
+
+        payload = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "metadata": self.to_dict(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        return path
+
+    def summary(self) -> Optional[str]:
+        """生成单行摘要，用于日志输出"""
+        data = self.to_dict()
+        parts = []
+        for name, phase in data["phases"].items():
+            parts.append(f"{name} {phase['seconds']:.2f}s ({phase['items_per_second']:.1f}/s)")
+        if not parts:
+            return None
+        return "，".join(parts)
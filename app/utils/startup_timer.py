@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+启动耗时测量
+
+记录从进程启动（本模块首次导入）到主窗口首次绘制的时间。
+设置环境变量 IMAGETRIM_EXIT_AFTER_FIRST_PAINT=1 时，首次绘制后立即退出，
+便于 benchmarks/startup_time.py 重复测量冷启动时间。
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+_start = time.perf_counter()
+_marks: Dict[str, float] = {}
+
+
+def mark(name: str) -> float:
+    """
+    记录一个启动阶段的时间点（同名只记录第一次）
+
+    Args:
+        name: 阶段名称
+
+    Returns:
+        float: 自启动以来的毫秒数
+    """
+    if name not in _marks:
+        _marks[name] = (time.perf_counter() - _start) * 1000
+    return _marks[name]
+
+
+def get_marks() -> Dict[str, float]:
+    """获取所有已记录的时间点（毫秒）"""
+    return dict(_marks)
+
+
+def report_first_paint() -> Optional[float]:
+    """
+    记录首次绘制时间并输出，只在第一次调用时生效
+
+    Returns:
+        Optional[float]: 首次绘制耗时（毫秒），已记录过时返回None
+    """
+    if "first_paint" in _marks:
+        return None
+
+    elapsed = mark("first_paint")
+    print(f"[STARTUP] 首次绘制耗时: {elapsed:.0f} ms")
+
+    if os.environ.get("IMAGETRIM_EXIT_AFTER_FIRST_PAINT"):
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+        QTimer.singleShot(0, QApplication.quit)
+
+    return elapsed
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+候选重复对索引单元测试
+"""
+
+import os
+import sys
+import unittest
+
+# 添加项目路径到sys.path
+project_root = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.abspath(project_root))
+
+try:
+    import imagehash
+    import numpy as np
+except ImportError:
+    imagehash = None
+
+if imagehash is not None:
+    from app.utils.candidate_pairs import CandidatePairs
+    from app.utils.image_utils import ImageUtils
+
+
+def _greedy_groups(hash_items, threshold):
+    """逐对比较的贪心分组（参考实现）"""
+    duplicates = {}
+    processed = set()
+    for i, (file1, hash1) in enumerate(hash_items):
+        if file1 in processed:
+            continue
+        group = [file1]
+        processed.add(file1)
+        for file2, hash2 in hash_items[i + 1:]:
+            if file2 not in processed and ImageUtils.calculate_similarity(hash1, hash2) >= threshold:
+                group.append(file2)
+                processed.add(file2)
+        if len(group) > 1:
+            duplicates[group[0]] = group[1:]
+    return duplicates
+
+
+@unittest.skipIf(imagehash is None, "需要imagehash与numpy")
+class TestCandidatePairs(unittest.TestCase):
+    """候选重复对索引测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(7)
+        bases = [rng.integers(0, 2, (8, 8)).astype(bool) for _ in range(20)]
+        cls.hashes = {}
+        for index in range(200):
+            bits = bases[index % len(bases)].copy()
+            for _ in range(rng.integers(0, 12)):
+                row, col = rng.integers(0, 8, 2)
+                bits[row, col] = not bits[row, col]
+            cls.hashes[f"image_{index}.jpg"] = imagehash.ImageHash(bits)
+
+    def test_regroup_matches_pairwise_greedy(self):
+        """按不同阈值重新分组的结果与逐对贪心比较一致"""
+        candidates = CandidatePairs.from_hashes(self.hashes)
+        self.assertTrue(candidates.build(0.80))
+
+        items = list(self.hashes.items())
+        for threshold in (0.80, 0.85, 0.9, 0.95, 1.0):
+            with self.subTest(threshold=threshold):
+                self.assertEqual(candidates.group(threshold), _greedy_groups(items, threshold))
+
+    def test_threshold_below_radius_is_not_covered(self):
+        """低于保留半径的阈值不能直接重新分组"""
+        candidates = CandidatePairs.from_hashes(self.hashes)
+        candidates.build(0.90)
+
+        self.assertTrue(candidates.covers(0.95))
+        self.assertFalse(candidates.covers(0.80))
+        with self.assertRaises(ValueError):
+            candidates.group(0.80)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+外存去重单元测试
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加项目路径到sys.path
+project_root = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.abspath(project_root))
+
+try:
+    import imagehash
+    import numpy as np
+except ImportError:
+    imagehash = None
+
+if imagehash is not None:
+    from app.utils.candidate_pairs import CandidatePairs
+    from app.utils.external_dedup import ExternalDuplicateFinder, PathSpool, collect_groups
+
+
+@unittest.skipIf(imagehash is None, "需要imagehash与numpy")
+class TestExternalDuplicateFinder(unittest.TestCase):
+    """外存去重测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(11)
+        bases = [rng.integers(0, 2, (8, 8)).astype(bool) for _ in range(300)]
+        cls.hashes = {}
+        for index in range(5000):
+            bits = bases[rng.integers(0, len(bases))].copy()
+            # 约四分之一与某个基准完全相同，其余随机翻转若干位
+            for _ in range(rng.integers(0, 8) if rng.random() > 0.25 else 0):
+                row, col = rng.integers(0, 8, 2)
+                bits[row, col] = not bits[row, col]
+            cls.hashes[f"image_{index}.jpg"] = imagehash.ImageHash(bits)
+
+    def _external_groups(self, threshold):
+        with ExternalDuplicateFinder(threshold) as finder:
+            # 缩小内存预算，使每一步都分成多个分桶
+            finder.memory_bytes = 1024 * 96
+            items = list(self.hashes.items())
+            for start in range(0, len(items), 1500):
+                finder.add_many(dict(items[start:start + 1500]))
+            return dict(finder.groups())
+
+    def test_groups_match_candidate_pairs(self):
+        """分桶比较的分组结果与 CandidatePairs.group 一致"""
+        candidates = CandidatePairs.from_hashes(self.hashes)
+        self.assertTrue(candidates.build(0.9))
+
+        for threshold in (0.9, 0.95, 0.97, 1.0):
+            with self.subTest(threshold=threshold):
+                self.assertEqual(self._external_groups(threshold), candidates.group(threshold))
+
+    def test_threshold_below_minimum_is_refused(self):
+        """阈值低于 0.9 时拒绝使用外存去重"""
+        with self.assertRaises(ValueError):
+            ExternalDuplicateFinder(0.8)
+
+    def test_collect_groups_keeps_report_complete(self):
+        """内存中只保留部分重复组，报告文件包含全部重复组"""
+        groups = [(f"a{i}.jpg", [f"b{i}.jpg", f"c{i}.jpg"]) for i in range(10)]
+        with tempfile.TemporaryDirectory() as directory:
+            report_path = os.path.join(directory, "report.jsonl")
+            shown, total_groups, total_duplicates = collect_groups(iter(groups), 9, report_path)
+            with open(report_path, encoding="utf-8") as f:
+                report = [json.loads(line) for line in f]
+
+        self.assertEqual(shown, dict(groups[:3]))
+        self.assertEqual((total_groups, total_duplicates), (10, 20))
+        self.assertEqual([(row["primary"], row["duplicates"]) for row in report], groups)
+
+
+@unittest.skipIf(imagehash is None, "需要numpy")
+class TestPathSpool(unittest.TestCase):
+    """路径列表测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.files = []
+        for index in range(20):
+            file_path = os.path.join(self.temp_dir.name, f"图片 {index}.jpg")
+            with open(file_path, "wb") as f:
+                f.write(b"x")
+            self.files.append(file_path)
+        # 两个硬链接指向已有的文件
+        self.links = [os.path.join(self.temp_dir.name, name) for name in ("link-a.jpg", "link-b.jpg")]
+        os.link(self.files[3], self.links[0])
+        os.link(self.files[7], self.links[1])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_spilled_paths_keep_order_and_drop_aliases(self):
+        """写入磁盘后按原顺序读出，硬链接只保留第一个路径"""
+        paths = self.files[:10] + self.links + self.files[10:]
+        for limit in (None, 5):
+            with self.subTest(limit=limit), PathSpool(limit) as spool:
+                spool.extend(iter(paths))
+                self.assertEqual(spool.spilled, limit is not None)
+                self.assertEqual(list(spool), paths)
+
+                self.assertEqual(spool.drop_aliases(), 2)
+                self.assertEqual(len(spool), len(self.files))
+                self.assertEqual(list(spool), self.files)
+                directory = spool.directory
+            if directory is not None:
+                self.assertFalse(os.path.exists(directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
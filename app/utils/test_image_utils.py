@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+图片处理工具单元测试
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加项目路径到sys.path
+project_root = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.abspath(project_root))
+
+try:
+    import imagehash
+    from PIL import Image
+except ImportError:
+    imagehash = None
+
+if imagehash is not None:
+    from app.core.dependency_injector import get_injector
+    from app.core.task_executor import SERVICE_NAME, TaskExecutor
+    from app.utils.image_utils import ImageUtils
+
+# 测试用的解码内存预算：小于 4000x4000 RGB 图片完整解码所需的 48MB
+_BUDGET = 16 * 1024 * 1024
+
+
+@unittest.skipIf(imagehash is None, "需要imagehash与Pillow")
+class TestDecodeLimit(unittest.TestCase):
+    """超出解码内存预算的图片测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        image = Image.new("RGB", (4000, 4000), "white")
+        image.paste((200, 30, 30), (0, 0, 2000, 2000))
+        cls.png_path = os.path.join(cls.temp_dir.name, "large.png")
+        cls.jpeg_path = os.path.join(cls.temp_dir.name, "large.jpg")
+        image.save(cls.png_path)
+        image.save(cls.jpeg_path, quality=90)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def setUp(self):
+        injector = get_injector()
+        self.previous = injector.get(SERVICE_NAME) if injector.has(SERVICE_NAME) else TaskExecutor
+        self.executor = TaskExecutor(decode_budget=_BUDGET)
+        injector.register(SERVICE_NAME, self.executor, singleton=True)
+
+    def tearDown(self):
+        get_injector().register(SERVICE_NAME, self.previous, singleton=True)
+        self.executor.shutdown()
+
+    def test_undecodable_size_is_rejected(self):
+        """无法缩小解码的格式超出预算时拒绝，不按原尺寸解码"""
+        with self.assertRaises(Exception):
+            ImageUtils.calculate_hash(self.png_path)
+        with self.assertRaises(ValueError):
+            ImageUtils.get_cover_thumbnail(self.png_path, (100, 100))
+
+    def test_jpeg_is_draft_decoded_within_budget(self):
+        """JPEG 超出预算时缩小解码"""
+        with Image.open(self.jpeg_path) as img:
+            ImageUtils.limit_decode(img, (1024, 1024))
+            self.assertLess(img.width, 4000)
+            self.assertLessEqual(ImageUtils.decoded_bytes(img.width, img.height, img.mode), _BUDGET)
+
+        self.assertEqual(ImageUtils.calculate_hash(self.jpeg_path).hash.size, 64)
+        self.assertEqual(ImageUtils.get_cover_thumbnail(self.jpeg_path, (100, 100)).size, (100, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+图片去重扫描流程基准测试
+
+分别计时发现、哈希、比较三个阶段，报告吞吐量（图片/秒）、
+峰值内存（RSS）以及基于合成图库真实分组的查准率/查全率。
+
+用法:
+    python benchmarks/bench_dedup.py --corpus /tmp/corpus --generate 200
+    python benchmarks/bench_dedup.py --corpus /tmp/corpus --json result.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.task_executor import CPU_POOL, get_task_executor
+from app.utils.hash_store import HashStore
+from app.utils.image_utils import ImageUtils
+from app.utils.io_scheduler import IOScheduler
+from app.utils.isolated_decoder import IsolatedDecoder
+from app.utils.read_ahead import ReadAheadReader
+from app.utils.scan_metrics import ScanMetrics
+from synthetic_corpus import MANIFEST_NAME, generate_corpus, load_ground_truth
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """获取进程峰值常驻内存（MB），平台不支持时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 单位为字节
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _group_pairs(groups: List[List[str]]) -> Set[Tuple[str, str]]:
+    """将分组展开为无序文件对集合"""
+    pairs = set()
+    for group in groups:
+        for a, b in itertools.combinations(sorted(group), 2):
+            pairs.add((a, b))
+    return pairs
+
+
+def precision_recall(duplicates: Dict[str, List[str]], ground_truth: Dict[str, int]) -> Tuple[float, float]:
+    """
+    计算成对查准率与查全率
+
+    Args:
+        duplicates: find_duplicates 的输出
+        ground_truth: 文件路径到真实分组编号的映射
+
+    Returns:
+        Tuple[float, float]: (查准率, 查全率)
+    """
+    predicted = _group_pairs([[primary] + files for primary, files in duplicates.items()])
+
+    truth_groups: Dict[int, List[str]] = {}
+    for path, group in ground_truth.items():
+        truth_groups.setdefault(group, []).append(path)
+    expected = _group_pairs(list(truth_groups.values()))
+
+    hits = len(predicted & expected)
+    precision = hits / len(predicted) if predicted else 1.0
+    recall = hits / len(expected) if expected else 1.0
+    return precision, recall
+
+
+def run_benchmark(corpus_dir: str, threshold: float = 0.95, hash_store: Optional[str] = None) -> dict:
+    """
+    对图库执行一次完整的分阶段基准测试
+
+    哈希阶段调用与扫描相同的 ImageUtils.compute_hashes（读取调度、预读、隔离解码、
+    可选的哈希库均按环境变量配置），各阶段耗时取自 ScanMetrics。
+
+    Args:
+        corpus_dir: 图库目录
+        threshold: 相似度阈值
+        hash_store: 可选的哈希库路径，提供时复用/保存其中的哈希
+
+    Returns:
+        dict: 各阶段耗时、吞吐量与准确率
+    """
+    metrics = ScanMetrics()
+    store = HashStore(hash_store) if hash_store else None
+
+    with metrics.phase("discovery"):
+        image_files = ImageUtils.get_image_files(corpus_dir, include_subdirs=True, metrics=metrics)
+    metrics.set_phase_items("discovery", len(image_files))
+
+    decoder = IsolatedDecoder.from_environment(workers=get_task_executor().workers(CPU_POOL), metrics=metrics)
+    try:
+        hashes = ImageUtils.compute_hashes(
+            image_files,
+            metrics=metrics,
+            store=store,
+            scheduler=IOScheduler.from_environment(metrics),
+            read_ahead=ReadAheadReader.from_environment(metrics),
+            decoder=decoder
+        )
+    finally:
+        if decoder is not None:
+            decoder.shutdown()
+        if store is not None:
+            store.close()
+
+    duplicates = ImageUtils.group_duplicates(hashes, threshold, metrics=metrics)
+
+    data = metrics.to_dict()
+    phases = {
+        name: {"seconds": phase["seconds"], "images_per_second": phase["items_per_second"]}
+        for name, phase in data["phases"].items()
+    }
+    total_seconds = sum(phase["seconds"] for phase in phases.values())
+    result = {
+        "corpus": corpus_dir,
+        "threshold": threshold,
+        "images": len(image_files),
+        "hash_failures": sum(data["failures"].values()),
+        "groups": len(duplicates),
+        "phases": phases,
+        "total_seconds": total_seconds,
+        "images_per_second": len(image_files) / total_seconds if total_seconds else 0.0,
+        "peak_rss_mb": get_peak_rss_mb(),
+        "counters": data["counters"],
+        "caches": data["caches"],
+    }
+
+    if os.path.exists(os.path.join(corpus_dir, MANIFEST_NAME)):
+        ground_truth = load_ground_truth(corpus_dir)
+        normalized = {os.path.normpath(primary): [os.path.normpath(f) for f in files]
+                      for primary, files in duplicates.items()}
+        precision, recall = precision_recall(normalized, ground_truth)
+        result["precision"] = precision
+        result["recall"] = recall
+
+    return result
+
+
+def print_report(result: dict):
+    """打印可读的基准测试报告"""
+    print(f"图库: {result['corpus']}  图片: {result['images']}  阈值: {result['threshold']}")
+    for name, phase in result["phases"].items():
+        print(f"  {name:<12} {phase['seconds']:8.3f} s  {phase['images_per_second']:10.1f} 图片/秒")
+    print(f"  {'total':<12} {result['total_seconds']:8.3f} s  {result['images_per_second']:10.1f} 图片/秒")
+    if result["peak_rss_mb"] is not None:
+        print(f"  峰值内存: {result['peak_rss_mb']:.1f} MB")
+    if "precision" in result:
+        print(f"  查准率: {result['precision']:.3f}  查全率: {result['recall']:.3f}")
+    print(f"  重复组: {result['groups']}  哈希失败: {result['hash_failures']}")
+    for name, cache in result["caches"].items():
+        print(f"  缓存 {name}: 命中率 {cache['hit_rate']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片去重扫描流程基准测试")
+    parser.add_argument("--corpus", required=True, help="图库目录")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="先在 --corpus 目录生成 N 张基础图片的合成图库")
+    parser.add_argument("--seed", type=int, default=42, help="合成图库的随机种子")
+    parser.add_argument("--threshold", type=float, default=0.95, help="相似度阈值 (0-1)")
+    parser.add_argument("--json", metavar="PATH", help="将结果写入JSON文件")
+    parser.add_argument("--hash-store", metavar="PATH", help="使用该哈希库（第二次运行即测量复用哈希的扫描）")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_corpus(args.corpus, base_count=args.generate, seed=args.seed)
+
+    result = run_benchmark(args.corpus, args.threshold, args.hash_store)
+    print_report(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
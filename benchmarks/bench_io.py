@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+读取调度基准测试
+
+在模拟的高延迟文件系统上对比不同读取策略的哈希吞吐量（图片/秒）。
+模拟方式：包装内置 open，图库中每个文件第一次被打开时等待
+“往返延迟 + 文件大小 / 带宽”，之后视为已在客户端缓存中，与 SMB/NFS 的
+表现一致；预读线程与读取方同时打开同一文件时，后到者等待先到者完成。
+
+用法:
+    python benchmarks/bench_io.py --corpus /tmp/corpus --generate 100
+    python benchmarks/bench_io.py --corpus /tmp/corpus --latency-ms 20 --depths 4 8 16
+    # 同时对比预读缓冲池（在 IO 池中读入内存，从内存解码）
+    python benchmarks/bench_io.py --corpus /tmp/corpus --modes off --read-ahead
+    # 真实磁盘（不模拟延迟），每次运行前清空页缓存（需要 root）
+    python benchmarks/bench_io.py --corpus /mnt/hdd/photos --latency-ms 0 --modes off inode --drop-caches
+"""
+
+import argparse
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.dependency_injector import get_injector
+from app.core.task_executor import SERVICE_NAME, TaskExecutor
+from app.utils.image_utils import ImageUtils
+from app.utils.io_scheduler import MODE_OFF, MODE_PREFETCH, MODES, IOScheduler
+from app.utils.read_ahead import BufferPool, ReadAheadReader
+from app.utils.scan_metrics import ScanMetrics
+from synthetic_corpus import generate_corpus
+
+
+class SimulatedLatencyFS:
+    """
+    模拟高延迟文件系统
+
+    Args:
+        root: 受影响的目录
+        latency_ms: 每个文件首次读取的往返延迟
+        bandwidth_mbps: 带宽（MB/s），0 表示不限
+    """
+
+    def __init__(self, root: str, latency_ms: float, bandwidth_mbps: float = 0.0):
+        self.root = os.path.abspath(root) + os.sep
+        self.latency = latency_ms / 1000.0
+        self.bandwidth = bandwidth_mbps * 1024 * 1024
+        self._lock = threading.Lock()
+        self._fetches: Dict[str, threading.Event] = {}
+        self.remote_reads = 0
+
+    def _fetch(self, path: str):
+        """首次访问时等待延迟，并发访问同一文件时只等待一次"""
+        with self._lock:
+            event = self._fetches.get(path)
+            owner = event is None
+            if owner:
+                event = self._fetches[path] = threading.Event()
+                self.remote_reads += 1
+        if not owner:
+            event.wait()
+            return
+        delay = self.latency
+        if self.bandwidth:
+            delay += os.path.getsize(path) / self.bandwidth
+        time.sleep(delay)
+        event.set()
+
+    @contextmanager
+    def mounted(self):
+        """在上下文中包装内置 open"""
+        original_open = builtins.open
+
+        def latency_open(file, mode="r", *args, **kwargs):
+            if isinstance(file, str) and "r" in mode and os.path.abspath(file).startswith(self.root):
+                self._fetch(os.path.abspath(file))
+            return original_open(file, mode, *args, **kwargs)
+
+        builtins.open = latency_open
+        try:
+            yield self
+        finally:
+            builtins.open = original_open
+
+
+def drop_page_cache() -> bool:
+    """清空页缓存（Linux，需要 root），返回是否成功"""
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def run_once(image_files: List[str], mode: str, depth: int, corpus_dir: str,
+             latency_ms: float, bandwidth_mbps: float, drop_caches: bool,
+             read_ahead_mb: float = 0.0) -> dict:
+    """
+    以指定策略计算一次全部哈希
+
+    Args:
+        read_ahead_mb: 预读缓冲池预算（MB），0 表示不使用预读缓冲池
+
+    Returns:
+        dict: 耗时、吞吐量、远程读取次数与预读命中数
+    """
+    if drop_caches and not drop_page_cache():
+        print("  警告: 无法清空页缓存（需要 root）")
+
+    scheduler = IOScheduler(mode, prefetch_depth=depth)
+    metrics = ScanMetrics()
+    scheduler.metrics = metrics
+    simulator = SimulatedLatencyFS(corpus_dir, latency_ms, bandwidth_mbps) if latency_ms > 0 else None
+    reader = None
+    if read_ahead_mb:
+        reader = ReadAheadReader(BufferPool(int(read_ahead_mb * 1024 * 1024)), depth=depth or 8, metrics=metrics)
+
+    start = time.perf_counter()
+    if simulator is not None:
+        with simulator.mounted():
+            hashes = ImageUtils.compute_hashes(image_files, metrics=metrics, scheduler=scheduler, read_ahead=reader)
+    else:
+        hashes = ImageUtils.compute_hashes(image_files, metrics=metrics, scheduler=scheduler, read_ahead=reader)
+    elapsed = time.perf_counter() - start
+
+    counters = metrics.to_dict()["counters"]
+    return {
+        "mode": mode,
+        "depth": depth if mode == MODE_PREFETCH or reader else None,
+        "read_ahead_mb": read_ahead_mb or None,
+        "seconds": elapsed,
+        "images_per_second": len(image_files) / elapsed if elapsed else 0.0,
+        "hashed": len(hashes),
+        "remote_reads": simulator.remote_reads if simulator else None,
+        "prefetched": counters.get("io_prefetched", 0) + counters.get("read_ahead_hits", 0),
+    }
+
+
+def run_benchmark(corpus_dir: str, modes: List[str], depths: List[int], latency_ms: float,
+                  bandwidth_mbps: float = 0.0, drop_caches: bool = False,
+                  limit: Optional[int] = None, read_ahead_mb: float = 0.0) -> dict:
+    """
+    依次运行各读取策略
+
+    Returns:
+        dict: 配置与每次运行的结果
+    """
+    image_files = ImageUtils.get_image_files(corpus_dir, include_subdirs=True)
+    if limit:
+        image_files = image_files[:limit]
+
+    runs = []
+    for mode in modes:
+        for depth in (depths if mode == MODE_PREFETCH else [0]):
+            runs.append(run_once(image_files, mode, depth, corpus_dir, latency_ms, bandwidth_mbps, drop_caches))
+    if read_ahead_mb:
+        # 预读缓冲池自行读取，不叠加 prefetch 策略
+        for depth in depths:
+            runs.append(run_once(image_files, MODE_OFF, depth, corpus_dir, latency_ms, bandwidth_mbps,
+                                 drop_caches, read_ahead_mb))
+
+    baseline = next((run["seconds"] for run in runs if run["mode"] == MODE_OFF and not run["read_ahead_mb"]), None)
+    for run in runs:
+        run["speedup"] = baseline / run["seconds"] if baseline and run["seconds"] else None
+
+    return {
+        "corpus": corpus_dir,
+        "images": len(image_files),
+        "latency_ms": latency_ms,
+        "bandwidth_mbps": bandwidth_mbps,
+        "runs": runs,
+    }
+
+
+def print_report(result: dict):
+    """打印可读的基准测试报告"""
+    print(f"图库: {result['corpus']}  图片: {result['images']}  "
+          f"模拟延迟: {result['latency_ms']} ms  带宽: {result['bandwidth_mbps'] or '不限'} MB/s")
+    for run in result["runs"]:
+        label = run["mode"] if run["depth"] is None else f"{run['mode']}({run['depth']})"
+        if run["read_ahead_mb"]:
+            label = f"read-ahead({run['depth']})"
+        speedup = f"{run['speedup']:.2f}x" if run["speedup"] else "-"
+        print(f"  {label:<14} {run['seconds']:8.3f} s  {run['images_per_second']:10.1f} 图片/秒  {speedup:>7}"
+              f"  预读命中: {run['prefetched']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="读取调度基准测试")
+    parser.add_argument("--corpus", required=True, help="图库目录")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="先在 --corpus 目录生成 N 张基础图片的合成图库")
+    parser.add_argument("--seed", type=int, default=42, help="合成图库的随机种子")
+    parser.add_argument("--modes", nargs="+", default=[MODE_OFF, MODE_PREFETCH],
+                        choices=[mode for mode in MODES if mode != "auto"], help="要对比的读取策略")
+    parser.add_argument("--depths", nargs="+", type=int, default=[4, 8, 16], help="prefetch 策略的预读深度")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="模拟的每文件往返延迟，0 表示不模拟")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="模拟的带宽（MB/s），0 表示不限")
+    parser.add_argument("--read-ahead", type=float, nargs="?", const=64.0, default=0.0, metavar="MB",
+                        help="另外以各预读深度运行预读缓冲池，可指定预算（MB，默认64）")
+    parser.add_argument("--io-workers", type=int, help="任务执行服务的 IO 线程数")
+    parser.add_argument("--limit", type=int, help="只使用前 N 个文件")
+    parser.add_argument("--drop-caches", action="store_true", help="每次运行前清空页缓存（Linux，需要 root）")
+    parser.add_argument("--json", metavar="PATH", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_corpus(args.corpus, base_count=args.generate, seed=args.seed)
+    if args.io_workers:
+        get_injector().register(SERVICE_NAME, TaskExecutor(io_workers=args.io_workers), singleton=True)
+
+    result = run_benchmark(args.corpus, args.modes, args.depths, args.latency_ms,
+                           args.bandwidth, args.drop_caches, args.limit, args.read_ahead)
+    print_report(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+网格缩略图解码基准测试
+
+对比旧解码流程（完整解码后两次 LANCZOS thumbnail）与
+ImageUtils.get_cover_thumbnail 快速路径（EXIF 内嵌缩略图 / draft() / reduce()，
+单次重采样）的吞吐量（缩略图/秒）。
+
+用法:
+    python benchmarks/bench_thumbnails.py --corpus /tmp/camera --generate 20
+    python benchmarks/bench_thumbnails.py --corpus ~/Pictures/DCIM --size 180x120 --dpr 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.image_utils import Image, ImageUtils
+from synthetic_corpus import generate_camera_corpus
+
+
+def legacy_thumbnail(file_path: str, size: Tuple[int, int]):
+    """优化前的缩略图流程：限制到4096后转换模式，再缩放到卡片尺寸"""
+    target_width, target_height = size
+    with Image.open(file_path) as img:
+        max_side = max(target_width * 4, target_height * 4, 4096)
+        if img.width > max_side or img.height > max_side:
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        converted = img.convert("RGBA" if img.mode in ("RGBA", "LA") else "RGB")
+        converted.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
+        return converted
+
+
+def fast_thumbnail(file_path: str, size: Tuple[int, int]):
+    """当前的快速缩略图流程"""
+    return ImageUtils.get_cover_thumbnail(file_path, size)
+
+
+def time_decoder(decoder: Callable, files: List[str], size: Tuple[int, int]) -> Dict[str, float]:
+    """对一组文件计时一个解码器"""
+    start = time.perf_counter()
+    failures = 0
+    for file_path in files:
+        try:
+            decoder(file_path, size)
+        except Exception:
+            failures += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "thumbnails_per_second": len(files) / elapsed if elapsed else 0.0,
+        "failures": failures,
+    }
+
+
+def run_benchmark(corpus_dir: str, size: Tuple[int, int], dpr: float = 1.0) -> dict:
+    """
+    在图库上比较新旧缩略图解码流程
+
+    Args:
+        corpus_dir: 图库目录
+        size: 卡片逻辑尺寸
+        dpr: 设备像素比
+
+    Returns:
+        dict: 两种流程的耗时与吞吐量
+    """
+    files = ImageUtils.get_image_files(corpus_dir, include_subdirs=True)
+    pixel_size = (max(1, round(size[0] * dpr)), max(1, round(size[1] * dpr)))
+
+    # 预热文件系统缓存，使两种流程的读取成本一致
+    for file_path in files:
+        with open(file_path, "rb") as f:
+            f.read()
+
+    before = time_decoder(legacy_thumbnail, files, pixel_size)
+    after = time_decoder(fast_thumbnail, files, pixel_size)
+    return {
+        "corpus": corpus_dir,
+        "images": len(files),
+        "pixel_size": list(pixel_size),
+        "before": before,
+        "after": after,
+        "speedup": after["thumbnails_per_second"] / before["thumbnails_per_second"]
+        if before["thumbnails_per_second"] else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="网格缩略图解码基准测试")
+    parser.add_argument("--corpus", required=True, help="图库目录（建议使用相机拍摄的JPEG）")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="先在 --corpus 目录生成 N 张模拟相机JPEG（6000x4000，带EXIF缩略图）")
+    parser.add_argument("--no-exif-thumbnail", action="store_true", help="生成的图片不嵌入EXIF缩略图")
+    parser.add_argument("--size", default="180x120", help="卡片逻辑尺寸，如 180x120")
+    parser.add_argument("--dpr", type=float, default=1.0, help="设备像素比")
+    parser.add_argument("--json", metavar="PATH", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_camera_corpus(args.corpus, count=args.generate,
+                               thumbnail_size=None if args.no_exif_thumbnail else (480, 320))
+
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    result = run_benchmark(args.corpus, (width, height), args.dpr)
+
+    print(f"图库: {result['corpus']}  图片: {result['images']}  "
+          f"缩略图像素尺寸: {result['pixel_size'][0]}x{result['pixel_size'][1]}")
+    for name in ("before", "after"):
+        phase = result[name]
+        print(f"  {name:<8} {phase['seconds']:8.3f} s  {phase['thumbnails_per_second']:8.1f} 缩略图/秒"
+              f"  失败: {phase['failures']}")
+    print(f"  加速比: {result['speedup']:.1f}x")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
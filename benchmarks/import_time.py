@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+启动导入耗时检查
+
+在独立解释器中以 `-X importtime` 导入GUI启动路径（app.main 及两个功能模块），
+汇总累计导入耗时最高的模块，并检查重量级依赖是否被提前加载。
+发现禁止的模块时以非零状态退出，可作为回归检查使用。
+
+用法:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --top 30 --json import_time.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动路径上不应加载的重量级模块（只应在扫描或转换开始时导入）
+FORBIDDEN_MODULES = ("numpy", "scipy", "imagehash", "pywt", "PIL", "pillow_avif")
+
+# 模拟启动路径：主窗口与功能模块的导入
+STARTUP_IMPORTS = (
+    "import app.main\n"
+    "import app.ui.main_window\n"
+    "import app.modules.deduplication\n"
+    "import app.modules.avif_converter\n"
+)
+
+
+def measure_startup_imports() -> Dict[str, object]:
+    """
+    在子进程中执行启动导入并解析 -X importtime 输出
+
+    Returns:
+        Dict[str, object]: total_us（总耗时，微秒）、modules（模块 -> 累计耗时）、forbidden（被加载的禁止模块）
+    """
+    code = STARTUP_IMPORTS + (
+        "import sys\n"
+        f"print(','.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))\n"
+    )
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"启动导入失败:\n{proc.stderr[-2000:]}")
+
+    modules: Dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|", 2)
+        modules[name.strip()] = int(cumulative_us)
+        # 顶层导入（无额外缩进）的累计耗时之和即总导入耗时
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+
+    forbidden = [m for m in proc.stdout.strip().split(",") if m]
+    return {
+        "total_us": total_us,
+        "modules": modules,
+        "forbidden": forbidden,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查GUI启动路径的导入耗时")
+    parser.add_argument("--top", type=int, default=20, help="显示累计耗时最高的前N个模块")
+    parser.add_argument("--json", metavar="PATH", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    result = measure_startup_imports()
+
+    print(f"启动导入总耗时: {result['total_us'] / 1000:.1f} ms")
+    top: List = sorted(result["modules"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+    for name, us in top:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if result["forbidden"]:
+        print(f"错误: 启动路径加载了重量级模块: {', '.join(result['forbidden'])}")
+        sys.exit(1)
+    print("启动路径未加载重量级模块")
+
+
+if __name__ == "__main__":
+    main()
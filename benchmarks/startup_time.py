@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+冷启动首次绘制耗时测量
+
+多次启动应用（IMAGETRIM_EXIT_AFTER_FIRST_PAINT=1，首次绘制后立即退出），
+解析 `[STARTUP] 首次绘制耗时` 输出，报告中位数与最大值。
+默认使用 offscreen 平台与临时数据目录，不依赖网络与已有的背景缓存。
+
+用法:
+    python benchmarks/startup_time.py --runs 5
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_PAINT_PATTERN = re.compile(r"\[STARTUP\] 首次绘制耗时: (\d+) ms")
+
+
+def measure_first_paint(runs: int = 5, timeout: float = 60) -> List[float]:
+    """
+    多次启动应用并收集首次绘制耗时
+
+    Args:
+        runs: 启动次数
+        timeout: 单次启动超时时间（秒）
+
+    Returns:
+        List[float]: 每次启动的首次绘制耗时（毫秒）
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(
+            os.environ,
+            PYTHONPATH=PROJECT_ROOT,
+            IMAGETRIM_DATA_DIR=data_dir,
+            IMAGETRIM_EXIT_AFTER_FIRST_PAINT="1",
+        )
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+        for _ in range(runs):
+            proc = subprocess.run(
+                [sys.executable, os.path.join(PROJECT_ROOT, "app", "main.py")],
+                cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+                encoding="utf-8", errors="replace", timeout=timeout
+            )
+            match = FIRST_PAINT_PATTERN.search(proc.stdout)
+            if not match:
+                raise RuntimeError(f"未找到首次绘制时间:\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}")
+            results.append(float(match.group(1)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量应用冷启动到首次绘制的耗时")
+    parser.add_argument("--runs", type=int, default=5, help="启动次数")
+    args = parser.parse_args()
+
+    results = measure_first_paint(args.runs)
+    print(f"首次绘制耗时 ({len(results)} 次): " + ", ".join(f"{ms:.0f}" for ms in results) + " ms")
+    print(f"  中位数: {statistics.median(results):.0f} ms  最大值: {max(results):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
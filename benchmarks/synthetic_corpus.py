@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+合成测试图库生成器
+
+离线生成可复现的去重基准图库：N 张基础图片，以及每张基础图片的
+缩放、重新编码、裁剪、旋转变体。生成结果附带 manifest.json，
+记录每个文件所属的真实分组，用于计算查准率/查全率。
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+# 支持的变体类型
+VARIANT_KINDS = ("resized", "reencoded", "cropped", "rotated")
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _make_base_image(rng: random.Random, width: int, height: int) -> Image.Image:
+    """
+    生成一张内容随机但结构丰富的基础图片
+
+    低频色块保证感知哈希有可区分的结构，随机几何图形提供细节。
+    """
+    grid = Image.new("RGB", (8, 6))
+    grid.putdata([
+        (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        for _ in range(8 * 6)
+    ])
+    img = grid.resize((width, height), Image.Resampling.BICUBIC)
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(rng.randint(4, 10)):
+        x0 = rng.randrange(width)
+        y0 = rng.randrange(height)
+        x1 = min(width, x0 + rng.randint(width // 10, width // 2))
+        y1 = min(height, y0 + rng.randint(height // 10, height // 2))
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+
+    return img.filter(ImageFilter.GaussianBlur(radius=1))
+
+
+def _make_variant(img: Image.Image, kind: str, rng: random.Random, rotate_degrees: float) -> Image.Image:
+    """根据变体类型生成派生图片"""
+    if kind == "resized":
+        scale = rng.choice((0.5, 0.75, 1.5))
+        size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        return img.resize(size, Image.Resampling.LANCZOS)
+    if kind == "reencoded":
+        # 实际的有损编码在保存时完成（低质量 JPEG）
+        return img.copy()
+    if kind == "cropped":
+        dx = int(img.width * 0.05)
+        dy = int(img.height * 0.05)
+        return img.crop((dx, dy, img.width - dx, img.height - dy))
+    if kind == "rotated":
+        return img.rotate(rotate_degrees, resample=Image.Resampling.BICUBIC, fillcolor=(0, 0, 0))
+    raise ValueError(f"未知的变体类型: {kind}")
+
+
+def generate_corpus(output_dir: str, base_count: int = 100, width: int = 640, height: int = 480,
+                    variants: Optional[List[str]] = None, rotate_degrees: float = 3.0,
+                    seed: int = 42) -> Dict[str, int]:
+    """
+    生成合成图库
+
+    Args:
+        output_dir: 输出目录
+        base_count: 基础图片数量
+        width: 基础图片宽度
+        height: 基础图片高度
+        variants: 需要生成的变体类型列表，默认全部
+        rotate_degrees: 旋转变体的角度
+        seed: 随机种子，相同参数下生成结果完全一致
+
+    Returns:
+        Dict[str, int]: 相对路径到真实分组编号的映射
+    """
+    variants = list(variants) if variants else list(VARIANT_KINDS)
+    for kind in variants:
+        if kind not in VARIANT_KINDS:
+            raise ValueError(f"未知的变体类型: {kind}")
+
+    rng = random.Random(seed)
+    for sub_dir in ["originals"] + variants:
+        os.makedirs(os.path.join(output_dir, sub_dir), exist_ok=True)
+
+    ground_truth: Dict[str, int] = {}
+    for group_id in range(base_count):
+        base = _make_base_image(rng, width, height)
+        name = f"img_{group_id:05d}"
+
+        rel_path = os.path.join("originals", f"{name}.png")
+        base.save(os.path.join(output_dir, rel_path))
+        ground_truth[rel_path] = group_id
+
+        for kind in variants:
+            variant = _make_variant(base, kind, rng, rotate_degrees)
+            rel_path = os.path.join(kind, f"{name}.jpg")
+            quality = 35 if kind == "reencoded" else 90
+            variant.save(os.path.join(output_dir, rel_path), "JPEG", quality=quality)
+            ground_truth[rel_path] = group_id
+
+    manifest = {
+        "params": {
+            "base_count": base_count,
+            "width": width,
+            "height": height,
+            "variants": variants,
+            "rotate_degrees": rotate_degrees,
+            "seed": seed,
+        },
+        "files": {path.replace(os.sep, "/"): group for path, group in ground_truth.items()},
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return ground_truth
+
+
+def _exif_with_thumbnail(thumbnail_jpeg: bytes) -> bytes:
+    """
+    构造带 IFD1 内嵌缩略图的最小 EXIF 数据（小端 TIFF）
+
+    IFD0 只包含 Orientation，IFD1 指向紧随其后的 JPEG 缩略图。
+    """
+    def entry(tag: int, type_id: int, value: int) -> bytes:
+        return struct.pack("<HHII", tag, type_id, 1, value)
+
+    ifd0_offset = 8
+    ifd0_size = 2 + 12 + 4
+    ifd1_offset = ifd0_offset + ifd0_size
+    ifd1_size = 2 + 3 * 12 + 4
+    thumbnail_offset = ifd1_offset + ifd1_size
+
+    tiff = b"II*\x00" + struct.pack("<I", ifd0_offset)
+    tiff += struct.pack("<H", 1) + entry(0x0112, 3, 1) + struct.pack("<I", ifd1_offset)
+    tiff += struct.pack("<H", 3)
+    tiff += entry(0x0103, 3, 6)  # Compression = JPEG
+    tiff += entry(0x0201, 4, thumbnail_offset)  # JPEGInterchangeFormat
+    tiff += entry(0x0202, 4, len(thumbnail_jpeg))  # JPEGInterchangeFormatLength
+    tiff += struct.pack("<I", 0)
+    return b"Exif\x00\x00" + tiff + thumbnail_jpeg
+
+
+def generate_camera_corpus(output_dir: str, count: int = 20, width: int = 6000, height: int = 4000,
+                           thumbnail_size: Tuple[int, int] = (480, 320), seed: int = 42) -> List[str]:
+    """
+    生成模拟相机输出的大尺寸 JPEG（带 EXIF 内嵌缩略图），用于缩略图基准测试
+
+    Args:
+        output_dir: 输出目录
+        count: 图片数量
+        width: 图片宽度
+        height: 图片高度
+        thumbnail_size: 内嵌缩略图尺寸，传入 None 则不嵌入
+        seed: 随机种子
+
+    Returns:
+        List[str]: 生成的文件路径
+    """
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = []
+    for index in range(count):
+        # 先在小尺寸上生成内容再放大，避免生成大图时过慢
+        base = _make_base_image(rng, width // 8, height // 8).resize((width, height), Image.Resampling.BICUBIC)
+
+        save_kwargs = {"quality": 92}
+        if thumbnail_size:
+            buffer = io.BytesIO()
+            base.resize(thumbnail_size, Image.Resampling.LANCZOS).save(buffer, "JPEG", quality=80)
+            save_kwargs["exif"] = _exif_with_thumbnail(buffer.getvalue())
+
+        path = os.path.join(output_dir, f"camera_{index:05d}.jpg")
+        base.save(path, "JPEG", **save_kwargs)
+        paths.append(path)
+
+    return paths
+
+
+def load_ground_truth(corpus_dir: str) -> Dict[str, int]:
+    """
+    读取图库的真实分组
+
+    Args:
+        corpus_dir: 图库目录
+
+    Returns:
+        Dict[str, int]: 绝对路径到真实分组编号的映射
+    """
+    with open(os.path.join(corpus_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return {
+        os.path.normpath(os.path.join(corpus_dir, rel_path)): group
+        for rel_path, group in manifest["files"].items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成去重基准测试用的合成图库")
+    parser.add_argument("output_dir", help="输出目录")
+    parser.add_argument("-n", "--base-count", type=int, default=100, help="基础图片数量")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--variants", nargs="*", choices=VARIANT_KINDS, default=list(VARIANT_KINDS))
+    parser.add_argument("--rotate-degrees", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ground_truth = generate_corpus(
+        args.output_dir, args.base_count, args.width, args.height,
+        args.variants, args.rotate_degrees, args.seed
+    )
+    print(f"已生成 {len(ground_truth)} 个文件到 {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()